@@ -0,0 +1,568 @@
+import asyncio
+import json
+import time
+import traceback
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from requests.structures import CaseInsensitiveDict
+
+from github_pr_watcher.cache import RepoMetadata, ResponseCache
+from github_pr_watcher.cancellation import CancellationToken
+from github_pr_watcher.enrichment_registry import EnrichmentResult
+from github_pr_watcher.github_prs_client import (
+    EnrichmentBackend,
+    GitHubPRsClient,
+    SEARCH_RESULTS_LIMIT,
+    SearchOverflowError,
+    SectionBatchCallback,
+    UserBatchCallback,
+)
+from github_pr_watcher.objects import PullRequest
+from github_pr_watcher.query_planner import PRQueryConfig, PRSection
+from github_pr_watcher.rate_limiter import RateLimitScheduler
+from github_pr_watcher.settings import Settings
+from github_pr_watcher.utils import AsyncSingleFlight
+
+
+def _import_aiohttp():
+    try:
+        import aiohttp
+        return aiohttp
+    except ImportError as e:
+        raise ImportError(
+            "The asyncio fetch engine needs aiohttp: install the 'asyncio' extra "
+            "(pip install 'github-pr-watcher[asyncio]') or set fetch.engine back to 'threads'"
+        ) from e
+
+
+@dataclass
+class AsyncResponse:
+    status: int
+    data: object
+    next_url: Optional[str]
+
+
+@dataclass
+class AsyncRefresh:
+    """What the requests of one refresh share, all bound to that refresh's event loop"""
+    session: object  # aiohttp.ClientSession
+    semaphore: asyncio.Semaphore
+    request_flight: AsyncSingleFlight = field(default_factory=AsyncSingleFlight)
+    # Per-refresh dedup of enrichment and repo lookups, see EnrichmentRegistry
+    enrichment_tasks: Dict[int, asyncio.Future] = field(default_factory=dict)
+    repo_tasks: Dict[str, asyncio.Future] = field(default_factory=dict)
+
+
+# Refresh the current event loop runs; every get_pr_data call runs its own loop, so overlapping
+# refreshes (e.g. a reconcile while a refresh is still running) each see their own
+current_refresh: ContextVar[Optional[AsyncRefresh]] = ContextVar("current_refresh", default=None)
+
+
+class AsyncGitHubPRsClient(GitHubPRsClient):
+    """
+    Alternative fetch engine behind the same get_pr_data contract.
+
+    Every request of a refresh runs on one asyncio event loop (started by get_pr_data, so the
+    RefreshWorker thread can drive it as usual). Concurrency is bounded by a single semaphore and
+    connections are pooled per host by aiohttp, instead of nesting thread pools. The session,
+    semaphore and dedup tasks belong to the refresh (see AsyncRefresh), so refreshes may overlap.
+    """
+
+    def __init__(self, github_token, max_concurrency=50, max_retries=10, **kwargs):
+        # Fail when the engine is picked rather than on every refresh
+        _import_aiohttp()
+        super().__init__(github_token, **kwargs)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+
+    def get_pr_data(
+            self,
+            users: List[str],
+            section: PRSection = None,
+            settings: Settings = None,
+            updated_since: datetime | None = None,
+            on_batch: SectionBatchCallback | None = None,
+            on_search_batch: SectionBatchCallback | None = None,
+            section_priority: List[PRSection] | None = None,
+            cancel_token: CancellationToken | None = None,
+            sections: List[PRSection] | None = None,
+            failed_users: Set[str] | None = None,
+    ) -> Dict[PRSection, Dict[str, List[Tuple[PullRequest, bool]]]]:
+        if self._shutdown:
+            return {}
+
+        cancel_token = cancel_token or CancellationToken()
+        sections = [section] if section else sections or list(PRSection)
+        try:
+            with self._refresh_scope(cancel_token):
+                served, users = self._from_shared_cache(users, sections, on_batch)
+                if not users:
+                    return served
+                fetched = asyncio.run(
+                    self._get_pr_data_async(
+                        users,
+                        sections,
+                        settings,
+                        updated_since,
+                        on_batch,
+                        on_search_batch,
+                        section_priority,
+                        cancel_token,
+                        failed_users,
+                    )
+                )
+                return self._with_served(fetched, served)
+        except asyncio.CancelledError:
+            print("Refresh cancelled")
+            return {}
+        except Exception as e:
+            print(f"Error in get_pr_data: {e}")
+            traceback.print_exc()
+            return {}
+
+    async def _get_pr_data_async(
+            self,
+            users: List[str],
+            sections: List[PRSection],
+            settings: Optional[Settings],
+            updated_since: Optional[datetime] = None,
+            on_batch: Optional[SectionBatchCallback] = None,
+            on_search_batch: Optional[SectionBatchCallback] = None,
+            section_priority: Optional[List[PRSection]] = None,
+            cancel_token: Optional[CancellationToken] = None,
+            failed_users: Optional[Set[str]] = None,
+    ) -> Dict[PRSection, Dict[str, List[Tuple[PullRequest, bool]]]]:
+        if cancel_token is not None:
+            # Cancelling the main task cancels every request in flight and closes the session
+            loop = asyncio.get_running_loop()
+            main_task = asyncio.current_task()
+            cancel_token.on_cancel(
+                lambda: loop.is_closed() or loop.call_soon_threadsafe(main_task.cancel)
+            )
+
+        aiohttp = _import_aiohttp()
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency, limit_per_host=self.max_concurrency, ttl_dns_cache=300
+        )
+        connect_timeout, read_timeout = self.request_timeout
+        timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+
+        async with aiohttp.ClientSession(
+                headers=self.headers, connector=connector, timeout=timeout
+        ) as session:
+            refresh = AsyncRefresh(session, asyncio.Semaphore(self.max_concurrency))
+            current_refresh.set(refresh)
+
+            recent_days = settings.thresholds.recently_closed_days if settings else 7
+            plan = self.query_planner.plan(sections, recent_days, updated_since)
+            print(plan.explain())
+            if self.enrichment_cache is not None:
+                self.enrichment_cache.prune(recent_days)
+
+            # No stage queues here: queries for urgent sections are simply started first, so they
+            # get to the semaphore before the others
+            queries = sorted(
+                plan.queries,
+                key=lambda query: self._query_priority(plan.sections_for(query), section_priority),
+            )
+            prs_by_author_by_query = await asyncio.gather(
+                *(
+                    self._fetch_closed_window_async(
+                        users,
+                        recent_days,
+                        self._section_batches(plan.sections_for(query), on_batch),
+                        failed_users,
+                    )
+                    if self._uses_closed_window(plan.sections_for(query))
+                    else self._fetch_prs_by_author_async(
+                        users,
+                        query,
+                        self._section_batches(plan.sections_for(query), on_batch),
+                        self._search_batches(plan.sections_for(query), on_search_batch),
+                        failed_users,
+                    )
+                    for query in queries
+                )
+            )
+
+            prs_by_author_by_section = {}
+            for query_config, prs_by_author in zip(queries, prs_by_author_by_query):
+                for section_plan in plan.sections_for(query_config):
+                    prs_by_author_by_section[section_plan.section] = self._filter_section(
+                        prs_by_author, section_plan
+                    )
+
+        self._print_coalescing_stats(refresh.request_flight)
+        self._print_rate_limit_budget()
+        self._save_enrichment_cache()
+        if self.closed_window is not None:
+            self.closed_window.save()
+        self.repo_cache.save()
+        if self.response_cache is not None:
+            self.response_cache.save()
+
+        if self._shutdown:
+            return {}
+        return prs_by_author_by_section
+
+    async def _fetch_prs_by_author_async(
+            self,
+            users: List[str],
+            query_config: PRQueryConfig,
+            on_user_done: Optional[UserBatchCallback] = None,
+            on_user_searched: Optional[UserBatchCallback] = None,
+            failed_users: Optional[Set[str]] = None,
+    ) -> Dict[str, List[Tuple[PullRequest, bool]]]:
+        prs_by_user_batches = await asyncio.gather(
+            *(
+                self._search_for_users_prs_async(batch, query_config.query, 100, failed_users)
+                for batch in self._batch_authors(users, query_config.query)
+            )
+        )
+        prs_by_user = {
+            user: prs for batch in prs_by_user_batches for user, prs in batch.items() if prs
+        }
+        for user, prs in prs_by_user.items():
+            self._report_user_done(on_user_searched, user, [(pr, True) for pr in prs])
+
+        async def enrich_user(user: str, prs: List[PullRequest]):
+            user_results = await self._enrich_async(prs)
+            self._report_user_done(on_user_done, user, user_results)
+            return user, user_results
+
+        return dict(
+            await asyncio.gather(*(enrich_user(user, prs) for user, prs in prs_by_user.items()))
+        )
+
+    async def _fetch_closed_window_async(
+            self,
+            users: List[str],
+            recent_days: int,
+            on_user_done: Optional[UserBatchCallback] = None,
+            failed_users: Optional[Set[str]] = None,
+    ) -> Dict[str, List[Tuple[PullRequest, bool]]]:
+        window_fetch = self.closed_window.plan_fetch(users, recent_days)
+        full_query, incremental_query = self._closed_window_queries(window_fetch, recent_days)
+        # Their windows are kept as they were, see ClosedPRWindow.apply
+        window_failed_users: Set[str] = set()
+        full_results, incremental_results = await asyncio.gather(
+            self._fetch_prs_by_author_async(
+                window_fetch.full_users, full_query, failed_users=window_failed_users
+            ),
+            (
+                self._fetch_prs_by_author_async(
+                    window_fetch.incremental_users,
+                    incremental_query,
+                    failed_users=window_failed_users,
+                )
+                if incremental_query
+                else _no_results()
+            ),
+        )
+        if self._shutdown:
+            return {}
+        if window_failed_users:
+            print(
+                "Closed window: keeping the previous window of "
+                f"{', '.join(sorted(window_failed_users))}"
+            )
+            if failed_users is not None:
+                failed_users.update(window_failed_users)
+        window_by_user = self.closed_window.apply(
+            window_fetch, full_results, incremental_results, window_failed_users
+        )
+        for user, user_results in window_by_user.items():
+            self._report_user_done(on_user_done, user, user_results)
+        return window_by_user
+
+    async def _search_for_users_prs_async(
+            self,
+            users: List[str],
+            query: str,
+            max_results_per_user: int,
+            failed_users: Optional[Set[str]] = None,
+    ) -> Dict[str, List[PullRequest]]:
+        batch_query = f"{query} {' '.join(f'author:{user}' for user in users)}"
+        try:
+            results = await self._search_prs_async(
+                batch_query, max_total_count=SEARCH_RESULTS_LIMIT if len(users) > 1 else None
+            )
+        except SearchOverflowError as e:
+            print(f"{e}, splitting batch of {len(users)} authors")
+            middle = len(users) // 2
+            halves = await asyncio.gather(
+                self._search_for_users_prs_async(
+                    users[:middle], query, max_results_per_user, failed_users
+                ),
+                self._search_for_users_prs_async(
+                    users[middle:], query, max_results_per_user, failed_users
+                ),
+            )
+            return {**halves[0], **halves[1]}
+        except Exception as e:
+            print(f"Error fetching PRs for {', '.join(users)}: {e}")
+            traceback.print_exc()
+            if failed_users is not None:
+                failed_users.update(users)
+            return {user: [] for user in users}
+
+        prs_by_user = {user: [] for user in users}
+        user_by_login = {user.lower(): user for user in users}
+        for pr in results:
+            if user := user_by_login.get(pr.user.login.lower()):
+                if len(prs_by_user[user]) < max_results_per_user:
+                    prs_by_user[user].append(pr)
+        return prs_by_user
+
+    async def _search_prs_async(self, query: str, max_total_count=None) -> List[PullRequest]:
+        results = []
+        url = f"{self.base_url}/search/issues"
+        params = {"q": query, "per_page": 100}
+        while url and not self._shutdown:
+            response = await self._request_async('GET', url, params=params)
+            data = response.data
+            if max_total_count is not None and data.get("total_count", 0) > max_total_count:
+                raise SearchOverflowError(
+                    f"Query '{query}' matches {data['total_count']} results (max {max_total_count})"
+                )
+            for item in data["items"]:
+                try:
+                    results.append(self._parse_search_item(item))
+                except Exception as e:
+                    print(f"Warning: Error parsing PR item: {e}")
+                    traceback.print_exc()
+            # The next link already carries the query parameters
+            url, params = response.next_url, None
+        return results
+
+    async def _enrich_async(self, prs: List[PullRequest]) -> List[EnrichmentResult]:
+        enrichment_tasks = current_refresh.get().enrichment_tasks
+        cached_results, _ = self._enrichment_from_cache(
+            [pr for pr in prs if pr.id not in enrichment_tasks]
+        )
+        for cached_pr, partial in cached_results:
+            cached_task = asyncio.get_running_loop().create_future()
+            cached_task.set_result((cached_pr, partial))
+            enrichment_tasks[cached_pr.id] = cached_task
+
+        if self.enrichment_backend == EnrichmentBackend.GRAPHQL:
+            new_prs = [pr for pr in prs if pr.id not in enrichment_tasks]
+            batch_size = self.graphql_enricher.batch_size
+            for start in range(0, len(new_prs), batch_size):
+                batch = new_prs[start:start + batch_size]
+                batch_task = asyncio.ensure_future(self._enrich_graphql_batch_async(batch))
+                for index, pr in enumerate(batch):
+                    enrichment_tasks[pr.id] = asyncio.ensure_future(
+                        self._pick(batch_task, index)
+                    )
+        else:
+            for pr in prs:
+                if pr.id not in enrichment_tasks:
+                    enrichment_tasks[pr.id] = asyncio.ensure_future(self._enrich_rest_async(pr))
+
+        results = list(await asyncio.gather(*(enrichment_tasks[pr.id] for pr in prs)))
+        cached_ids = {cached_pr.id for cached_pr, _ in cached_results}
+        self._remember_enrichment([result for result in results if result[0].id not in cached_ids])
+        return results
+
+    @staticmethod
+    async def _pick(batch_task: asyncio.Future, index: int) -> EnrichmentResult:
+        return (await asyncio.shield(batch_task))[index]
+
+    async def _enrich_graphql_batch_async(self, prs: List[PullRequest]) -> List[EnrichmentResult]:
+        try:
+            response = await self._request_async(
+                'POST',
+                self.graphql_enricher.graphql_url,
+                json={"query": self.graphql_enricher.build_query(prs)},
+            )
+            details_by_id = self.graphql_enricher.parse_response(prs, response.data)
+        except Exception as e:
+            print(f"Warning: Error fetching GraphQL batch of {len(prs)} PRs: {e}")
+            traceback.print_exc()
+            details_by_id = {}
+
+        results = []
+        for pr in prs:
+            details = details_by_id.get(pr.id)
+            if details is None:
+                results.append((self._mark_enrichment_failed(pr), True))
+                continue
+            try:
+                comments, reviews = await self._list_truncated_discussion_async(pr, details)
+            except Exception as e:
+                print(f"Warning: Error listing the discussion of PR #{pr.number}: {e}")
+                traceback.print_exc()
+                results.append((self._mark_enrichment_failed(pr), True))
+                continue
+            pr.archived = details["archived"]
+            self.repo_cache.put(pr.repo_owner, pr.repo_name, archived=pr.archived)
+            pr.commit_count = details["commit_count"]
+            self._apply_pr_details(pr, details)
+            self._apply_comments(pr, comments)
+            self._apply_reviews(pr, reviews)
+            results.append((pr, False))
+        return results
+
+    async def _list_truncated_discussion_async(
+            self, pr: PullRequest, details: dict
+    ) -> Tuple[List[dict], List[dict]]:
+        """Async counterpart of _list_truncated_discussion"""
+        repo_url = f"{self.base_url}/repos/{pr.repo_owner}/{pr.repo_name}"
+
+        async def listed(items: Optional[List[dict]], url: str) -> List[dict]:
+            return items if items is not None else await self._get_all_pages_async(url)
+
+        comments, reviews = await asyncio.gather(
+            listed(details["comments"], f"{repo_url}/issues/{pr.number}/comments"),
+            listed(details["reviews"], f"{repo_url}/pulls/{pr.number}/reviews"),
+        )
+        return comments, reviews
+
+    async def _enrich_rest_async(self, pr: PullRequest) -> EnrichmentResult:
+        """REST enrichment with every call of the PR in flight at once; counts come from the payload"""
+        try:
+            repo_url = f"{self.base_url}/repos/{pr.repo_owner}/{pr.repo_name}"
+            repo_metadata, details, comments, reviews = await asyncio.gather(
+                self._repo_metadata_async(pr.repo_owner, pr.repo_name),
+                self._request_async('GET', f"{repo_url}/pulls/{pr.number}"),
+                self._get_all_pages_async(f"{repo_url}/issues/{pr.number}/comments"),
+                self._get_all_pages_async(f"{repo_url}/pulls/{pr.number}/reviews"),
+            )
+            if repo_metadata:
+                pr.archived = repo_metadata.archived
+            self._apply_pr_details(pr, details.data)
+            pr.commit_count = details.data.get("commits", 0)
+            self._apply_comments(pr, comments)
+            self._apply_reviews(pr, reviews)
+            return pr, False
+        except Exception as e:
+            print(f"Warning: Error fetching details for PR #{pr.number}: {e}")
+            traceback.print_exc()
+            return self._mark_enrichment_failed(pr), True
+
+    async def _repo_metadata_async(self, owner: str, repo: str) -> Optional[RepoMetadata]:
+        if entry := self.repo_cache.peek(owner, repo):
+            return entry
+
+        repo_tasks = current_refresh.get().repo_tasks
+        key = f"{owner}/{repo}".lower()
+        if key not in repo_tasks:
+            async def fetch() -> Optional[RepoMetadata]:
+                self.repo_cache.record_miss()
+                response = await self._request_async('GET', f"{self.base_url}/repos/{owner}/{repo}")
+                if response.status != 200:
+                    return None
+                return self.repo_cache.put(owner, repo, archived=response.data.get("archived", False))
+
+            repo_tasks[key] = asyncio.ensure_future(fetch())
+        return await asyncio.shield(repo_tasks[key])
+
+    async def _get_all_pages_async(self, url: str) -> list:
+        items = []
+        params = {"per_page": 100}
+        while url:
+            response = await self._request_async('GET', url, params=params)
+            items.extend(response.data)
+            url, params = response.next_url, None
+        return items
+
+    async def _request_async(self, method: str, url: str, params=None, json=None) -> AsyncResponse:
+        """Async counterpart of _make_request, coalescing identical GETs in flight"""
+        if method != "GET":
+            return await self._send_request_async(method, url, params, json)
+        return await current_refresh.get().request_flight.do(
+            ResponseCache.key(url, params),
+            lambda: self._send_request_async(method, url, params, json),
+        )
+
+    async def _send_request_async(
+            self, method: str, url: str, params=None, json=None
+    ) -> AsyncResponse:
+        """Conditional GETs, rate limit waits and retries"""
+        aiohttp = _import_aiohttp()
+        retries = 0
+        backoff = 2
+        send_validators = True
+
+        while True:
+            resource = RateLimitScheduler.resource_for(url)
+            while (acquired := self.token_pool.try_acquire(resource))[0] is None:
+                await asyncio.sleep(acquired[1])
+            pooled, _ = acquired
+
+            # Cached per token, another token's validators would replay what it can see
+            cache_key = ResponseCache.key(url, params, pooled.identity) if method == "GET" else None
+            headers = {}
+            if cache_key and self.response_cache is not None and send_validators:
+                headers = self.response_cache.conditional_headers(cache_key)
+            headers = {**headers, "Authorization": pooled.authorization}
+
+            try:
+                try:
+                    refresh = current_refresh.get()
+                    async with refresh.semaphore:
+                        async with refresh.session.request(
+                                method, url, params=params, json=json, headers=headers
+                        ) as response:
+                            body = await response.text()
+                            status = response.status
+                            response_headers = CaseInsensitiveDict(response.headers)
+                            next_link = response.links.get("next")
+                            next_url = str(next_link["url"]) if next_link else None
+                except BaseException:
+                    self.token_pool.release(pooled, resource)
+                    raise
+                self.token_pool.observe(pooled, resource, status, response_headers, body)
+
+                retry_after = response_headers.get("Retry-After")
+                if status in (403, 429) and retry_after:
+                    print(f"Secondary rate limit hit. Waiting {retry_after} seconds...")
+                    await asyncio.sleep(float(retry_after))
+                    continue
+
+                remaining = int(response_headers.get("X-RateLimit-Remaining", 1))
+                if status in (403, 429) and remaining == 0:
+                    wait_time = max(0.0, int(response_headers.get("X-RateLimit-Reset", 0)) - time.time())
+                    print(f"Rate limited. Waiting {wait_time:.1f} seconds...")
+                    await asyncio.sleep(wait_time)
+                    continue
+
+                if status == 304 and self.response_cache is not None:
+                    if entry := self.response_cache.hit(cache_key):
+                        return AsyncResponse(200, _loads(entry.body), next_url)
+                    # Evicted while in flight, ask again without validators
+                    send_validators = False
+                    continue
+
+                if status >= 400:
+                    raise aiohttp.ClientResponseError(
+                        None, (), status=status, message=body[:200], headers=response_headers
+                    )
+
+                if cache_key and self.response_cache is not None:
+                    self.response_cache.miss()
+                    if status == 200:
+                        self.response_cache.store(cache_key, url, body, response_headers)
+                return AsyncResponse(status, _loads(body), next_url)
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if retries >= self.max_retries or self._shutdown:
+                    print(f"Max retries ({self.max_retries}) exceeded. Last error: {e}")
+                    raise
+                wait_time = min(backoff, 10)
+                print(f"Request failed: {e}. Retrying in {wait_time:.1f} seconds...")
+                await asyncio.sleep(wait_time)
+                retries += 1
+                backoff *= 2
+
+
+async def _no_results() -> dict:
+    return {}
+
+
+def _loads(body: str):
+    return json.loads(body) if body else None
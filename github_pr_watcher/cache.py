@@ -0,0 +1,417 @@
+import json
+import os
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from github_pr_watcher.objects import PullRequest
+from github_pr_watcher.utils import SingleFlight, as_utc, parse_datetime
+
+DEFAULT_CACHE_DIR = Path(__file__).parent
+
+# Headers worth replaying when a cached body is served for a 304
+_REPLAYED_HEADERS = ["Content-Type", "Link"]
+
+
+def write_json_atomically(path: Path, data) -> None:
+    """Write JSON to a temp file and move it into place so a crash never leaves half a file"""
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    body: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self):
+        return asdict(self)
+
+    @staticmethod
+    def parse(data: dict) -> "CachedResponse":
+        return CachedResponse(
+            url=data["url"],
+            body=data["body"],
+            etag=data.get("etag"),
+            last_modified=data.get("last_modified"),
+            headers=data.get("headers", {}),
+        )
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self):
+        return {**asdict(self), "hit_ratio": self.hit_ratio}
+
+
+class ResponseCache:
+    """
+    Conditional-request cache for GitHub GET responses.
+
+    Stores the ETag / Last-Modified validators together with the body of each response, so that
+    the next request for the same URL+params can be sent with If-None-Match / If-Modified-Since.
+    When GitHub answers 304 (which does not count against the primary rate limit) the cached body
+    is served instead. Entries are evicted least-recently-used first once max_entries is reached.
+    Keys include the identity of the token a response was fetched with, since what GitHub returns
+    depends on what the token can see.
+    """
+
+    def __init__(self, cache_file: Optional[Path] = None, max_entries: int = 5000):
+        self.cache_file = cache_file or DEFAULT_CACHE_DIR / "response_cache.json"
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def key(url: str, params: Optional[dict] = None, identity: Optional[str] = None) -> str:
+        key = url
+        if params:
+            key += "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+        return f"{identity} {key}" if identity else key
+
+    def conditional_headers(self, key: str) -> Dict[str, str]:
+        """Validator headers to send for the given key, empty if we have nothing cached"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if not entry:
+            return {}
+
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def resolve(self, key: str, response: requests.Response) -> requests.Response:
+        """Serve the cached body on a 304, otherwise store the fresh response and return it"""
+        if response.status_code == 304:
+            if entry := self.hit(key):
+                return self._to_response(entry, response)
+            # We sent validators for an entry that got evicted meanwhile; let the caller retry
+            return response
+
+        self.miss()
+        if response.status_code == 200:
+            self.store(
+                key,
+                url=response.url,
+                body=response.text,
+                headers={name: response.headers[name] for name in response.headers},
+            )
+        return response
+
+    def hit(self, key: str) -> Optional[CachedResponse]:
+        """Entry to serve for a 304 on key, if it's still cached"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+            return entry
+
+    def miss(self) -> None:
+        with self._lock:
+            self.stats.misses += 1
+
+    def store(self, key: str, url: str, body: str, headers: Dict[str, str]) -> None:
+        """Cache a 200 response body if it carries validators"""
+        headers = CaseInsensitiveDict(headers)
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+
+        entry = CachedResponse(
+            url=url,
+            body=body,
+            etag=etag,
+            last_modified=last_modified,
+            headers={name: headers[name] for name in _REPLAYED_HEADERS if name in headers},
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def save(self) -> None:
+        """Persist cache entries so validators survive restarts"""
+        try:
+            with self._lock:
+                data = {key: entry.to_dict() for key, entry in self._entries.items()}
+            write_json_atomically(self.cache_file, data)
+        except Exception as e:
+            print(f"Error saving response cache: {e}")
+            traceback.print_exc()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _to_response(entry: CachedResponse, not_modified: requests.Response) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.url = entry.url
+        response.request = not_modified.request
+        response.encoding = "utf-8"
+        response._content = entry.body.encode("utf-8")
+        # Fresh headers (e.g. rate limit) from the 304 win over the replayed ones
+        response.headers = CaseInsensitiveDict({**entry.headers, **not_modified.headers})
+        response.headers["X-From-Cache"] = "1"
+        return response
+
+    def _load(self) -> None:
+        if not self.cache_file.exists():
+            return
+
+        try:
+            with open(self.cache_file, "r") as f:
+                data = json.load(f)
+            for key, entry_data in list(data.items())[-self.max_entries:]:
+                self._entries[key] = CachedResponse.parse(entry_data)
+        except Exception as e:
+            print(f"Error loading response cache: {e}")
+            traceback.print_exc()
+            self._entries.clear()
+
+
+@dataclass
+class RepoMetadata:
+    archived: bool
+    fetched_at: float
+
+    def to_dict(self):
+        return asdict(self)
+
+    @staticmethod
+    def parse(data: dict) -> "RepoMetadata":
+        return RepoMetadata(archived=data["archived"], fetched_at=data["fetched_at"])
+
+
+class RepoMetadataCache:
+    """
+    Repository metadata (currently just the archived flag) keyed by owner/repo.
+
+    Entries are refreshed after ttl and lookups are single-flight, so concurrent enrichments of
+    PRs in the same repository share one /repos request.
+    """
+
+    def __init__(self, cache_file: Optional[Path] = None, ttl: timedelta = timedelta(days=1)):
+        self.cache_file = cache_file or DEFAULT_CACHE_DIR / "repo_cache.json"
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries: Dict[str, RepoMetadata] = {}
+        self._lock = threading.Lock()
+        self._single_flight = SingleFlight()
+        self._load()
+
+    def get(
+            self, owner: str, repo: str, fetch: Callable[[], Optional[dict]]
+    ) -> Optional[RepoMetadata]:
+        """Return cached metadata, calling fetch (which returns the /repos payload or None) when stale"""
+        if entry := self.peek(owner, repo):
+            return entry
+
+        def fetch_and_store() -> Optional[RepoMetadata]:
+            self.record_miss()
+            repo_data = fetch()
+            if repo_data is None:
+                return None
+            return self.put(owner, repo, archived=repo_data.get("archived", False))
+
+        return self._single_flight.do(self._key(owner, repo), fetch_and_store)
+
+    def peek(self, owner: str, repo: str) -> Optional[RepoMetadata]:
+        """Fresh cached metadata without fetching, None if missing or stale"""
+        with self._lock:
+            entry = self._entries.get(self._key(owner, repo))
+            if entry and time.time() - entry.fetched_at < self.ttl.total_seconds():
+                self.stats.hits += 1
+                return entry
+        return None
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.stats.misses += 1
+
+    def put(self, owner: str, repo: str, archived: bool) -> RepoMetadata:
+        entry = RepoMetadata(archived=archived, fetched_at=time.time())
+        with self._lock:
+            self._entries[self._key(owner, repo)] = entry
+        return entry
+
+    def save(self) -> None:
+        try:
+            with self._lock:
+                data = {key: entry.to_dict() for key, entry in self._entries.items()}
+            write_json_atomically(self.cache_file, data)
+        except Exception as e:
+            print(f"Error saving repo cache: {e}")
+            traceback.print_exc()
+
+    @staticmethod
+    def _key(owner: str, repo: str) -> str:
+        return f"{owner}/{repo}".lower()
+
+    def _load(self) -> None:
+        if not self.cache_file.exists():
+            return
+
+        try:
+            with open(self.cache_file, "r") as f:
+                data = json.load(f)
+            self._entries = {key: RepoMetadata.parse(entry) for key, entry in data.items()}
+        except Exception as e:
+            print(f"Error loading repo cache: {e}")
+            traceback.print_exc()
+            self._entries = {}
+
+
+@dataclass
+class CachedEnrichment:
+    pr: dict  # PullRequest.to_dict() of the enriched PR
+    updated_at: Optional[str]
+    closed_at: Optional[str] = None
+
+    @property
+    def pinned(self) -> bool:
+        """Closed and merged PRs no longer change, so they are kept until they leave the window"""
+        return self.closed_at is not None
+
+    def to_dict(self):
+        return asdict(self)
+
+    @staticmethod
+    def parse(data: dict) -> "CachedEnrichment":
+        return CachedEnrichment(
+            pr=data["pr"], updated_at=data.get("updated_at"), closed_at=data.get("closed_at")
+        )
+
+
+class EnrichmentCache:
+    """
+    Enriched PRs keyed by PR id, valid for as long as the PR's updated_at stays the same.
+
+    A search result whose updated_at matches the cached one is served from here instead of being
+    enriched again. Entries of closed/merged PRs are pinned: they are only dropped once they age out
+    of the recently closed window (see prune). Open PRs are evicted least-recently-used first once
+    there are more than max_entries entries.
+    """
+
+    def __init__(self, cache_file: Optional[Path] = None, max_entries: int = 5000):
+        self.cache_file = cache_file or DEFAULT_CACHE_DIR / "enrichment_cache.json"
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._entries: OrderedDict[int, CachedEnrichment] = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+
+    def get(self, pr: PullRequest) -> Optional[PullRequest]:
+        """Enriched copy of pr if it has not been updated since it was cached"""
+        with self._lock:
+            entry = self._entries.get(pr.id)
+            if entry is None or entry.updated_at != _isoformat(pr.updated_at):
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(pr.id)
+            self.stats.hits += 1
+        return PullRequest.parse_pr(dict(entry.pr))
+
+    def put(self, pr: PullRequest) -> None:
+        entry = CachedEnrichment(
+            pr=pr.to_dict(),
+            updated_at=_isoformat(pr.updated_at),
+            closed_at=_isoformat(pr.closed_at),
+        )
+        with self._lock:
+            self._entries[pr.id] = entry
+            self._entries.move_to_end(pr.id)
+            self._evict()
+
+    def prune(self, recently_closed_days: int) -> int:
+        """Drop pinned entries closed before the recently closed window, returning how many"""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=recently_closed_days)
+        with self._lock:
+            expired = [
+                pr_id
+                for pr_id, entry in self._entries.items()
+                if entry.pinned and as_utc(parse_datetime(entry.closed_at)) < cutoff
+            ]
+            for pr_id in expired:
+                del self._entries[pr_id]
+        return len(expired)
+
+    def save(self) -> None:
+        try:
+            with self._lock:
+                data = {str(pr_id): entry.to_dict() for pr_id, entry in self._entries.items()}
+            write_json_atomically(self.cache_file, data)
+        except Exception as e:
+            print(f"Error saving enrichment cache: {e}")
+            traceback.print_exc()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries:
+            # Least recently used open PR first, pinned ones only if nothing else is left
+            victim = next(
+                (pr_id for pr_id, entry in self._entries.items() if not entry.pinned),
+                next(iter(self._entries)),
+            )
+            del self._entries[victim]
+            self.stats.evictions += 1
+
+    def _load(self) -> None:
+        if not self.cache_file.exists():
+            return
+
+        try:
+            with open(self.cache_file, "r") as f:
+                data = json.load(f)
+            for pr_id, entry_data in data.items():
+                self._entries[int(pr_id)] = CachedEnrichment.parse(entry_data)
+            self._evict()
+        except Exception as e:
+            print(f"Error loading enrichment cache: {e}")
+            traceback.print_exc()
+            self._entries.clear()
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
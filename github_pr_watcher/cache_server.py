@@ -0,0 +1,261 @@
+import argparse
+import hmac
+import json
+import os
+import socket
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+from github_pr_watcher.daemon import (
+    DaemonServer,
+    PRWatcherDaemon,
+    _DaemonHandler,
+    create_headless_client,
+    run_until_stopped,
+)
+from github_pr_watcher.github_prs_client import GitHubPRsClient
+from github_pr_watcher.settings import DaemonSettings, Settings, SharedCacheSettings
+from github_pr_watcher.shared_cache import DISCOVERY_PROBE, discovery_proof
+from github_pr_watcher.ui.ui_state import SECTION_NAME_BY_PR_SECTION, UIState
+
+CACHE_SERVER_STATE_FILE = "cache_server_state.json"
+# Subscriptions not renewed for this long are dropped, and their users no longer refreshed
+SUBSCRIPTION_TTL_SECONDS = 15 * 60
+# However demanding its subscribers, the server refreshes at most this often
+MIN_REFRESH_INTERVAL_SECONDS = 60
+LOOPBACK_HOSTS = {"127.0.0.1", "localhost", "::1"}
+
+
+@dataclass
+class Subscription:
+    client_id: str
+    users: List[str]
+    # The oldest data the client accepts; the server refreshes often enough to stay under it
+    max_age_seconds: float
+    subscribed_at: float
+    last_seen_at: float
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class SharedCacheDaemon(PRWatcherDaemon):
+    """
+    A PRWatcherDaemon for the union of its subscribers' users (plus settings.users): every user is
+    fetched once per refresh however many watchers subscribe to them, refreshing at least as often
+    as the most demanding subscriber needs.
+
+    Watchers subscribe, and renew their subscription, with every snapshot they read; see
+    shared_cache.SharedCache for the client side.
+    """
+
+    def __init__(
+            self,
+            github_prs_client: GitHubPRsClient,
+            ui_state: UIState,
+            settings: Settings,
+            clock=time.time,
+    ):
+        super().__init__(github_prs_client, ui_state, settings)
+        self.subscriptions: Dict[str, Subscription] = {}
+        self._clock = clock
+        self._subscriptions_lock = threading.Lock()
+
+    def subscribe(self, client_id: str, users: List[str], max_age_seconds: float) -> None:
+        now = self._clock()
+        watched = {user.lower() for user in self.watched_users()}
+        with self._subscriptions_lock:
+            existing = self.subscriptions.get(client_id)
+            self.subscriptions[client_id] = Subscription(
+                client_id=client_id,
+                users=list(users),
+                max_age_seconds=max_age_seconds,
+                subscribed_at=existing.subscribed_at if existing else now,
+                last_seen_at=now,
+            )
+        if any(user.lower() not in watched for user in users):
+            print(f"{client_id} subscribed to new users, refreshing")
+            self.request_refresh()
+
+    def live_subscriptions(self) -> List[Subscription]:
+        expired_before = self._clock() - SUBSCRIPTION_TTL_SECONDS
+        with self._subscriptions_lock:
+            for client_id, subscription in list(self.subscriptions.items()):
+                if subscription.last_seen_at < expired_before:
+                    print(f"Subscription of {client_id} expired")
+                    del self.subscriptions[client_id]
+            return list(self.subscriptions.values())
+
+    def watched_users(self) -> List[str]:
+        """Every subscribed user once, matching logins case-insensitively"""
+        users_by_login = {}
+        subscribed = [user for sub in self.live_subscriptions() for user in sub.users]
+        for user in self.settings.users + subscribed:
+            users_by_login.setdefault(user.lower(), user)
+        return list(users_by_login.values())
+
+    def refresh_interval_seconds(self) -> float:
+        # Refreshing at half the max age keeps the data under it despite the refresh's duration
+        max_ages = [sub.max_age_seconds / 2 for sub in self.live_subscriptions()]
+        return max(
+            MIN_REFRESH_INTERVAL_SECONDS, min([super().refresh_interval_seconds()] + max_ages)
+        )
+
+    def snapshot_for(self, users: List[str]) -> dict:
+        """
+        The users' PRs by section, with when each user was last fetched (None if not yet); users
+        are listed under the names they were asked with
+        """
+        stored_by_login = {user.lower(): user for user in self.watched_users()}
+        with self._lock:
+            snapshot = {}
+            for user in users:
+                stored = stored_by_login.get(user.lower(), user)
+                synced_at = self.ui_state.synced_at_by_user.get(stored)
+                sections = {}
+                for pr_section, section_name in SECTION_NAME_BY_PR_SECTION.items():
+                    prs_by_author, _ = self.ui_state.get_pr_data(section_name)
+                    sections[pr_section.name] = [pr.to_dict() for pr in prs_by_author.get(stored, [])]
+                snapshot[user] = {
+                    "synced_at": synced_at.isoformat() if synced_at else None,
+                    "sections": sections,
+                }
+            return {"users": snapshot}
+
+    def status(self) -> dict:
+        return {
+            **super().status(),
+            "subscriptions": [sub.to_dict() for sub in self.live_subscriptions()],
+        }
+
+
+class SharedCacheServer(DaemonServer):
+    """
+    DaemonServer for a SharedCacheDaemon, on host:port, adding:
+
+    POST /snapshot {client_id, users, max_age_seconds} subscribe and get the users' snapshot
+
+    Watchers find it by broadcasting DISCOVERY_PROBE and a nonce to discovery_port; with a secret
+    the answer proves the server knows it (see discovery_proof). Off localhost every request must
+    carry the shared secret as a bearer token, which plain HTTP sends in the clear: put the server
+    behind TLS there.
+    """
+
+    def __init__(
+            self,
+            daemon: SharedCacheDaemon,
+            settings: SharedCacheSettings,
+            secret: Optional[str],
+    ):
+        if not secret and settings.host not in LOOPBACK_HOSTS:
+            raise ValueError(
+                f"Set {settings.secret_env_var} to share PR data beyond localhost"
+            )
+        super().__init__(
+            daemon, DaemonSettings(socket_path="", host=settings.host, port=settings.port)
+        )
+        self.cache_settings = settings
+        self.secret = secret
+        self._discovery_socket: Optional[socket.socket] = None
+
+    def _handler_class(self) -> type:
+        return type(
+            "SharedCacheHandler",
+            (_SharedCacheHandler,),
+            {"daemon": self.daemon, "secret": self.secret},
+        )
+
+    def start(self) -> None:
+        super().start()
+        self._discovery_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._discovery_socket.bind((self.cache_settings.host, self.cache_settings.discovery_port))
+        threading.Thread(
+            target=self._answer_probes, name="cache-discovery", daemon=True
+        ).start()
+
+    def stop(self) -> None:
+        if self._discovery_socket is not None:
+            self._discovery_socket.close()
+            self._discovery_socket = None
+        super().stop()
+
+    def _answer_probes(self) -> None:
+        discovery_socket = self._discovery_socket
+        port = self._server.server_address[1]
+        while True:
+            try:
+                probe, sender = discovery_socket.recvfrom(1024)
+            except OSError:
+                # Closed by stop
+                return
+            if not probe.startswith(DISCOVERY_PROBE):
+                continue
+            answer = {"port": port}
+            if self.secret:
+                nonce = probe[len(DISCOVERY_PROBE):].decode(errors="replace")
+                answer["proof"] = discovery_proof(self.secret, nonce, port)
+            discovery_socket.sendto(json.dumps(answer).encode(), sender)
+
+
+class _SharedCacheHandler(_DaemonHandler):
+    daemon: SharedCacheDaemon
+    secret: Optional[str]
+
+    def do_GET(self):
+        if self._authorized():
+            super().do_GET()
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        if self.path != "/snapshot":
+            return super().do_POST()
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length))
+            users = [str(user) for user in body["users"]]
+            max_age_seconds = float(body["max_age_seconds"])
+            client_id = str(body["client_id"])
+        except (KeyError, TypeError, ValueError):
+            return self._reply(400, {"message": "Expected client_id, users and max_age_seconds"})
+        self.daemon.subscribe(client_id, users, max_age_seconds)
+        self._serve(lambda: self.daemon.snapshot_for(users))
+
+    def _authorized(self) -> bool:
+        if not self.secret:
+            return True
+        supplied = self.headers.get("Authorization", "")
+        if hmac.compare_digest(supplied, f"Bearer {self.secret}"):
+            return True
+        self._reply(401, {"message": "Invalid or missing secret"})
+        return False
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="gpw cache-server",
+        description="Fetch PRs once for every watcher subscribed to this server, without Qt",
+    )
+    parser.add_argument("--full", action="store_true", help="fetch everything at start")
+    args = parser.parse_args(argv)
+
+    settings = Settings.load()
+    github_prs_client = create_headless_client(settings)
+    if github_prs_client is None:
+        return 1
+    # The server is the cache, it must not subscribe to itself
+    github_prs_client.shared_cache = None
+    daemon = SharedCacheDaemon(
+        github_prs_client, UIState.load(CACHE_SERVER_STATE_FILE), settings
+    )
+    try:
+        server = SharedCacheServer(
+            daemon, settings.shared_cache, os.environ.get(settings.shared_cache.secret_env_var)
+        )
+    except ValueError as e:
+        print(e)
+        return 1
+    run_until_stopped(daemon, server, full=args.full)
+    return 0
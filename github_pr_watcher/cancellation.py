@@ -0,0 +1,74 @@
+import threading
+import time
+import traceback
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+
+
+class RefreshCancelled(Exception):
+    """Raised by the fetch stack once the refresh it runs for was cancelled"""
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation for one refresh.
+
+    The refresh checks it between steps and sleeps through it, so cancel wakes up rate limit and
+    retry waits right away; callbacks registered with on_cancel drop queued work. Requests already
+    on the wire are bounded by the client's connect/read timeouts.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            self._run(callback)
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """Run callback on cancel, or right away if already cancelled"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        self._run(callback)
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise RefreshCancelled()
+
+    def sleep(self, seconds: float) -> None:
+        """time.sleep that raises RefreshCancelled as soon as the token is cancelled"""
+        if self._event.wait(seconds):
+            raise RefreshCancelled()
+
+    @staticmethod
+    def _run(callback: Callable[[], None]) -> None:
+        try:
+            callback()
+        except Exception as e:
+            print(f"Error running cancellation callback: {e}")
+            traceback.print_exc()
+
+
+# Token of the refresh the current thread works for, read by the HTTP layer
+current_token: ContextVar[Optional[CancellationToken]] = ContextVar("current_token", default=None)
+
+
+def cancellable_sleep(seconds: float) -> None:
+    """Sleep on the current refresh's token, or a plain sleep outside of a refresh"""
+    if token := current_token.get():
+        token.sleep(seconds)
+    else:
+        time.sleep(seconds)
@@ -0,0 +1,172 @@
+import re
+import time
+import traceback
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import requests
+
+from github_pr_watcher.utils import parse_datetime
+
+NOTIFICATIONS = "notifications"
+USER_EVENTS = "user_events"
+
+# Until GitHub says otherwise with X-Poll-Interval
+DEFAULT_POLL_INTERVAL_SECONDS = 60
+
+# (owner, repo, number)
+PRRef = Tuple[str, str, int]
+
+_PR_API_URL = re.compile(r"/repos/([^/]+)/([^/]+)/(?:pulls|issues)/(\d+)$")
+# Event types whose payload references a PR, and where its number is
+_PR_NUMBER_BY_EVENT_TYPE = {
+    "PullRequestEvent": lambda payload: (payload.get("pull_request") or {}).get("number"),
+    "PullRequestReviewEvent": lambda payload: (payload.get("pull_request") or {}).get("number"),
+    "PullRequestReviewCommentEvent": lambda payload: (
+        (payload.get("pull_request") or {}).get("number")
+    ),
+    "IssueCommentEvent": lambda payload: (
+        payload["issue"]["number"] if "pull_request" in payload.get("issue", {}) else None
+    ),
+}
+
+
+@dataclass
+class FeedCursor:
+    url: str
+    last_modified: Optional[str] = None
+    poll_interval: float = DEFAULT_POLL_INTERVAL_SECONDS
+    next_poll_at: float = 0.0
+    # Newest item seen; items up to it have already been reported
+    seen_until: Optional[datetime] = None
+
+
+@dataclass
+class ChangeSet:
+    # Whether any feed was due and polled
+    polled: bool = False
+    # PRs the feeds reported activity on since the previous poll
+    pr_refs: Set[PRRef] = field(default_factory=set)
+    # A feed could not be read in full, so changes may have been missed
+    failed: bool = False
+    not_modified: int = 0
+    requests: int = 0
+
+
+class ChangeFeed:
+    """
+    Cheap change detection ahead of a refresh.
+
+    Polls the authenticated user's notifications and/or the watched users' public events with
+    If-Modified-Since, so an unchanged feed costs a single 304 that doesn't count against the rate
+    limit, and waits as long as GitHub's X-Poll-Interval asks between polls. What the feeds report
+    are the PRs with new activity, which can then be re-enriched directly instead of searching
+    every user again.
+
+    send(url, headers) makes the request; notifications are per token, so it has to always use
+    the same one.
+    """
+
+    def __init__(
+            self,
+            send: Callable[[str, Dict[str, str]], requests.Response],
+            base_url: str,
+            sources: List[str],
+            clock: Callable[[], float] = time.time,
+    ):
+        self.send = send
+        self.base_url = base_url
+        self.sources = sources
+        self._clock = clock
+        self._cursors: Dict[str, FeedCursor] = {}
+
+    def seconds_until_due(self, users: List[str]) -> float:
+        now = self._clock()
+        return max(0.0, min(cursor.next_poll_at - now for cursor in self._cursors_for(users)))
+
+    def poll(self, users: List[str], since: Optional[datetime] = None) -> ChangeSet:
+        """
+        Poll the feeds that are due, reporting the PRs with activity since their previous poll.
+
+        since is when the data the changes are applied to was fetched: the first poll of a feed
+        reports the activity after it, or only sets the starting point without it.
+        """
+        changes = ChangeSet()
+        for cursor in self._cursors_for(users):
+            if cursor.next_poll_at > self._clock():
+                continue
+            changes.polled = True
+            changes.requests += 1
+            try:
+                if cursor.seen_until is None and since is not None:
+                    cursor.seen_until = since
+                self._poll_cursor(cursor, changes)
+            except Exception as e:
+                print(f"Error polling change feed {cursor.url}: {e}")
+                traceback.print_exc()
+                changes.failed = True
+                cursor.next_poll_at = self._clock() + cursor.poll_interval
+        return changes
+
+    def _cursors_for(self, users: List[str]) -> List[FeedCursor]:
+        urls = []
+        if NOTIFICATIONS in self.sources:
+            urls.append(f"{self.base_url}/notifications?all=true")
+        if USER_EVENTS in self.sources:
+            urls.extend(f"{self.base_url}/users/{user}/events" for user in users)
+        return [self._cursors.setdefault(url, FeedCursor(url)) for url in urls]
+
+    def _poll_cursor(self, cursor: FeedCursor, changes: ChangeSet) -> None:
+        headers = {"If-Modified-Since": cursor.last_modified} if cursor.last_modified else {}
+        response = self.send(cursor.url, headers)
+        if poll_interval := response.headers.get("X-Poll-Interval"):
+            cursor.poll_interval = float(poll_interval)
+        cursor.next_poll_at = self._clock() + cursor.poll_interval
+
+        if response.status_code == 304:
+            changes.not_modified += 1
+            return
+        if response.status_code != 200:
+            hint = (
+                ", does the token have the notifications scope?"
+                if "/notifications" in cursor.url and response.status_code in (401, 403, 404)
+                else ""
+            )
+            print(f"Change feed {cursor.url} returned {response.status_code}{hint}")
+            changes.failed = True
+            return
+        cursor.last_modified = response.headers.get("Last-Modified", cursor.last_modified)
+
+        items = [self._parse_item(item) for item in response.json()]
+        if cursor.seen_until is not None:
+            new_items = [(at, pr_ref) for at, pr_ref in items if at > cursor.seen_until]
+            changes.pr_refs.update(pr_ref for _, pr_ref in new_items if pr_ref is not None)
+            if new_items and len(new_items) == len(items):
+                # Only the first page is read, older activity may be on the next ones
+                changes.failed = True
+        cursor.seen_until = max(
+            [at for at, _ in items] + [cursor.seen_until or datetime.fromtimestamp(0).astimezone()]
+        )
+
+    @staticmethod
+    def _parse_item(item: dict) -> Tuple[datetime, Optional[PRRef]]:
+        """When a feed item happened and the PR it references, if any"""
+        if "subject" in item:
+            # Notification thread
+            match = _PR_API_URL.search(item["subject"].get("url") or "")
+            pr_ref = (
+                (match.group(1), match.group(2), int(match.group(3)))
+                if match and item["subject"].get("type") == "PullRequest"
+                else None
+            )
+            return parse_datetime(item["updated_at"]), pr_ref
+
+        # Event
+        number_of = _PR_NUMBER_BY_EVENT_TYPE.get(item.get("type"))
+        number = number_of(item.get("payload") or {}) if number_of else None
+        pr_ref = None
+        if number is not None and "/" in item.get("repo", {}).get("name", ""):
+            owner, repo = item["repo"]["name"].split("/", 1)
+            pr_ref = (owner, repo, int(number))
+        return parse_datetime(item["created_at"]), pr_ref
@@ -0,0 +1,190 @@
+import json
+import threading
+import traceback
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Collection, Dict, List, Optional
+
+from github_pr_watcher.cache import DEFAULT_CACHE_DIR, write_json_atomically
+from github_pr_watcher.enrichment_registry import EnrichmentResult
+from github_pr_watcher.objects import PullRequest
+from github_pr_watcher.utils import as_utc
+
+# Overlap between consecutive incremental fetches, covering search index lag
+FETCH_OVERLAP = timedelta(minutes=2)
+
+
+@dataclass
+class UserWindow:
+    pulled_at: datetime  # Last time the whole window was pulled
+    fetched_at: datetime  # Last time the window was brought up to date
+    prs: List[PullRequest] = field(default_factory=list)
+
+    def to_dict(self):
+        return {
+            "pulled_at": self.pulled_at.isoformat(),
+            "fetched_at": self.fetched_at.isoformat(),
+            "prs": [pr.to_dict() for pr in self.prs],
+        }
+
+    @staticmethod
+    def parse(data: dict) -> "UserWindow":
+        return UserWindow(
+            pulled_at=datetime.fromisoformat(data["pulled_at"]),
+            fetched_at=datetime.fromisoformat(data["fetched_at"]),
+            prs=PullRequest.parse_prs(data["prs"]),
+        )
+
+
+@dataclass
+class WindowFetch:
+    """What a refresh has to fetch to bring the window up to date"""
+    started_at: datetime
+    # Users whose whole window has to be pulled (new users, or the window was widened)
+    full_users: List[str]
+    # Users for which only PRs updated since incremental_since are needed
+    incremental_users: List[str]
+    incremental_since: Optional[datetime]
+
+
+class ClosedPRWindow:
+    """
+    Locally held Recently Closed PRs, so that the section doesn't re-download its whole window on
+    every refresh.
+
+    Each user's window remembers when it was last fetched; the next refresh only searches closed
+    PRs updated since then (which covers both newly closed PRs and late comments on older ones) and
+    merges them in, while PRs whose closed_at fell out of recently_closed_days are evicted locally.
+    The whole window is only pulled again for new users, when the window is widened, or once
+    full_pull_interval has passed, which bounds the damage of an incremental fetch that failed.
+    """
+
+    def __init__(
+            self,
+            window_file: Optional[Path] = None,
+            full_pull_interval: timedelta = timedelta(days=1),
+    ):
+        self.window_file = window_file or DEFAULT_CACHE_DIR / "closed_window.json"
+        self.full_pull_interval = full_pull_interval
+        self.days: Optional[int] = None
+        self._windows: Dict[str, UserWindow] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def plan_fetch(self, users: List[str], recently_closed_days: int) -> WindowFetch:
+        started_at = datetime.now(timezone.utc)
+        with self._lock:
+            if self.days is None or recently_closed_days > self.days:
+                # Widened: what we hold doesn't reach back far enough
+                self._windows.clear()
+            self.days = recently_closed_days
+            self._evict(started_at)
+
+            incremental_users = [
+                user for user in users
+                if (window := self._windows.get(self._key(user)))
+                and started_at - window.pulled_at < self.full_pull_interval
+            ]
+            full_users = [user for user in users if user not in incremental_users]
+            incremental_since = (
+                min(self._windows[self._key(user)].fetched_at for user in incremental_users)
+                - FETCH_OVERLAP
+                if incremental_users
+                else None
+            )
+        return WindowFetch(started_at, full_users, incremental_users, incremental_since)
+
+    def apply(
+            self,
+            fetch: WindowFetch,
+            full_results: Dict[str, List[EnrichmentResult]],
+            incremental_results: Dict[str, List[EnrichmentResult]],
+            failed_users: Collection[str] = (),
+    ) -> Dict[str, List[EnrichmentResult]]:
+        """
+        Merge what was fetched for the planned fetch and return the windows of its users.
+
+        The windows of failed_users, whose searches failed, are left as they were, timestamps
+        included, so their next refresh fetches the same changes again.
+        """
+        failed_keys = {self._key(user) for user in failed_users}
+        with self._lock:
+            for user in fetch.full_users:
+                if self._key(user) in failed_keys:
+                    continue
+                self._windows[self._key(user)] = UserWindow(
+                    pulled_at=fetch.started_at,
+                    fetched_at=fetch.started_at,
+                    prs=[pr for pr, _ in full_results.get(user, [])],
+                )
+
+            for user in fetch.incremental_users:
+                if self._key(user) in failed_keys:
+                    continue
+                window = self._windows[self._key(user)]
+                previous_by_id = {pr.id: pr for pr in window.prs}
+                for pr, partial in incremental_results.get(user, []):
+                    if partial and pr.id in previous_by_id:
+                        continue
+                    previous_by_id[pr.id] = pr
+                window.prs = list(previous_by_id.values())
+                window.fetched_at = fetch.started_at
+
+            self._evict(fetch.started_at)
+            window_by_user = {
+                user: sorted(
+                    self._windows[self._key(user)].prs,
+                    key=lambda pr: pr.closed_at or fetch.started_at,
+                    reverse=True,
+                )
+                for user in fetch.full_users + fetch.incremental_users
+                if self._key(user) in self._windows
+            }
+
+        return {user: [(pr, False) for pr in prs] for user, prs in window_by_user.items() if prs}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._windows.clear()
+
+    def save(self) -> None:
+        try:
+            with self._lock:
+                data = {
+                    "days": self.days,
+                    "users": {user: window.to_dict() for user, window in self._windows.items()},
+                }
+            write_json_atomically(self.window_file, data)
+        except Exception as e:
+            print(f"Error saving closed PR window: {e}")
+            traceback.print_exc()
+
+    def _evict(self, now: datetime) -> None:
+        cutoff = now - timedelta(days=self.days)
+        for window in self._windows.values():
+            window.prs = [
+                pr for pr in window.prs
+                if pr.closed_at is None or as_utc(pr.closed_at) >= cutoff
+            ]
+
+    @staticmethod
+    def _key(user: str) -> str:
+        return user.lower()
+
+    def _load(self) -> None:
+        if not self.window_file.exists():
+            return
+
+        try:
+            with open(self.window_file, "r") as f:
+                data = json.load(f)
+            self.days = data.get("days")
+            self._windows = {
+                user: UserWindow.parse(window) for user, window in data.get("users", {}).items()
+            }
+        except Exception as e:
+            print(f"Error loading closed PR window: {e}")
+            traceback.print_exc()
+            self.days = None
+            self._windows = {}
@@ -0,0 +1,337 @@
+import argparse
+import json
+import os
+import signal
+import socketserver
+import threading
+import traceback
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional, Set
+
+from github_pr_watcher.github_auth import get_github_api_keys
+from github_pr_watcher.github_prs_client import GitHubPRsClient
+from github_pr_watcher.settings import DaemonSettings, Settings
+from github_pr_watcher.ui.ui_state import SECTION_NAME_BY_PR_SECTION, UIState
+
+# Kept apart from the desktop app's state.json, which the UI writes on its own
+DAEMON_STATE_FILE = "daemon_state.json"
+# How long to wait before retrying a refresh that failed
+FAILED_REFRESH_RETRY_SECONDS = 60
+
+
+class PRWatcherDaemon:
+    """
+    Headless fetcher: refreshes the PRs of the watched users (settings.users) every refresh
+    interval with the same delta refresh and reconcile flow as the desktop app, and keeps them in a
+    UIState of its own. Users never fetched before are fetched in full on their own.
+
+    run_forever blocks until stop is called; request_refresh wakes it up early. snapshot and status
+    are what DaemonServer serves, and may be called from any thread.
+    """
+
+    def __init__(self, github_prs_client: GitHubPRsClient, ui_state: UIState, settings: Settings):
+        self.github_prs_client = github_prs_client
+        self.ui_state = ui_state
+        self.settings = settings
+        self.refreshing = False
+        self.last_refresh_at: Optional[datetime] = None
+        self.last_reconciled_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+
+    def run_forever(self, full: bool = False) -> None:
+        """Refresh until stopped, the first time fetching everything if full is set"""
+        while not self._stopped.is_set():
+            succeeded = self.refresh(full)
+            full = full and not succeeded
+            self._wake.wait(
+                self.refresh_interval_seconds() if succeeded else FAILED_REFRESH_RETRY_SECONDS
+            )
+            self._wake.clear()
+
+    def watched_users(self) -> List[str]:
+        return self.settings.users
+
+    def refresh_interval_seconds(self) -> float:
+        return self.settings.refresh.to_millis() / 1000
+
+    def request_refresh(self) -> None:
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+        self.github_prs_client.close()
+
+    def refresh(self, full: bool = False) -> bool:
+        """Fetch what changed since the last refresh (everything if full) into the state"""
+        users = self.watched_users()
+        if not users:
+            print("No users to watch, nothing to refresh")
+            return False
+
+        with self._lock:
+            new_users = (
+                [user for user in users if user not in self.ui_state.synced_at_by_user]
+                if self.settings.fetch.delta_refresh and not full
+                else users
+            )
+            known_users = [user for user in users if user not in new_users]
+            updated_since = (
+                self.ui_state.delta_since(users=known_users, by_user=True) if known_users else None
+            )
+
+        self.refreshing = True
+        try:
+            succeeded = True
+            if new_users:
+                succeeded = self._refresh_users(new_users, None)
+            if known_users:
+                succeeded = self._refresh_users(known_users, updated_since) and succeeded
+            if succeeded:
+                self.last_refresh_at = datetime.now(timezone.utc)
+                self.last_error = None
+            return succeeded
+        finally:
+            self.refreshing = False
+
+    def _refresh_users(self, users: List[str], updated_since: Optional[datetime]) -> bool:
+        started_at = datetime.now(timezone.utc)
+        try:
+            failed_users: Set[str] = set()
+            prs_by_author_by_section = self.github_prs_client.get_pr_data(
+                users,
+                settings=self.settings,
+                updated_since=updated_since,
+                failed_users=failed_users,
+            )
+            if not prs_by_author_by_section:
+                # An empty result means the fetch failed, the next delta starts from the old point
+                self.last_error = "No data returned from GitHub API"
+                return False
+
+            pr_ids_by_section = (
+                self.github_prs_client.get_section_pr_ids(users, settings=self.settings)
+                if updated_since is not None and self._reconcile_due()
+                else {}
+            )
+            fetched_users = [user for user in users if user not in failed_users]
+            with self._lock:
+                self._apply(
+                    fetched_users, prs_by_author_by_section, updated_since, pr_ids_by_section
+                )
+                # Users whose search failed, and the sections they are part of, keep their sync
+                # point so that the next delta fetches their changes again
+                self.ui_state.mark_users_synced(fetched_users, started_at)
+                if not failed_users:
+                    self.ui_state.mark_synced(SECTION_NAME_BY_PR_SECTION.values(), started_at)
+                self.ui_state.save()
+            if failed_users:
+                self.last_error = f"Search failed for {', '.join(sorted(failed_users))}"
+                return False
+            return True
+
+        except Exception as e:
+            print(f"Error refreshing data: {e}")
+            traceback.print_exc()
+            self.last_error = str(e)
+            return False
+
+    def _apply(self, users, prs_by_author_by_section, updated_since, pr_ids_by_section) -> None:
+        if updated_since is None:
+            # Only these users were fetched, the others keep their data
+            for pr_section, section_name in SECTION_NAME_BY_PR_SECTION.items():
+                prs_by_author = prs_by_author_by_section.get(pr_section, {})
+                self.ui_state.replace_users_pr_data(
+                    section_name, users, {user: prs_by_author.get(user, []) for user in users}
+                )
+            return
+
+        # Delta refresh: PRs seen in any section are replaced wherever they were shown
+        changed_pr_ids = {
+            pr.id
+            for prs_by_author in prs_by_author_by_section.values()
+            for prs in prs_by_author.values()
+            for pr, _ in prs
+        }
+        print(f"Delta refresh: {len(changed_pr_ids)} PRs updated since {updated_since}")
+        for pr_section, section_name in SECTION_NAME_BY_PR_SECTION.items():
+            self.ui_state.merge_pr_data(
+                section_name, prs_by_author_by_section.get(pr_section, {}), changed_pr_ids
+            )
+        for pr_section, pr_ids in pr_ids_by_section.items():
+            section_name = SECTION_NAME_BY_PR_SECTION[pr_section]
+            if dropped := self.ui_state.retain_pr_ids(section_name, pr_ids, users=users):
+                print(f"Reconciliation dropped {dropped} PRs from {section_name.value}")
+        if pr_ids_by_section:
+            self.last_reconciled_at = datetime.now()
+
+    def _reconcile_due(self) -> bool:
+        reconcile_interval = timedelta(minutes=self.settings.fetch.reconcile_interval_minutes)
+        return (
+            self.last_reconciled_at is None
+            or datetime.now() - self.last_reconciled_at >= reconcile_interval
+        )
+
+    def snapshot(self) -> dict:
+        """The state in the format of the state file, see UIState.to_dict"""
+        with self._lock:
+            return self.ui_state.to_dict()
+
+    def status(self) -> dict:
+        return {
+            "users": self.watched_users(),
+            "refreshing": self.refreshing,
+            "last_refresh_at": self.last_refresh_at.isoformat() if self.last_refresh_at else None,
+            "last_error": self.last_error,
+            "rate_limits": self.github_prs_client.token_pool.snapshot(),
+        }
+
+
+class DaemonServer:
+    """
+    Local JSON API over a PRWatcherDaemon, on a Unix socket or on host:port:
+
+    GET /state    the PR data, in the format of the state file (see UIState.to_dict)
+    GET /status   users, refresh progress and the rate limit budgets
+    POST /refresh start a refresh now
+    """
+
+    def __init__(self, daemon: PRWatcherDaemon, settings: DaemonSettings):
+        self.daemon = daemon
+        self.settings = settings
+        self._server: Optional[socketserver.BaseServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        if self.settings.socket_path:
+            return f"unix:{os.path.expanduser(self.settings.socket_path)}"
+        host, port = (
+            self._server.server_address[:2]
+            if self._server
+            else (self.settings.host, self.settings.port)
+        )
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        handler = self._handler_class()
+        if self.settings.socket_path:
+            socket_path = os.path.expanduser(self.settings.socket_path)
+            os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+            if os.path.exists(socket_path):
+                # Left behind by a daemon that didn't shut down cleanly
+                os.remove(socket_path)
+            self._server = socketserver.ThreadingUnixStreamServer(socket_path, handler)
+            os.chmod(socket_path, 0o600)
+        else:
+            self._server = ThreadingHTTPServer((self.settings.host, self.settings.port), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="daemon-api", daemon=True
+        )
+        self._thread.start()
+        print(f"Serving PR data on {self.address}")
+
+    def _handler_class(self) -> type:
+        return type("DaemonHandler", (_DaemonHandler,), {"daemon": self.daemon})
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        if self.settings.socket_path:
+            socket_path = os.path.expanduser(self.settings.socket_path)
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+
+
+class _DaemonHandler(BaseHTTPRequestHandler):
+    daemon: PRWatcherDaemon
+
+    def do_GET(self):
+        routes = {"/state": self.daemon.snapshot, "/status": self.daemon.status}
+        self._serve(routes.get(self.path))
+
+    def do_POST(self):
+        if self.path != "/refresh":
+            return self._serve(None)
+        self.daemon.request_refresh()
+        self._reply(202, {"message": "Refresh requested"})
+
+    def _serve(self, route: Optional[Callable[[], dict]]) -> None:
+        if route is None:
+            return self._reply(404, {"message": "Not Found"})
+        try:
+            self._reply(200, route())
+        except Exception as e:
+            print(f"Error serving {self.path}: {e}")
+            traceback.print_exc()
+            self._reply(500, {"message": str(e)})
+
+    def _reply(self, status: int, data: dict) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix socket peers have no address
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        pass
+
+
+def create_headless_client(settings: Settings) -> Optional[GitHubPRsClient]:
+    """A client with the configured tokens, or None if there are none; never asks for one"""
+    # Imported here since main.py is also the desktop app's entry point
+    from github_pr_watcher.main import create_github_prs_client
+
+    named_tokens = get_github_api_keys(settings.auth, interactive=False)
+    if not named_tokens:
+        print(
+            "No GitHub token found: store one in the Keychain with the desktop app, or set "
+            f"{', '.join(settings.auth.token_env_vars)}"
+        )
+        return None
+    print(f"Using {len(named_tokens)} GitHub token(s): {', '.join(n for n, _ in named_tokens)}")
+    return create_github_prs_client(named_tokens, settings)
+
+
+def run_until_stopped(daemon: PRWatcherDaemon, server: "DaemonServer", full: bool = False) -> None:
+    """Serve and refresh until SIGINT or SIGTERM"""
+    server.start()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: daemon.stop())
+    try:
+        daemon.run_forever(full=full)
+    finally:
+        server.stop()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="gpw daemon", description="Fetch PRs on a schedule and serve them as JSON, without Qt"
+    )
+    parser.add_argument("--once", action="store_true", help="refresh once and exit")
+    parser.add_argument("--full", action="store_true", help="fetch everything, not just changes")
+    args = parser.parse_args(argv)
+
+    settings = Settings.load()
+    github_prs_client = create_headless_client(settings)
+    if github_prs_client is None:
+        return 1
+    daemon = PRWatcherDaemon(github_prs_client, UIState.load(DAEMON_STATE_FILE), settings)
+    if args.once:
+        return 0 if daemon.refresh(full=args.full) else 1
+
+    run_until_stopped(daemon, DaemonServer(daemon, settings.daemon), full=args.full)
+    return 0
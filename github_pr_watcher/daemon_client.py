@@ -0,0 +1,137 @@
+import http.client
+import json
+import os
+import socket
+import traceback
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+from github_pr_watcher.cancellation import CancellationToken
+from github_pr_watcher.github_prs_client import GitHubPRsClient, SectionBatchCallback
+from github_pr_watcher.objects import PullRequest
+from github_pr_watcher.query_planner import PRSection
+from github_pr_watcher.settings import DaemonSettings, Settings
+from github_pr_watcher.ui.ui_state import SECTION_NAME_BY_PR_SECTION, UIState
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class DaemonConnection:
+    """Talks to the JSON API of a running `gpw daemon`, see DaemonServer"""
+
+    def __init__(self, settings: DaemonSettings, timeout: float = 10):
+        self.settings = settings
+        self.timeout = timeout
+
+    def get(self, path: str) -> dict:
+        status, data = self._request("GET", path)
+        if status != 200:
+            raise ConnectionError(f"Daemon returned {status} for {path}: {data.get('message')}")
+        return data
+
+    def request_refresh(self) -> None:
+        self._request("POST", "/refresh")
+
+    def _request(self, method: str, path: str) -> Tuple[int, dict]:
+        if self.settings.socket_path:
+            connection = _UnixHTTPConnection(
+                os.path.expanduser(self.settings.socket_path), self.timeout
+            )
+        else:
+            connection = http.client.HTTPConnection(
+                self.settings.host, self.settings.port, timeout=self.timeout
+            )
+        try:
+            connection.request(method, path)
+            response = connection.getresponse()
+            return response.status, json.loads(response.read() or b"{}")
+        finally:
+            connection.close()
+
+
+class RemotePRsClient(GitHubPRsClient):
+    """
+    Serves get_pr_data from a running daemon instead of GitHub, so the desktop app becomes a thin
+    client that only renders what the daemon fetched.
+
+    Every refresh gets all of the daemon's PRs for the users and reconciliation gets the ids the
+    daemon shows, so the app merges them exactly like a refresh from GitHub. Delta refreshes are
+    not filtered by updated_since: that is the app's own sync point, and the daemon fetches on its
+    own schedule, so a PR updated just before it may only reach the daemon afterwards. Full
+    refreshes also ask the daemon to refresh.
+    """
+
+    def __init__(self, connection: DaemonConnection, **kwargs):
+        super().__init__(None, **kwargs)
+        self.connection = connection
+
+    def get_pr_data(
+            self,
+            users: List[str],
+            section: PRSection = None,
+            settings: Settings = None,
+            updated_since: datetime | None = None,
+            on_batch: SectionBatchCallback | None = None,
+            on_search_batch: SectionBatchCallback | None = None,
+            section_priority: List[PRSection] | None = None,
+            cancel_token: CancellationToken | None = None,
+            sections: List[PRSection] | None = None,
+            failed_users: Set[str] | None = None,
+    ) -> Dict[PRSection, Dict[str, List[Tuple[PullRequest, bool]]]]:
+        if self._shutdown:
+            return {}
+        try:
+            if updated_since is None:
+                # A full refresh asks the daemon for fresh data too; it shows up on a later refresh
+                self.connection.request_refresh()
+            state = self._daemon_state()
+            prs_by_author_by_section = {}
+            for pr_section in [section] if section else sections or list(PRSection):
+                prs_by_author, _ = state.get_pr_data(SECTION_NAME_BY_PR_SECTION[pr_section])
+                prs_by_author_by_section[pr_section] = {
+                    user: [(pr, False) for pr in prs_by_author.get(user, [])] for user in users
+                }
+            return prs_by_author_by_section
+        except Exception as e:
+            print(f"Error reading PR data from the daemon: {e}")
+            traceback.print_exc()
+            return {}
+
+    def get_section_pr_ids(
+            self,
+            users: List[str],
+            settings: Settings = None,
+            cancel_token: CancellationToken | None = None,
+    ) -> Dict[PRSection, Set[int]]:
+        if self._shutdown:
+            return {}
+        try:
+            state = self._daemon_state()
+            return {
+                pr_section: {
+                    pr.id
+                    for user, prs in state.get_pr_data(section_name)[0].items()
+                    if user in users
+                    for pr in prs
+                }
+                for pr_section, section_name in SECTION_NAME_BY_PR_SECTION.items()
+                # Sections the daemon hasn't fetched yet say nothing about what left them
+                if state.data_by_section.get(section_name) is not None
+            }
+        except Exception as e:
+            print(f"Error reading PR ids from the daemon: {e}")
+            traceback.print_exc()
+            return {}
+
+    def _daemon_state(self) -> UIState:
+        return UIState.from_dict(self.connection.get("/state"), Path(os.devnull))
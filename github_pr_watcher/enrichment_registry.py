@@ -0,0 +1,80 @@
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Tuple
+
+from github_pr_watcher.objects import PullRequest
+
+EnrichmentResult = Tuple[PullRequest, bool]
+
+
+class EnrichmentRegistry:
+    """
+    Per-refresh registry that makes sure each PR is enriched at most once, even when it shows up
+    in the search results of several sections. Later sections get the PullRequest enriched by the
+    first one instead of enriching their own copy.
+    """
+
+    def __init__(self):
+        self._futures_by_pr_id: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self.enriched = 0
+        self.reused = 0
+
+    def enrich(
+            self,
+            prs: List[PullRequest],
+            submit: Callable[[List[PullRequest]], List[Future]],
+    ) -> List[Future]:
+        """
+        Return one future per PR resolving to (pr, partial).
+
+        Only PRs not seen before in this refresh are handed to submit, which must return futures
+        resolving to lists of (pr, partial) tuples (one future per enrichment batch).
+        """
+        pr_futures = []
+        to_enrich = []
+        with self._lock:
+            for pr in prs:
+                pr_future = self._futures_by_pr_id.get(pr.id)
+                if pr_future is None:
+                    pr_future = Future()
+                    self._futures_by_pr_id[pr.id] = pr_future
+                    to_enrich.append(pr)
+                    self.enriched += 1
+                else:
+                    self.reused += 1
+                pr_futures.append(pr_future)
+
+        if to_enrich:
+            placeholders = {pr.id: self._futures_by_pr_id[pr.id] for pr in to_enrich}
+            for batch_future in submit(to_enrich):
+                batch_future.add_done_callback(
+                    lambda done, placeholders=placeholders: self._resolve(done, placeholders)
+                )
+
+        return pr_futures
+
+    @staticmethod
+    def _resolve(batch_future: Future, placeholders: Dict[int, Future]) -> None:
+        if batch_future.cancelled() or batch_future.exception():
+            error = (
+                RuntimeError("Enrichment cancelled")
+                if batch_future.cancelled()
+                else batch_future.exception()
+            )
+            for placeholder in placeholders.values():
+                if not placeholder.done():
+                    _set_safely(placeholder.set_exception, error)
+            return
+
+        for pr, partial in batch_future.result():
+            if placeholder := placeholders.get(pr.id):
+                _set_safely(placeholder.set_result, (pr, partial))
+
+
+def _set_safely(setter: Callable, value) -> None:
+    try:
+        setter(value)
+    except Exception:
+        # Already resolved, e.g. by a batch that failed after partially completing
+        pass
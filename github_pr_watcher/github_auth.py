@@ -1,8 +1,12 @@
+import os
+import re
 import subprocess
 import webbrowser
+from typing import List, Optional, Tuple
 from urllib.parse import urlencode
 
-from PyQt6.QtWidgets import QInputDialog, QMessageBox, QLineEdit
+from github_pr_watcher.change_feed import NOTIFICATIONS
+from github_pr_watcher.settings import AuthSettings
 
 KEYCHAIN_SERVICE = "pr_watcher_github_api_key"
 KEYCHAIN_ACCOUNT = "token"
@@ -18,7 +22,74 @@ REQUIRED_SCOPES = [
 ]
 
 
-def get_github_api_key():
+def required_scopes(change_feed_sources: List[str]) -> List[str]:
+    """Scopes a new token is created with; reading notifications needs a scope of its own"""
+    if NOTIFICATIONS in change_feed_sources:
+        return REQUIRED_SCOPES + [NOTIFICATIONS]
+    return REQUIRED_SCOPES
+
+
+def get_github_api_keys(
+        auth: AuthSettings, interactive: bool = True, scopes: List[str] = REQUIRED_SCOPES
+) -> List[Tuple[str, str]]:
+    """
+    Every configured token as (source, token): the Keychain one first, asking for one with scopes
+    if it is missing, no other token is configured and interactive is set, then extra Keychain
+    accounts, environment variables and token files. Duplicates are dropped.
+    """
+    named_tokens = []
+    if token := _find_keychain_token(KEYCHAIN_ACCOUNT):
+        named_tokens.append((f"keychain:{KEYCHAIN_ACCOUNT}", token))
+    for account in auth.keychain_accounts:
+        if token := _find_keychain_token(account):
+            named_tokens.append((f"keychain:{account}", token))
+    for env_var in auth.token_env_vars:
+        for index, token in enumerate(re.split(r"[\s,]+", os.environ.get(env_var, "").strip())):
+            if token:
+                named_tokens.append((f"env:{env_var}[{index}]", token))
+    for path in auth.token_files:
+        named_tokens.extend(_read_token_file(os.path.expanduser(path)))
+
+    if not named_tokens and interactive and (token := get_github_api_key(scopes)):
+        named_tokens.append((f"keychain:{KEYCHAIN_ACCOUNT}", token))
+
+    seen = set()
+    unique = []
+    for name, token in named_tokens:
+        if token not in seen:
+            seen.add(token)
+            unique.append((name, token))
+    return unique
+
+
+def _find_keychain_token(account: str) -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["security", "find-generic-password", "-s", KEYCHAIN_SERVICE, "-a", account, "-w"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return result.stdout.strip() or None
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+
+def _read_token_file(path: str) -> List[Tuple[str, str]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = [line.strip() for line in f]
+    except OSError as e:
+        print(f"Error reading token file {path}: {e}")
+        return []
+    return [
+        (f"file:{path}[{index}]", line)
+        for index, line in enumerate(lines)
+        if line and not line.startswith("#")
+    ]
+
+
+def get_github_api_key(scopes: List[str] = REQUIRED_SCOPES):
     try:
         # Try to retrieve the API key from Keychain
 
@@ -42,6 +113,8 @@ def get_github_api_key():
 
     except subprocess.CalledProcessError as e:
         print(f"Error getting API key from Keychain: {e}")
+        # Only the desktop app asks for a token, the daemon runs without Qt
+        from PyQt6.QtWidgets import QInputDialog, QLineEdit, QMessageBox
 
         # Show dialog about creating new token
         msg = QMessageBox()
@@ -63,7 +136,7 @@ def get_github_api_key():
             base_url = "https://github.com/settings/tokens/new"
             params = {
                 "description": "GitHub PR Watcher",
-                "scopes": ",".join(REQUIRED_SCOPES),
+                "scopes": ",".join(scopes),
             }
             url = f"{base_url}?{urlencode(params)}"
 
@@ -1,28 +1,82 @@
+import threading
 import traceback
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from enum import auto, Enum
-from typing import Dict, List, Tuple
+from enum import Enum
+from typing import Callable, Collection, Dict, List, Set, Tuple
 
 import requests
 
-from github_pr_watcher.notifications import notify
+from github_pr_watcher.cache import EnrichmentCache, RepoMetadataCache, ResponseCache
+from github_pr_watcher.cancellation import (
+    CancellationToken,
+    RefreshCancelled,
+    cancellable_sleep,
+    current_token,
+)
+from github_pr_watcher.change_feed import ChangeFeed, ChangeSet, PRRef
+from github_pr_watcher.closed_window import ClosedPRWindow, WindowFetch
+from github_pr_watcher.enrichment_registry import EnrichmentRegistry, EnrichmentResult
+from github_pr_watcher.graphql_enrichment import GraphQLEnricher
+from github_pr_watcher.http_session import ConnectionStats, connection_stats, create_session
 from github_pr_watcher.objects import PullRequest, TimelineEvent
+from github_pr_watcher.pipeline import DEFAULT_PRIORITY, FetchPipeline, Stage, StageStats
+from github_pr_watcher.rate_limiter import RateLimitScheduler
+from github_pr_watcher.token_pool import PooledToken, TokenPool
+from github_pr_watcher.query_planner import PRQueryConfig, PRSection, QueryPlanner, SectionPlan
 from github_pr_watcher.settings import Settings
-from github_pr_watcher.utils import parse_datetime, with_rate_limit_retry
+from github_pr_watcher.shared_cache import SharedCache
+from github_pr_watcher.utils import (
+    AsyncSingleFlight,
+    SingleFlight,
+    parse_datetime,
+    with_rate_limit_retry,
+)
 
 
-class PRSection(Enum):
-    OPEN = auto()
-    NEEDS_REVIEW = auto()
-    CHANGED_REQUESTED = auto()
-    CLOSED = auto()
+# GitHub search caps: queries over 256 characters are rejected and only the first 1000 results are served
+MAX_SEARCH_QUERY_LENGTH = 256
+MAX_AUTHORS_PER_SEARCH = 20
+SEARCH_RESULTS_LIMIT = 1000
+
+
+# Called with each user's results for a section as soon as they are ready
+SectionBatchCallback = Callable[[PRSection, str, List[EnrichmentResult]], None]
+UserBatchCallback = Callable[[str, List[EnrichmentResult]], None]
+
+
+class SearchOverflowError(Exception):
+    pass
+
+
+class EnrichmentBackend(Enum):
+    REST = "rest"
+    # REST using the counts already present in the PR payload, skipping list calls when unchanged
+    REST_MINIMAL = "rest_minimal"
+    GRAPHQL = "graphql"
 
 
 @dataclass
-class PRQueryConfig:
-    query: str
+class DiscussionSnapshot:
+    """Comment/review derived fields of a PR, together with what they were derived from"""
+    updated_at: datetime
+    comments: int
+    review_comments: int
+    comment_count_by_author: Dict[str, int]
+    non_bot_comment_count: int
+    last_comment_time: datetime | None
+    last_comment_author: str | None
+    approved_by: List[str]
+    latest_reviews: Dict[str, str]
+
+    def matches(self, pr: PullRequest, details: dict) -> bool:
+        return (
+                self.updated_at == pr.updated_at
+                and self.comments == details.get("comments")
+                and self.review_comments == details.get("review_comments")
+        )
 
 
 class GitHubPRsClient:
@@ -31,66 +85,412 @@ class GitHubPRsClient:
             github_token,
             recency_threshold=timedelta(days=1),
             max_workers=4,
+            response_cache: ResponseCache | None = None,
+            enrichment_backend: EnrichmentBackend = EnrichmentBackend.REST,
+            graphql_batch_size=50,
+            query_planner: QueryPlanner | None = None,
+            repo_cache: RepoMetadataCache | None = None,
+            request_timeout: Tuple[float, float] = (5, 30),
+            rate_limiter: RateLimitScheduler | None = None,
+            enrichment_cache: EnrichmentCache | None = None,
+            closed_window: ClosedPRWindow | None = None,
+            search_workers: int | None = None,
+            enrich_workers: int | None = None,
+            stage_queue_size: int = 100,
+            token_pool: TokenPool | None = None,
+            change_feed_sources: List[str] | None = None,
+            shared_cache: SharedCache | None = None,
     ):
         self.base_url = "https://api.github.com"
+        # Authorization is added per request, by the token the request is sent with
         self.headers = {
-            "Authorization": f"token {github_token}",
             "Accept": "application/vnd.github.v3+json",
         }
         self.recency_threshold = recency_threshold
         self.max_workers = max_workers
+        # Worker counts of the fetch pipeline stages, see FetchPipeline
+        self.search_workers = search_workers or max_workers
+        self.enrich_workers = enrich_workers or max_workers
+        self.stage_queue_size = stage_queue_size
+        self.last_pipeline_stats: List[StageStats] = []
+        # (connect, read) timeout in seconds applied to every request
+        self.request_timeout = request_timeout
+        # One connection per search and enrich worker, each sending one request at a time
+        self._session = create_session(pool_size=self.search_workers + self.enrich_workers)
+        # Shared by every request thread so they pace against one budget per token
+        self.token_pool = token_pool or TokenPool([
+            PooledToken("default", github_token, rate_limiter or RateLimitScheduler())
+        ])
+        # Identical GETs in flight at the same time are sent once, see _make_request
+        self.request_flight = SingleFlight()
+        self.response_cache = response_cache
+        # Users a team cache server has fresh data for are read from it instead of GitHub
+        self.shared_cache = shared_cache
+        self.enrichment_cache = enrichment_cache
+        self.closed_window = closed_window
+        self.enrichment_backend = enrichment_backend
+        self.graphql_enricher = GraphQLEnricher(
+            self._make_request,
+            graphql_url=f"{self.base_url}/graphql",
+            batch_size=graphql_batch_size,
+        )
+        self.query_planner = query_planner or QueryPlanner()
+        # Polled between refreshes to only re-fetch the PRs with new activity, see ChangeFeed
+        self.change_feed = (
+            ChangeFeed(self._send_feed_request, self.base_url, change_feed_sources)
+            if change_feed_sources
+            else None
+        )
+        self.repo_cache = repo_cache or RepoMetadataCache()
+        self._discussion_snapshots: Dict[int, DiscussionSnapshot] = {}
+        self._snapshots_lock = threading.Lock()
         self._executor = None
         self._shutdown = False
-
-        # Define section-specific queries
-        self.section_queries = {
-            PRSection.OPEN: PRQueryConfig(query="is:pr is:open"),
-            PRSection.NEEDS_REVIEW: PRQueryConfig(
-                query="is:pr is:open -draft:true"
-            ),
-            PRSection.CHANGED_REQUESTED: PRQueryConfig(
-                query="is:pr is:open review:changes_requested -draft:true"
-            ),
-            PRSection.CLOSED: PRQueryConfig(
-                query=f"is:pr is:closed closed:>={self._recent_date()}"
-            ),
-        }
+        # Tokens of the refreshes in progress, cancelled by close
+        self._active_tokens: Set[CancellationToken] = set()
+        self._tokens_lock = threading.Lock()
 
     def get_pr_data(
-            self, users: List[str], section: PRSection = None, settings: Settings = None
+            self,
+            users: List[str],
+            section: PRSection = None,
+            settings: Settings = None,
+            updated_since: datetime | None = None,
+            on_batch: SectionBatchCallback | None = None,
+            on_search_batch: SectionBatchCallback | None = None,
+            section_priority: List[PRSection] | None = None,
+            cancel_token: CancellationToken | None = None,
+            sections: List[PRSection] | None = None,
+            failed_users: Set[str] | None = None,
     ) -> Dict[PRSection, Dict[str, List[Tuple[PullRequest, bool]]]]:
-        """Get PR data from GitHub API with parallel processing"""
+        """
+        Get PR data from GitHub API with parallel processing, for section, sections, or all of them.
+
+        With updated_since only the PRs updated since then are searched and enriched; the result is
+        a delta to be merged into the previously fetched sections (see UIState.merge_pr_data).
+        on_batch streams each user's results for each section as soon as they are enriched, from
+        the fetching threads; the returned dict still holds everything once the refresh is done.
+
+        on_search_batch is the first phase of a two-phase refresh: it gets each user's search
+        results, not enriched yet (partial), as soon as the search returns. Sections whose
+        membership depends on enriched details (see SectionPlan.filters_on_details) only show up
+        in on_batch. Searches and enrichment for the sections listed first in section_priority
+        are run first.
+
+        Cancelling cancel_token stops the refresh: queued work is dropped, waits are interrupted,
+        and an empty dict is returned.
+
+        Users whose search failed are added to failed_users: their PRs are missing from the result
+        (or, for the recently closed window, as they were before), so the refresh must not count
+        as a sync of their data.
+        """
         if self._shutdown:
             return {}
 
+        cancel_token = cancel_token or CancellationToken()
+        sections = [section] if section else sections or list(PRSection)
         try:
-            # Process only requested section or all sections
-            sections_to_process = [section] if section else self.section_queries.keys()
-
-            # Update the CLOSED query with current threshold if settings provided
-            if settings:
-                recent_days = settings.thresholds.recently_closed_days
-                self.section_queries[PRSection.CLOSED] = PRQueryConfig(
-                    query=f"is:pr is:closed closed:>={self._recent_date(recent_days)}"
+            with self._refresh_scope(cancel_token):
+                served, users = self._from_shared_cache(users, sections, on_batch)
+                if not users:
+                    return served
+                fetched = self._get_pr_data(
+                    users,
+                    sections,
+                    settings,
+                    updated_since,
+                    on_batch,
+                    on_search_batch,
+                    section_priority,
+                    cancel_token,
+                    failed_users,
                 )
+                return self._with_served(fetched, served)
+        except (RefreshCancelled, CancelledError):
+            print("Refresh cancelled")
+            return {}
+        except Exception as e:
+            print(f"Error in get_pr_data: {e}")
+            traceback.print_exc()
+            return {}
 
-            prs_by_author_by_section = {}
-            for section in sections_to_process:
-                if self._shutdown:  # Check for cancellation
-                    return {}
-                
-                query_config = self.section_queries[section]
-                prs_by_author_by_section[section] = self._fetch_prs_by_author(
-                    users, query_config
+    def _get_pr_data(
+            self,
+            users: List[str],
+            sections: List[PRSection],
+            settings: Settings | None,
+            updated_since: datetime | None,
+            on_batch: SectionBatchCallback | None,
+            on_search_batch: SectionBatchCallback | None,
+            section_priority: List[PRSection] | None,
+            cancel_token: CancellationToken,
+            failed_users: Set[str] | None = None,
+    ) -> Dict[PRSection, Dict[str, List[Tuple[PullRequest, bool]]]]:
+        recent_days = settings.thresholds.recently_closed_days if settings else 7
+        plan = self.query_planner.plan(sections, recent_days, updated_since)
+        print(plan.explain())
+        if self.enrichment_cache is not None:
+            self.enrichment_cache.prune(recent_days)
+
+        # Shared across queries so each PR is enriched at most once per refresh
+        registry = EnrichmentRegistry()
+        pipeline = self._create_pipeline(cancel_token)
+        try:
+            # One light coordinating thread per query; the actual work runs in the stages
+            with ThreadPoolExecutor(max_workers=len(plan.queries)) as coordinator:
+                futures_by_query = {
+                    query_config: coordinator.submit(
+                        self._fetch_closed_window,
+                        users,
+                        recent_days,
+                        registry,
+                        pipeline,
+                        self._section_batches(plan.sections_for(query_config), on_batch),
+                        self._query_priority(plan.sections_for(query_config), section_priority),
+                        cancel_token=cancel_token,
+                        failed_users=failed_users,
+                    )
+                    if self._uses_closed_window(plan.sections_for(query_config))
+                    else coordinator.submit(
+                        self._fetch_prs_by_author,
+                        users,
+                        query_config,
+                        registry,
+                        pipeline,
+                        self._section_batches(plan.sections_for(query_config), on_batch),
+                        self._search_batches(plan.sections_for(query_config), on_search_batch),
+                        self._query_priority(plan.sections_for(query_config), section_priority),
+                        cancel_token=cancel_token,
+                        failed_users=failed_users,
+                    )
+                    for query_config in plan.queries
+                }
+                prs_by_author_by_query = {
+                    query_config: future.result()
+                    for query_config, future in futures_by_query.items()
+                }
+        finally:
+            pipeline.close(cancel_pending=cancel_token.cancelled)
+            self._record_pipeline_stats(pipeline)
+
+        cancel_token.raise_if_cancelled()
+
+        prs_by_author_by_section = {}
+        for query_config, prs_by_author in prs_by_author_by_query.items():
+            for section_plan in plan.sections_for(query_config):
+                prs_by_author_by_section[section_plan.section] = self._filter_section(
+                    prs_by_author, section_plan
                 )
 
-            return prs_by_author_by_section
+        print(f"Enriched {registry.enriched} PRs, reused {registry.reused} across sections")
 
+        connections = self.connection_stats()
+        print(
+            f"Connections: {connections.connections_opened} opened for "
+            f"{connections.requests_sent} requests ({connections.reuse_ratio:.0%} reused)"
+        )
+        self._print_coalescing_stats()
+
+        self._print_rate_limit_budget()
+
+        self._save_enrichment_cache()
+        if self.closed_window is not None:
+            self.closed_window.save()
+        self.repo_cache.save()
+        if self.response_cache is not None:
+            self.response_cache.save()
+            stats = self.response_cache.stats
+            print(
+                f"Response cache: {stats.hits} hits, {stats.misses} misses "
+                f"({stats.hit_ratio:.0%} hit ratio, {len(self.response_cache)} entries)"
+            )
+
+        return prs_by_author_by_section
+
+    def get_section_pr_ids(
+            self,
+            users: List[str],
+            settings: Settings = None,
+            cancel_token: CancellationToken | None = None,
+    ) -> Dict[PRSection, Set[int]]:
+        """
+        Search-only pass returning the ids of the PRs each section's query currently matches.
+
+        Much cheaper than a full refresh since nothing is enriched; used to reconcile a snapshot
+        maintained with delta refreshes, which can't see PRs that left a query without being
+        updated (deleted, transferred, or aged out of the recently closed window). Sections of a
+        query whose search failed for any user are left out, since their ids would be incomplete.
+        """
+        if self._shutdown:
+            return {}
+
+        cancel_token = cancel_token or CancellationToken()
+        try:
+            served, users = self._from_shared_cache(users, list(PRSection), None)
+            ids_by_section = {
+                pr_section: {pr.id for results in by_user.values() for pr, _ in results}
+                for pr_section, by_user in served.items()
+            }
+            if not users:
+                return ids_by_section
+            recent_days = settings.thresholds.recently_closed_days if settings else 7
+            plan = self.query_planner.plan(list(PRSection), recent_days)
+            with self._refresh_scope(cancel_token), self._create_pipeline(cancel_token) as pipeline:
+                for query_config in plan.queries:
+                    failed_users: Set[str] = set()
+                    futures = [
+                        pipeline.search.submit(
+                            self._search_for_users_prs,
+                            batch,
+                            query_config.query,
+                            100,
+                            failed_users,
+                        )
+                        for batch in self._batch_authors(users, query_config.query)
+                    ]
+                    pr_ids = {
+                        pr.id
+                        for future in futures
+                        for prs in future.result().values()
+                        for pr in prs
+                    }
+                    sections = [
+                        section_plan.section for section_plan in plan.sections_for(query_config)
+                    ]
+                    if failed_users:
+                        print(
+                            f"Search failed for {', '.join(sorted(failed_users))}, "
+                            f"not reconciling {', '.join(section.name for section in sections)}"
+                        )
+                    for section in sections:
+                        if failed_users:
+                            ids_by_section.pop(section, None)
+                        else:
+                            ids_by_section[section] = ids_by_section.get(section, set()) | pr_ids
+            cancel_token.raise_if_cancelled()
+            return ids_by_section
+
+        except (RefreshCancelled, CancelledError):
+            return {}
         except Exception as e:
-            print(f"Error in get_pr_data: {e}")
+            print(f"Error in get_section_pr_ids: {e}")
             traceback.print_exc()
             return {}
 
+    def _from_shared_cache(
+            self,
+            users: List[str],
+            sections: List[PRSection],
+            on_batch: SectionBatchCallback | None,
+    ) -> Tuple[Dict[PRSection, Dict[str, List[EnrichmentResult]]], List[str]]:
+        """
+        The sections of the users the shared cache has fresh data for, and the users left to fetch.
+
+        Served users get all their PRs even on a delta refresh: the server's data may lag behind
+        the refresh's updated_since by up to max_age_minutes, so a PR updated just before it may
+        only reach the server afterwards.
+        """
+        if self.shared_cache is None:
+            return {}, users
+        prs_by_user_by_section, stale_users = self.shared_cache.snapshot(users)
+        served = {}
+        for pr_section in sections:
+            for user, prs in prs_by_user_by_section.get(pr_section, {}).items():
+                results = [(pr, False) for pr in prs]
+                served.setdefault(pr_section, {})[user] = results
+                if on_batch and results:
+                    on_batch(pr_section, user, results)
+        return served, stale_users
+
+    @staticmethod
+    def _with_served(
+            fetched: Dict[PRSection, Dict[str, List[EnrichmentResult]]],
+            served: Dict[PRSection, Dict[str, List[EnrichmentResult]]],
+    ) -> Dict[PRSection, Dict[str, List[EnrichmentResult]]]:
+        """A refresh's results with the users served by the shared cache; empty if the fetch failed"""
+        if not fetched:
+            return {}
+        return {
+            pr_section: {**served.get(pr_section, {}), **fetched.get(pr_section, {})}
+            for pr_section in fetched.keys() | served.keys()
+        }
+
+    def poll_change_feed(self, users: List[str], since: datetime | None = None) -> ChangeSet:
+        """The PRs with activity since the previous poll, if a change feed is configured"""
+        if self.change_feed is None or self._shutdown:
+            return ChangeSet()
+        return self.change_feed.poll(users, since)
+
+    def fetch_prs(
+            self,
+            pr_refs: Collection[PRRef],
+            users: List[str],
+            cancel_token: CancellationToken | None = None,
+    ) -> List[EnrichmentResult]:
+        """
+        Fetch and enrich the given PRs directly, without searching; e.g. the ones a change feed
+        reported activity on. PRs not authored by one of users are left out before enrichment.
+        """
+        if self._shutdown or not pr_refs:
+            return []
+
+        cancel_token = cancel_token or CancellationToken()
+        try:
+            with self._refresh_scope(cancel_token):
+                return self._fetch_prs(pr_refs, users, cancel_token)
+        except (RefreshCancelled, CancelledError):
+            print("Refresh cancelled")
+            return []
+        except Exception as e:
+            print(f"Error in fetch_prs: {e}")
+            traceback.print_exc()
+            return []
+
+    def _fetch_prs(
+            self,
+            pr_refs: Collection[PRRef],
+            users: List[str],
+            cancel_token: CancellationToken,
+    ) -> List[EnrichmentResult]:
+        logins = {user.lower() for user in users}
+        pipeline = self._create_pipeline(cancel_token)
+        try:
+            lookups = [pipeline.search.submit(self._fetch_pr, *pr_ref) for pr_ref in pr_refs]
+            prs = [
+                pr
+                for pr in (future.result() for future in lookups)
+                if pr is not None and pr.user.login.lower() in logins
+            ]
+            enrichments = self._submit_enrichment(pipeline.enrich, prs)
+            results = [result for future in enrichments for result in future.result()]
+        finally:
+            pipeline.close(cancel_pending=cancel_token.cancelled)
+            self._record_pipeline_stats(pipeline)
+
+        cancel_token.raise_if_cancelled()
+        print(f"Fetched {len(pr_refs)} PRs directly, enriched {len(results)} of them")
+        self._print_rate_limit_budget()
+        self._save_enrichment_cache()
+        self.repo_cache.save()
+        if self.response_cache is not None:
+            self.response_cache.save()
+        return results
+
+    def _fetch_pr(self, repo_owner: str, repo_name: str, pr_number: int) -> PullRequest | None:
+        try:
+            details = self.get_pr_details(repo_owner, repo_name, pr_number)
+            return PullRequest.parse_pr({
+                **details,
+                "commit_count": details.get("commits"),
+                "merged_by": (details.get("merged_by") or {}).get("login"),
+                "comment_count_by_author": None,
+                "non_bot_comment_count": None,
+            })
+        except Exception as e:
+            print(f"Error fetching PR {repo_owner}/{repo_name}#{pr_number}: {e}")
+            traceback.print_exc()
+            return None
+
     def get_pr_details(self, repo_owner, repo_name, pr_number):
         """Get detailed PR information including file changes"""
         endpoint = f"/repos/{repo_owner}/{repo_name}/pulls/{pr_number}"
@@ -142,19 +542,79 @@ class GitHubPRsClient:
 
         return events
 
-    def _search_for_user_prs(self, user, query, max_results):
-        """Helper method to fetch PRs for a single user"""
+    def _search_for_users_prs(
+            self,
+            users: List[str],
+            query: str,
+            max_results_per_user: int,
+            failed_users: Set[str] | None = None,
+    ) -> Dict[str, List[PullRequest]]:
+        """
+        Search PRs for a batch of authors with a single query, splitting the batch if it overflows.
+        Users whose search failed get no PRs and are added to failed_users.
+        """
+        batch_query = f"{query} {' '.join(f'author:{user}' for user in users)}"
         try:
-            user_query = f"{query} author:{user}"
-            results = self._search_prs(user_query, max_results)
-            return user, results
+            results = self._search_prs(
+                batch_query,
+                max_total_count=SEARCH_RESULTS_LIMIT if len(users) > 1 else None,
+            )
+        except SearchOverflowError as e:
+            print(f"{e}, splitting batch of {len(users)} authors")
+            middle = len(users) // 2
+            return {
+                **self._search_for_users_prs(
+                    users[:middle], query, max_results_per_user, failed_users
+                ),
+                **self._search_for_users_prs(
+                    users[middle:], query, max_results_per_user, failed_users
+                ),
+            }
+        except RefreshCancelled:
+            raise
         except Exception as e:
-            print(f"Error fetching PRs for {user}: {e}")
+            print(f"Error fetching PRs for {', '.join(users)}: {e}")
             traceback.print_exc()
-            return user, []
+            if failed_users is not None:
+                failed_users.update(users)
+            return {user: [] for user in users}
+
+        # Re-partition results by author (logins are case-insensitive)
+        prs_by_user = {user: [] for user in users}
+        user_by_login = {user.lower(): user for user in users}
+        for pr in results:
+            if user := user_by_login.get(pr.user.login.lower()):
+                if len(prs_by_user[user]) < max_results_per_user:
+                    prs_by_user[user].append(pr)
+        return prs_by_user
 
-    def _search_prs(self, query, max_results=None) -> list[PullRequest]:
-        """Search issues and pull requests using the given query - we assume all matching issues are PRs."""
+    @staticmethod
+    def _batch_authors(users: List[str], query: str) -> List[List[str]]:
+        """Pack authors into as few queries as GitHub's query length and qualifier limits allow"""
+        batches = []
+        batch = []
+        batch_length = len(query)
+        for user in users:
+            qualifier_length = len(f" author:{user}")
+            if batch and (
+                    batch_length + qualifier_length > MAX_SEARCH_QUERY_LENGTH
+                    or len(batch) >= MAX_AUTHORS_PER_SEARCH
+            ):
+                batches.append(batch)
+                batch = []
+                batch_length = len(query)
+            batch.append(user)
+            batch_length += qualifier_length
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _search_prs(self, query, max_results=None, max_total_count=None) -> list[PullRequest]:
+        """
+        Search issues and pull requests using the given query - we assume all matching issues are PRs.
+        Raises SearchOverflowError if the query matches more than max_total_count results, and
+        request errors too, so that a failed search can be told apart from one with no results.
+        """
         endpoint = "/search/issues"
         params = {"q": query, "per_page": 100}
         results = []
@@ -164,58 +624,15 @@ class GitHubPRsClient:
                 response = self._make_request('GET', f"{self.base_url}{endpoint}", params=params)
                 data = response.json()
 
+                if max_total_count is not None and data.get("total_count", 0) > max_total_count:
+                    raise SearchOverflowError(
+                        f"Query '{query}' matches {data['total_count']} results (max {max_total_count})"
+                    )
+
                 # Process each PR item
                 for item in data["items"]:
                     try:
-                        # Extract repo owner and name from repository_url or html_url
-                        if "repository_url" in item:
-                            repo_parts = item["repository_url"].split("/")
-                            repo_owner = repo_parts[-2]
-                            repo_name = repo_parts[-1]
-                        else:
-                            repo_parts = item["html_url"].split("/")
-                            repo_owner = repo_parts[-4]
-                            repo_name = repo_parts[-3]
-
-                        # Add repo info to item
-                        item["repo_owner"] = repo_owner
-                        item["repo_name"] = repo_name
-
-                        # Ensure state is present
-                        if "state" not in item:
-                            item["state"] = "unknown"
-
-                        # Convert datetime strings to proper format
-                        for date_field in [
-                            "created_at",
-                            "updated_at",
-                            "closed_at",
-                            "merged_at",
-                        ]:
-                            if date_val := item.get(date_field):
-                                try:
-                                    if isinstance(date_val, str):
-                                        if date_val.endswith("Z"):
-                                            date_val = date_val[:-1] + "+00:00"
-                                        item[date_field] = date_val
-                                    elif isinstance(date_val, datetime):
-                                        item[date_field] = date_val.isoformat()
-                                    else:
-                                        item[date_field] = str(date_val)
-                                except Exception as e:
-                                    print(
-                                        f"Warning: Error parsing date {date_field}: {e} "
-                                        f"(value: {date_val},"
-                                        f" type: {type(date_val)})"
-                                    )
-                                    traceback.print_exc()
-                                    item[date_field] = None
-
-                        # Parse PR
-
-                        pr = PullRequest.parse_pr(item)
-                        results.append(pr)
-
+                        results.append(self._parse_search_item(item))
                     except Exception as e:
                         print(f"Warning: Error parsing PR item: {e}")
                         traceback.print_exc()
@@ -232,34 +649,74 @@ class GitHubPRsClient:
 
             return results
 
+        except (SearchOverflowError, RefreshCancelled):
+            raise
         except Exception as e:
             print(f"Error in _search_issues: {e}")
-            traceback.print_exc()
-            return []
+            raise
+
+    @staticmethod
+    def _parse_search_item(item: dict) -> PullRequest:
+        # Extract repo owner and name from repository_url or html_url
+        if "repository_url" in item:
+            repo_parts = item["repository_url"].split("/")
+            repo_owner = repo_parts[-2]
+            repo_name = repo_parts[-1]
+        else:
+            repo_parts = item["html_url"].split("/")
+            repo_owner = repo_parts[-4]
+            repo_name = repo_parts[-3]
+
+        # Add repo info to item
+        item["repo_owner"] = repo_owner
+        item["repo_name"] = repo_name
+
+        # Ensure state is present
+        if "state" not in item:
+            item["state"] = "unknown"
+
+        # Convert datetime strings to proper format
+        for date_field in [
+            "created_at",
+            "updated_at",
+            "closed_at",
+            "merged_at",
+        ]:
+            if date_val := item.get(date_field):
+                try:
+                    if isinstance(date_val, str):
+                        if date_val.endswith("Z"):
+                            date_val = date_val[:-1] + "+00:00"
+                        item[date_field] = date_val
+                    elif isinstance(date_val, datetime):
+                        item[date_field] = date_val.isoformat()
+                    else:
+                        item[date_field] = str(date_val)
+                except Exception as e:
+                    print(
+                        f"Warning: Error parsing date {date_field}: {e} "
+                        f"(value: {date_val},"
+                        f" type: {type(date_val)})"
+                    )
+                    traceback.print_exc()
+                    item[date_field] = None
+
+        return PullRequest.parse_pr(item)
 
     def _fetch_and_enrich_with_pr_details(self, pr: PullRequest) -> (PullRequest, bool):
         """Helper method to fetch details for a single PR"""
         try:
-            # Get repository details first
-            repo_url = f"{self.base_url}/repos/{pr.repo_owner}/{pr.repo_name}"
-            repo_response = self._make_request('GET', repo_url)
-            if repo_response.status_code == 200:
-                repo_data = repo_response.json()
-                pr.archived = repo_data.get("archived", False)
+            # Get repository details first (shared by all PRs in the repo)
+            repo_metadata = self.repo_cache.get(
+                pr.repo_owner, pr.repo_name, lambda: self._fetch_repo(pr.repo_owner, pr.repo_name)
+            )
+            if repo_metadata:
+                pr.archived = repo_metadata.archived
 
             # Get basic PR details
             details = self.get_pr_details(pr.repo_owner, pr.repo_name, pr.number)
             if details:
-                pr.changed_files = details.get("changed_files")
-                pr.additions = details.get("additions")
-                pr.deletions = details.get("deletions")
-                pr.merged_at = parse_datetime(details.get("merged_at"))
-                pr.merged = details.get("merged", False)
-                pr.merged_by = (
-                    details.get("merged_by", {}).get("login")
-                    if details.get("merged_by")
-                    else None
-                )
+                self._apply_pr_details(pr, details)
 
             # Get commit count
             commits_url = f"{self.base_url}/repos/{pr.repo_owner}/{pr.repo_name}/pulls/{pr.number}/commits"
@@ -273,149 +730,718 @@ class GitHubPRsClient:
             comments_url = f"{self.base_url}/repos/{pr.repo_owner}/{pr.repo_name}/issues/{pr.number}/comments"
             reviews_url = f"{self.base_url}/repos/{pr.repo_owner}/{pr.repo_name}/pulls/{pr.number}/reviews"
 
-            # Fetch comments and reviews in parallel
-            with ThreadPoolExecutor(max_workers=2) as executor:
-                comments_future = executor.submit(self._make_request, 'GET', comments_url)
-                reviews_future = executor.submit(self._make_request, 'GET', reviews_url)
-
-                comments_response = comments_future.result()
-                reviews_response = reviews_future.result()
+            # In this enrich worker, one after the other: the stage's workers are the parallelism
+            comments_response = self._make_request('GET', comments_url)
+            reviews_response = self._make_request('GET', reviews_url)
 
             comments = comments_response.json() if comments_response.status_code == 200 else []
             reviews = reviews_response.json() if reviews_response.status_code == 200 else []
 
-            # Process comments
-            comment_count_by_author = {}
-            non_bot_comment_count = 0
-            last_comment_time = None
-            last_comment_author = None
-
-            for comment in sorted(comments, key=lambda x: x["created_at"]):
-                author = comment["user"]["login"]
-                is_bot = comment["user"].get("type", "").lower() == "bot"
-                
-                comment_count_by_author[author] = (
-                        comment_count_by_author.get(author, 0) + 1
-                )
+            self._apply_comments(pr, comments)
+            self._apply_reviews(pr, reviews)
 
-                if not is_bot:
-                    non_bot_comment_count += 1
-
-                comment_time = parse_datetime(comment["created_at"])
-                if last_comment_time is None or comment_time > last_comment_time:
-                    last_comment_time = comment_time
-                    last_comment_author = author
-
-            # Process reviews
-            approved_by = set()
-            latest_reviews = {}  # Track latest review by each reviewer
-            for review in reviews:
-                reviewer = review["user"]["login"]
-                review_time = parse_datetime(review["submitted_at"])
-
-                # Update latest review for this reviewer
-                if (
-                        reviewer not in latest_reviews
-                        or review_time > latest_reviews[reviewer][0]
-                ):
-                    latest_reviews[reviewer] = (review_time, review["state"].lower())
-
-                # Track approvals
-                if review["state"].lower() == "approved":
-                    approved_by.add(reviewer)
-
-            # Add new attributes to PR
-            pr.comment_count_by_author = comment_count_by_author
-            pr.non_bot_comment_count = non_bot_comment_count
-            pr.last_comment_time = last_comment_time
-            pr.last_comment_author = last_comment_author
-            pr.approved_by = list(approved_by)
-            pr.latest_reviews = {
-                reviewer: state for reviewer, (_, state) in latest_reviews.items()
-            }
+            return pr, False
 
+        except RefreshCancelled:
+            raise
+        except Exception as e:
+            print(f"Warning: Error fetching details for PR #{pr.number}: {e}")
+            traceback.print_exc()
+            return self._mark_enrichment_failed(pr), True
+
+    def _fetch_and_enrich_minimal(self, pr: PullRequest) -> (PullRequest, bool):
+        """
+        Enrich a PR using the counts in the PR details payload. Comments and reviews are only listed
+        (with full pagination) when the PR changed since the last time they were listed.
+        """
+        try:
+            repo_metadata = self.repo_cache.get(
+                pr.repo_owner, pr.repo_name, lambda: self._fetch_repo(pr.repo_owner, pr.repo_name)
+            )
+            if repo_metadata:
+                pr.archived = repo_metadata.archived
+
+            details = self.get_pr_details(pr.repo_owner, pr.repo_name, pr.number)
+            self._apply_pr_details(pr, details)
+            pr.commit_count = details.get("commits", 0)
+
+            with self._snapshots_lock:
+                snapshot = self._discussion_snapshots.get(pr.id)
+            if snapshot and snapshot.matches(pr, details):
+                self._apply_discussion_snapshot(pr, snapshot)
+                return pr, False
+
+            repo_url = f"{self.base_url}/repos/{pr.repo_owner}/{pr.repo_name}"
+            comments = (
+                self._get_all_pages(f"{repo_url}/issues/{pr.number}/comments")
+                if details.get("comments")
+                else []
+            )
+            reviews = self._get_all_pages(f"{repo_url}/pulls/{pr.number}/reviews")
+            self._apply_comments(pr, comments)
+            self._apply_reviews(pr, reviews)
+
+            with self._snapshots_lock:
+                self._discussion_snapshots[pr.id] = DiscussionSnapshot(
+                    updated_at=pr.updated_at,
+                    comments=details.get("comments"),
+                    review_comments=details.get("review_comments"),
+                    comment_count_by_author=pr.comment_count_by_author,
+                    non_bot_comment_count=pr.non_bot_comment_count,
+                    last_comment_time=pr.last_comment_time,
+                    last_comment_author=pr.last_comment_author,
+                    approved_by=pr.approved_by,
+                    latest_reviews=pr.latest_reviews,
+                )
             return pr, False
 
+        except RefreshCancelled:
+            raise
         except Exception as e:
             print(f"Warning: Error fetching details for PR #{pr.number}: {e}")
             traceback.print_exc()
-            # Set default values on error
-            pr.comment_count_by_author = {}
-            pr.non_bot_comment_count = 0
-            pr.last_comment_time = None
-            pr.last_comment_author = None
-            pr.approved_by = []
-            pr.latest_reviews = {}
-            pr.merged = False
-            pr.merged_by = None
-            return pr, True
+            return self._mark_enrichment_failed(pr), True
+
+    @staticmethod
+    def _apply_discussion_snapshot(pr: PullRequest, snapshot: DiscussionSnapshot) -> None:
+        pr.comment_count_by_author = dict(snapshot.comment_count_by_author)
+        pr.non_bot_comment_count = snapshot.non_bot_comment_count
+        pr.last_comment_time = snapshot.last_comment_time
+        pr.last_comment_author = snapshot.last_comment_author
+        pr.approved_by = list(snapshot.approved_by)
+        pr.latest_reviews = dict(snapshot.latest_reviews)
+
+    def _get_all_pages(self, url: str) -> list:
+        """GET every page of a list endpoint"""
+        params = {"per_page": 100}
+        items = []
+
+        while True:
+            response = self._make_request('GET', url, params=params)
+            items.extend(response.json())
+
+            if "next" not in response.links:
+                break
+
+            params["page"] = response.links["next"]["url"].split("page=")[-1]
+
+        return items
+
+    def _fetch_repo(self, repo_owner, repo_name) -> dict | None:
+        repo_url = f"{self.base_url}/repos/{repo_owner}/{repo_name}"
+        repo_response = self._make_request('GET', repo_url)
+        return repo_response.json() if repo_response.status_code == 200 else None
+
+    def _enrich_with_rest(self, prs: List[PullRequest]) -> List[Tuple[PullRequest, bool]]:
+        if self.enrichment_backend == EnrichmentBackend.REST_MINIMAL:
+            return [self._fetch_and_enrich_minimal(pr) for pr in prs]
+        return [self._fetch_and_enrich_with_pr_details(pr) for pr in prs]
+
+    def _enrich_with_graphql(self, prs: List[PullRequest]) -> List[Tuple[PullRequest, bool]]:
+        """Enrich a batch of PRs with a single aliased GraphQL query"""
+        details_by_id = self.graphql_enricher.fetch_details(prs)
+        results = []
+        for pr in prs:
+            details = details_by_id.get(pr.id)
+            if details is None:
+                print(f"Warning: No GraphQL details for PR #{pr.number} in {pr.repo_owner}/{pr.repo_name}")
+                results.append((self._mark_enrichment_failed(pr), True))
+                continue
+
+            try:
+                comments, reviews = self._list_truncated_discussion(pr, details)
+            except RefreshCancelled:
+                raise
+            except Exception as e:
+                print(f"Warning: Error listing the discussion of PR #{pr.number}: {e}")
+                traceback.print_exc()
+                results.append((self._mark_enrichment_failed(pr), True))
+                continue
+
+            pr.archived = details["archived"]
+            self.repo_cache.put(pr.repo_owner, pr.repo_name, archived=pr.archived)
+            pr.commit_count = details["commit_count"]
+            self._apply_pr_details(pr, details)
+            self._apply_comments(pr, comments)
+            self._apply_reviews(pr, reviews)
+            results.append((pr, False))
+        return results
+
+    def _list_truncated_discussion(
+            self, pr: PullRequest, details: dict
+    ) -> Tuple[List[dict], List[dict]]:
+        """The comments and reviews of GraphQL details, listing the truncated ones with REST"""
+        repo_url = f"{self.base_url}/repos/{pr.repo_owner}/{pr.repo_name}"
+        comments = details["comments"]
+        if comments is None:
+            comments = self._get_all_pages(f"{repo_url}/issues/{pr.number}/comments")
+        reviews = details["reviews"]
+        if reviews is None:
+            reviews = self._get_all_pages(f"{repo_url}/pulls/{pr.number}/reviews")
+        return comments, reviews
+
+    def _submit_enrichment(
+            self, stage: Stage, prs: List[PullRequest], priority: int = DEFAULT_PRIORITY
+    ) -> List[Future]:
+        """Submit enrichment work for the PRs; each future resolves to a list of (pr, partial) tuples"""
+        cached_results, prs = self._enrichment_from_cache(prs)
+        futures = []
+        if cached_results:
+            cached_future = Future()
+            cached_future.set_result(cached_results)
+            futures.append(cached_future)
+
+        if self.enrichment_backend == EnrichmentBackend.GRAPHQL:
+            batch_size = self.graphql_enricher.batch_size
+            submitted = [
+                stage.submit_with_priority(
+                    priority, self._enrich_with_graphql, prs[start:start + batch_size]
+                )
+                for start in range(0, len(prs), batch_size)
+            ]
+        else:
+            submitted = [
+                stage.submit_with_priority(priority, self._enrich_with_rest, [pr]) for pr in prs
+            ]
+
+        for future in submitted:
+            future.add_done_callback(
+                lambda done: self._remember_enrichment(done.result())
+                if not done.cancelled() and not done.exception()
+                else None
+            )
+        return futures + submitted
+
+    def _enrichment_from_cache(
+            self, prs: List[PullRequest]
+    ) -> Tuple[List[EnrichmentResult], List[PullRequest]]:
+        """Split PRs into results served by the enrichment cache and the PRs left to enrich"""
+        if self.enrichment_cache is None:
+            return [], prs
+
+        cached_results = []
+        to_enrich = []
+        for pr in prs:
+            if cached_pr := self.enrichment_cache.get(pr):
+                cached_results.append((cached_pr, False))
+            else:
+                to_enrich.append(pr)
+        return cached_results, to_enrich
+
+    def _remember_enrichment(self, results: List[EnrichmentResult]) -> None:
+        if self.enrichment_cache is None:
+            return
+        for pr, partial in results:
+            if not partial:
+                self.enrichment_cache.put(pr)
+
+    def _save_enrichment_cache(self) -> None:
+        if self.enrichment_cache is None:
+            return
+        self.enrichment_cache.save()
+        stats = self.enrichment_cache.stats
+        print(
+            f"Enrichment cache: {stats.hits} hits, {stats.misses} misses "
+            f"({stats.hit_ratio:.0%} hit ratio, {len(self.enrichment_cache)} entries)"
+        )
+
+    @staticmethod
+    def _apply_pr_details(pr: PullRequest, details: dict) -> None:
+        pr.changed_files = details.get("changed_files")
+        pr.additions = details.get("additions")
+        pr.deletions = details.get("deletions")
+        pr.merged_at = parse_datetime(details.get("merged_at"))
+        pr.merged = details.get("merged", False)
+        pr.merged_by = (
+            details.get("merged_by", {}).get("login")
+            if details.get("merged_by")
+            else None
+        )
+
+    @staticmethod
+    def _apply_comments(pr: PullRequest, comments: List[dict]) -> None:
+        comment_count_by_author = {}
+        non_bot_comment_count = 0
+        last_comment_time = None
+        last_comment_author = None
+
+        for comment in sorted(comments, key=lambda x: x["created_at"]):
+            author = comment["user"]["login"]
+            is_bot = comment["user"].get("type", "").lower() == "bot"
+
+            comment_count_by_author[author] = (
+                    comment_count_by_author.get(author, 0) + 1
+            )
+
+            if not is_bot:
+                non_bot_comment_count += 1
+
+            comment_time = parse_datetime(comment["created_at"])
+            if last_comment_time is None or comment_time > last_comment_time:
+                last_comment_time = comment_time
+                last_comment_author = author
+
+        pr.comment_count_by_author = comment_count_by_author
+        pr.non_bot_comment_count = non_bot_comment_count
+        pr.last_comment_time = last_comment_time
+        pr.last_comment_author = last_comment_author
+
+    @staticmethod
+    def _apply_reviews(pr: PullRequest, reviews: List[dict]) -> None:
+        approved_by = set()
+        latest_reviews = {}  # Track latest review by each reviewer
+        for review in reviews:
+            reviewer = review["user"]["login"]
+            review_time = parse_datetime(review["submitted_at"])
+
+            # Update latest review for this reviewer
+            if (
+                    reviewer not in latest_reviews
+                    or review_time > latest_reviews[reviewer][0]
+            ):
+                latest_reviews[reviewer] = (review_time, review["state"].lower())
+
+            # Track approvals
+            if review["state"].lower() == "approved":
+                approved_by.add(reviewer)
+
+        pr.approved_by = list(approved_by)
+        pr.latest_reviews = {
+            reviewer: state for reviewer, (_, state) in latest_reviews.items()
+        }
+
+    @staticmethod
+    def _mark_enrichment_failed(pr: PullRequest) -> PullRequest:
+        """Set default values on error"""
+        pr.comment_count_by_author = {}
+        pr.non_bot_comment_count = 0
+        pr.last_comment_time = None
+        pr.last_comment_author = None
+        pr.approved_by = []
+        pr.latest_reviews = {}
+        pr.merged = False
+        pr.merged_by = None
+        return pr
 
     def _fetch_prs_by_author(
-            self, users, query_config: PRQueryConfig
+            self,
+            users,
+            query_config: PRQueryConfig,
+            registry: EnrichmentRegistry | None = None,
+            pipeline: FetchPipeline | None = None,
+            on_user_done: UserBatchCallback | None = None,
+            on_user_searched: UserBatchCallback | None = None,
+            priority: int = DEFAULT_PRIORITY,
+            cancel_token: CancellationToken | None = None,
+            failed_users: Set[str] | None = None,
     ) -> Dict[str, List[Tuple[PullRequest, bool]]]:
-        """Fetch PR data for a specific section"""
+        """Fetch PR data for a specific section, adding users whose search failed to failed_users"""
+        registry = registry or EnrichmentRegistry()
+        cancel_token = cancel_token or (pipeline.cancel_token if pipeline else CancellationToken())
+        if pipeline is None:
+            pipeline = self._create_pipeline(cancel_token)
+            try:
+                return self._fetch_prs_by_author(
+                    users,
+                    query_config,
+                    registry,
+                    pipeline,
+                    on_user_done,
+                    on_user_searched,
+                    priority,
+                    cancel_token,
+                    failed_users,
+                )
+            finally:
+                pipeline.close(cancel_pending=cancel_token.cancelled)
+                self._record_pipeline_stats(pipeline)
+
         try:
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                # Fetch PRs for all users in parallel
-                futures = [
-                    executor.submit(
-                        self._search_for_user_prs, user, query_config.query, 100
-                    )
-                    for user in users
-                ]
-
-                section_results = {}
-                for future in as_completed(futures):
-                    if self._shutdown:
-                        break
-                    user, user_prs = future.result()
+            # Search all author batches; each result moves on to dedup as soon as it arrives
+            search_futures = [
+                pipeline.search.submit_with_priority(
+                    priority,
+                    self._search_for_users_prs,
+                    batch,
+                    query_config.query,
+                    100,
+                    failed_users,
+                )
+                for batch in self._batch_authors(users, query_config.query)
+            ]
+            dedup_futures = []
+            for search_future in as_completed(search_futures):
+                if cancel_token.cancelled:
+                    break
+                prs_by_user = search_future.result()
+                for user, user_prs in prs_by_user.items():
                     if user_prs:
-                        # Fetch PR details in parallel
-                        detail_futures = [
-                            executor.submit(self._fetch_and_enrich_with_pr_details, pr)
-                            for pr in user_prs
-                        ]
-
-                        # Update PRs with details as they complete
-                        prs_with_details = []
-                        for detail_future in as_completed(detail_futures):
-                            if self._shutdown:
-                                break
-                            pr_with_details, partial = detail_future.result()
-                            
-                            # For needs review section, only include PRs with no non-bot comments
-                            if query_config == self.section_queries[PRSection.NEEDS_REVIEW]:
-                                if pr_with_details.non_bot_comment_count == 0:
-                                    prs_with_details.append((pr_with_details, partial))
-                            else:
-                                prs_with_details.append((pr_with_details, partial))
-
-                        if prs_with_details:  # Only add if we have PRs
-                            section_results[user] = prs_with_details
-
-                return section_results
+                        self._report_user_done(
+                            on_user_searched, user, [(pr, True) for pr in user_prs]
+                        )
+                dedup_futures.append(
+                    pipeline.dedup.submit_with_priority(
+                        priority,
+                        self._submit_new_prs,
+                        prs_by_user,
+                        registry,
+                        pipeline,
+                        priority,
+                        cancel_token,
+                    )
+                )
 
+            section_results = {}
+            for dedup_future in dedup_futures:
+                for user, detail_futures in dedup_future.result().items():
+                    # Update PRs with details as they complete
+                    prs_with_details = []
+                    for detail_future in as_completed(detail_futures):
+                        if cancel_token.cancelled:
+                            break
+                        prs_with_details.append(detail_future.result())
+
+                    if prs_with_details:  # Only add if we have PRs
+                        section_results[user] = prs_with_details
+                        self._report_user_done(on_user_done, user, prs_with_details)
+
+            return section_results
+
+        except (RefreshCancelled, CancelledError):
+            # Whatever was fetched is dropped along with the refresh
+            return {}
         except Exception as e:
             print(f"Error fetching section data: {e}")
             traceback.print_exc()
+            if failed_users is not None:
+                failed_users.update(users)
             return {}
 
-    @with_rate_limit_retry(
-        max_retries=10, initial_failure_backoff_seconds=2, max_failure_backoff_seconds=10, backoff_multiplier=2)
-    def _make_request(self, method: str, url: str, **kwargs) -> requests.Response:
-        """Make a request to the GitHub API with rate limit handling"""
-        return requests.request(method, url, headers=self.headers, **kwargs)
+    def _submit_new_prs(
+            self,
+            prs_by_user: Dict[str, List[PullRequest]],
+            registry: EnrichmentRegistry,
+            pipeline: FetchPipeline,
+            priority: int = DEFAULT_PRIORITY,
+            cancel_token: CancellationToken | None = None,
+    ) -> Dict[str, List[Future]]:
+        """Dedup stage: queue enrichment for PRs not seen yet in this refresh, reusing the others"""
+        return {
+            user: registry.enrich(
+                user_prs, lambda prs: self._submit_enrichment(pipeline.enrich, prs, priority)
+            )
+            for user, user_prs in prs_by_user.items()
+            if user_prs and not (cancel_token and cancel_token.cancelled)
+        }
+
+    def _create_pipeline(self, cancel_token: CancellationToken | None = None) -> FetchPipeline:
+        return FetchPipeline(
+            search_workers=self.search_workers,
+            enrich_workers=self.enrich_workers,
+            queue_size=self.stage_queue_size,
+            cancel_token=cancel_token,
+        )
+
+    def _record_pipeline_stats(self, pipeline: FetchPipeline) -> None:
+        self.last_pipeline_stats = pipeline.stats()
+        for stage_stats in self.last_pipeline_stats:
+            print(stage_stats.describe())
+
+    def _uses_closed_window(self, section_plans: List[SectionPlan]) -> bool:
+        return self.closed_window is not None and any(
+            section_plan.section == PRSection.CLOSED for section_plan in section_plans
+        )
+
+    def _fetch_closed_window(
+            self,
+            users: List[str],
+            recent_days: int,
+            registry: EnrichmentRegistry,
+            pipeline: FetchPipeline | None = None,
+            on_user_done: UserBatchCallback | None = None,
+            priority: int = DEFAULT_PRIORITY,
+            cancel_token: CancellationToken | None = None,
+            failed_users: Set[str] | None = None,
+    ) -> Dict[str, List[Tuple[PullRequest, bool]]]:
+        """
+        Recently closed PRs from the locally held window, fetching only what it is missing. Users
+        whose search failed are added to failed_users.
+        """
+        cancel_token = cancel_token or CancellationToken()
+        window_fetch = self.closed_window.plan_fetch(users, recent_days)
+        full_query, incremental_query = self._closed_window_queries(window_fetch, recent_days)
+        # Their windows are kept as they were, see ClosedPRWindow.apply
+        window_failed_users: Set[str] = set()
+        full_results = (
+            self._fetch_prs_by_author(
+                window_fetch.full_users,
+                full_query,
+                registry,
+                pipeline,
+                priority=priority,
+                cancel_token=cancel_token,
+                failed_users=window_failed_users,
+            )
+            if window_fetch.full_users
+            else {}
+        )
+        incremental_results = (
+            self._fetch_prs_by_author(
+                window_fetch.incremental_users,
+                incremental_query,
+                registry,
+                pipeline,
+                priority=priority,
+                cancel_token=cancel_token,
+                failed_users=window_failed_users,
+            )
+            if window_fetch.incremental_users
+            else {}
+        )
+        if cancel_token.cancelled:
+            # A partial fetch must not be merged into the window
+            return {}
+        if window_failed_users:
+            print(
+                "Closed window: keeping the previous window of "
+                f"{', '.join(sorted(window_failed_users))}"
+            )
+            if failed_users is not None:
+                failed_users.update(window_failed_users)
+        window_by_user = self.closed_window.apply(
+            window_fetch, full_results, incremental_results, window_failed_users
+        )
+        for user, user_results in window_by_user.items():
+            self._report_user_done(on_user_done, user, user_results)
+        return window_by_user
+
+    def _closed_window_queries(
+            self, window_fetch: WindowFetch, recent_days: int
+    ) -> Tuple[PRQueryConfig, PRQueryConfig | None]:
+        full_query = self.query_planner.closed_query(recent_days)
+        incremental_query = None
+        if window_fetch.incremental_since:
+            incremental_query = PRQueryConfig(
+                query=f"{full_query.query} "
+                      f"{self.query_planner.updated_qualifier(window_fetch.incremental_since)}"
+            )
+        print(
+            f"Closed window: full pull for {len(window_fetch.full_users)} user(s), "
+            f"updates since {window_fetch.incremental_since} for "
+            f"{len(window_fetch.incremental_users)} user(s)"
+        )
+        return full_query, incremental_query
 
     @staticmethod
-    def _recent_date(days=7):
-        """Get the date threshold for recently closed PRs"""
-        date_threshold = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
-        return date_threshold
+    def _section_batches(
+            section_plans: List[SectionPlan], on_batch: SectionBatchCallback | None
+    ) -> UserBatchCallback | None:
+        """Turn a user's results for a query into one batch per section derived from it"""
+        if on_batch is None:
+            return None
+
+        def on_user_done(user: str, results: List[EnrichmentResult]) -> None:
+            for section_plan in section_plans:
+                on_batch(
+                    section_plan.section,
+                    user,
+                    [(pr, partial) for pr, partial in results if section_plan.pr_filter(pr)],
+                )
+
+        return on_user_done
+
+    @classmethod
+    def _search_batches(
+            cls, section_plans: List[SectionPlan], on_search_batch: SectionBatchCallback | None
+    ) -> UserBatchCallback | None:
+        """Like _section_batches for search results, skipping sections that need enriched details"""
+        return cls._section_batches(
+            [section_plan for section_plan in section_plans if not section_plan.filters_on_details],
+            on_search_batch,
+        )
+
+    @staticmethod
+    def _query_priority(
+            section_plans: List[SectionPlan], section_priority: List[PRSection] | None
+    ) -> int:
+        """Rank of the most urgent section a query feeds; lower runs first"""
+        if not section_priority:
+            return DEFAULT_PRIORITY
+        return min(
+            (
+                section_priority.index(section_plan.section)
+                for section_plan in section_plans
+                if section_plan.section in section_priority
+            ),
+            default=DEFAULT_PRIORITY,
+        )
+
+    @staticmethod
+    def _report_user_done(
+            on_user_done: UserBatchCallback | None, user: str, results: List[EnrichmentResult]
+    ) -> None:
+        if on_user_done is None:
+            return
+        try:
+            on_user_done(user, results)
+        except Exception as e:
+            print(f"Error reporting results for {user}: {e}")
+            traceback.print_exc()
+
+    @staticmethod
+    def _filter_section(
+            prs_by_author: Dict[str, List[Tuple[PullRequest, bool]]], section_plan: SectionPlan
+    ) -> Dict[str, List[Tuple[PullRequest, bool]]]:
+        """Derive a section from the results of its network query"""
+        section_results = {}
+        for user, prs in prs_by_author.items():
+            section_prs = [(pr, partial) for pr, partial in prs if section_plan.pr_filter(pr)]
+            if section_prs:
+                section_results[user] = section_prs
+        return section_results
+
+    def _make_request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Make a request to the GitHub API. A GET identical to one already in flight (e.g. the same
+        repo or PR looked up for two users at once) waits for it and shares its response instead
+        of being sent again.
+        """
+        if method != "GET":
+            return self._request(method, url, **kwargs)
+        return self.request_flight.do(
+            ResponseCache.key(url, kwargs.get("params")),
+            lambda: self._request(method, url, **kwargs),
+        )
+
+    @with_rate_limit_retry(
+        max_retries=10,
+        initial_failure_backoff_seconds=2,
+        max_failure_backoff_seconds=10,
+        backoff_multiplier=2,
+        sleep=cancellable_sleep,
+    )
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Make a request to the GitHub API with rate limit handling"""
+        if method != "GET" or self.response_cache is None:
+            return self._send(method, url, self.headers, **kwargs)
+
+        # Conditional GET: a 304 is served from the cache and doesn't count against the rate limit.
+        # The token is picked first, another token's validators would replay what it can see
+        pooled, resource = self._acquire_token(url)
+        cache_key = ResponseCache.key(url, kwargs.get("params"), pooled.identity)
+        headers = {**self.headers, **self.response_cache.conditional_headers(cache_key)}
+        response = self.response_cache.resolve(
+            cache_key, self._send_with(pooled, resource, method, url, headers, **kwargs)
+        )
+        if response.status_code == 304:
+            # The cached entry was evicted while the request was in flight
+            response = self.response_cache.resolve(
+                cache_key, self._send(method, url, self.headers, pooled=pooled, **kwargs)
+            )
+        return response
+
+    def _send(
+            self,
+            method: str,
+            url: str,
+            headers: dict,
+            pooled: PooledToken | None = None,
+            **kwargs,
+    ) -> requests.Response:
+        """Send a request with the best token of the pool, or with pooled if given"""
+        pooled, resource = self._acquire_token(url, pooled)
+        return self._send_with(pooled, resource, method, url, headers, **kwargs)
+
+    def _acquire_token(
+            self, url: str, pooled: PooledToken | None = None
+    ) -> Tuple[PooledToken, str]:
+        """Take a request slot for url from the best token of the pool, or from pooled if given"""
+        if cancel_token := current_token.get():
+            cancel_token.raise_if_cancelled()
+        resource = RateLimitScheduler.resource_for(url)
+        if pooled is None:
+            pooled = self.token_pool.acquire(resource, sleep=cancellable_sleep)
+        else:
+            pooled.rate_limiter.acquire(resource, sleep=cancellable_sleep)
+        return pooled, resource
+
+    def _send_with(
+            self,
+            pooled: PooledToken,
+            resource: str,
+            method: str,
+            url: str,
+            headers: dict,
+            **kwargs,
+    ) -> requests.Response:
+        """Send a request with a token that _acquire_token took a slot from"""
+        kwargs.setdefault("timeout", self.request_timeout)
+        headers = {**headers, "Authorization": pooled.authorization}
+        try:
+            response = self._session.request(method, url, headers=headers, **kwargs)
+        except Exception:
+            self.token_pool.release(pooled, resource)
+            raise
+        self.token_pool.observe(
+            pooled,
+            resource,
+            response.status_code,
+            response.headers,
+            response.text if response.status_code == 403 else "",
+        )
+        return response
+
+    def _send_feed_request(self, url: str, headers: Dict[str, str]) -> requests.Response:
+        # Notifications are those of the token's user, so the feed always uses the first token
+        return self._send("GET", url, {**self.headers, **headers}, pooled=self.token_pool.tokens[0])
+
+    def _print_coalescing_stats(self, flight: SingleFlight | AsyncSingleFlight | None = None):
+        flight = flight or self.request_flight
+        print(
+            f"Request coalescing: {flight.coalesced} duplicate GETs saved, {flight.executed} sent"
+        )
+
+    def _print_rate_limit_budget(self):
+        for resource, budget in self.token_pool.snapshot().items():
+            print(
+                f"Rate limit {resource}: {budget['projected_remaining']} remaining, "
+                f"resets in {budget['seconds_until_reset']:.0f}s"
+            )
+        if len(self.token_pool.tokens) > 1:
+            print(f"Tokens: {self.token_pool.describe()}")
+
+    def connection_stats(self) -> ConnectionStats:
+        return connection_stats(self._session)
+
+    @contextmanager
+    def _refresh_scope(self, cancel_token: CancellationToken):
+        """Make cancel_token the current one for this thread and cancellable by close"""
+        with self._tokens_lock:
+            self._active_tokens.add(cancel_token)
+        context_token = current_token.set(cancel_token)
+        try:
+            yield
+        finally:
+            current_token.reset(context_token)
+            with self._tokens_lock:
+                self._active_tokens.discard(cancel_token)
+
+    def close(self):
+        """Cancel refreshes in progress and release pooled connections"""
+        self._shutdown = True
+        with self._tokens_lock:
+            active_tokens = list(self._active_tokens)
+        for cancel_token in active_tokens:
+            cancel_token.cancel()
+        self._session.close()
 
     @staticmethod
     def notify_new_prs(new_prs):
         """Send notification for new PRs"""
         if new_prs:
+            # Qt based, so only imported by the desktop app
+            from github_pr_watcher.notifications import notify
+
             title = "New Pull Requests"
             message = f"{len(new_prs)} new PR(s) to review"
             notify(title, message)
@@ -0,0 +1,141 @@
+import json
+import traceback
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from github_pr_watcher.cancellation import RefreshCancelled
+from github_pr_watcher.objects import PullRequest
+
+PR_FIELDS = """
+      changedFiles
+      additions
+      deletions
+      merged
+      mergedAt
+      mergedBy { login }
+      commits { totalCount }
+      comments(last: 100) {
+        totalCount
+        pageInfo { hasPreviousPage }
+        nodes { author { login __typename } createdAt }
+      }
+      reviews(last: 100) {
+        totalCount
+        pageInfo { hasPreviousPage }
+        nodes { author { login } state submittedAt }
+      }
+"""
+
+
+class GraphQLEnricher:
+    """
+    Fetches the enrichment fields for many PRs with a single aliased GraphQL query per batch,
+    instead of the 5-6 REST round trips per PR made by the REST backend.
+
+    Results are normalized to the same shapes the REST endpoints return, so the client can apply
+    them with the same code regardless of the backend. Only the last 100 comments and reviews come
+    with the query: for busier PRs the list is None and the client has to page through it with REST.
+    """
+
+    def __init__(
+            self,
+            make_request: Callable[..., requests.Response],
+            graphql_url: str = "https://api.github.com/graphql",
+            batch_size: int = 50,
+    ):
+        self.make_request = make_request
+        self.graphql_url = graphql_url
+        self.batch_size = batch_size
+
+    def fetch_details(self, prs: List[PullRequest]) -> Dict[int, Optional[dict]]:
+        """Return normalized details keyed by PR id; None for PRs that could not be fetched"""
+        details_by_id = {}
+        for start in range(0, len(prs), self.batch_size):
+            batch = prs[start:start + self.batch_size]
+            try:
+                details_by_id.update(self._fetch_batch(batch))
+            except RefreshCancelled:
+                raise
+            except Exception as e:
+                print(f"Warning: Error fetching GraphQL batch of {len(batch)} PRs: {e}")
+                traceback.print_exc()
+                details_by_id.update({pr.id: None for pr in batch})
+        return details_by_id
+
+    def _fetch_batch(self, prs: List[PullRequest]) -> Dict[int, Optional[dict]]:
+        response = self.make_request(
+            'POST', self.graphql_url, json={"query": self.build_query(prs)}
+        )
+        return self.parse_response(prs, response.json())
+
+    def parse_response(self, prs: List[PullRequest], payload: dict) -> Dict[int, Optional[dict]]:
+        """Normalize the response to a query built by build_query for the same PRs"""
+        data = payload.get("data") or {}
+
+        for error in payload.get("errors", []):
+            print(f"Warning: GraphQL error: {error.get('message')} (path: {error.get('path')})")
+
+        details_by_id = {}
+        for index, pr in enumerate(prs):
+            repo_data = data.get(f"pr{index}")
+            pr_data = repo_data.get("pullRequest") if repo_data else None
+            details_by_id[pr.id] = (
+                self._normalize(repo_data, pr_data) if pr_data else None
+            )
+        return details_by_id
+
+    @staticmethod
+    def build_query(prs: List[PullRequest]) -> str:
+        aliases = [
+            f"  pr{index}: repository(owner: {json.dumps(pr.repo_owner)}, name: {json.dumps(pr.repo_name)}) {{\n"
+            f"    isArchived\n"
+            f"    pullRequest(number: {int(pr.number)}) {{{PR_FIELDS}    }}\n"
+            f"  }}"
+            for index, pr in enumerate(prs)
+        ]
+        return "query {\n" + "\n".join(aliases) + "\n}"
+
+    @staticmethod
+    def _normalize(repo_data: dict, pr_data: dict) -> dict:
+        """Map GraphQL nodes onto the REST payload shapes"""
+        comments = None if _truncated(pr_data["comments"]) else [
+            {
+                "user": {
+                    "login": (node.get("author") or {}).get("login", "ghost"),
+                    "type": (node.get("author") or {}).get("__typename", "User"),
+                },
+                "created_at": node["createdAt"],
+            }
+            for node in pr_data["comments"]["nodes"]
+        ]
+        reviews = None if _truncated(pr_data["reviews"]) else [
+            {
+                "user": {"login": (node.get("author") or {}).get("login", "ghost")},
+                "state": node["state"],
+                "submitted_at": node["submittedAt"],
+            }
+            for node in pr_data["reviews"]["nodes"]
+            # Pending reviews have not been submitted yet
+            if node.get("submittedAt")
+        ]
+        return {
+            "archived": repo_data.get("isArchived", False),
+            "changed_files": pr_data.get("changedFiles"),
+            "additions": pr_data.get("additions"),
+            "deletions": pr_data.get("deletions"),
+            "merged": pr_data.get("merged", False),
+            "merged_at": pr_data.get("mergedAt"),
+            "merged_by": pr_data.get("mergedBy"),
+            "commit_count": pr_data["commits"]["totalCount"],
+            "comments": comments,
+            "reviews": reviews,
+        }
+
+
+def _truncated(connection: dict) -> bool:
+    """Whether a last: N connection left out older nodes"""
+    page_info = connection.get("pageInfo") or {}
+    return page_info.get("hasPreviousPage", False) or (
+        connection.get("totalCount", 0) > len(connection["nodes"])
+    )
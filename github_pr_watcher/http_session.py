@@ -0,0 +1,55 @@
+from dataclasses import asdict, dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+@dataclass
+class ConnectionStats:
+    connections_opened: int = 0
+    requests_sent: int = 0
+
+    @property
+    def reused_requests(self) -> int:
+        return max(0, self.requests_sent - self.connections_opened)
+
+    @property
+    def reuse_ratio(self) -> float:
+        return self.reused_requests / self.requests_sent if self.requests_sent else 0.0
+
+    def to_dict(self):
+        return {
+            **asdict(self),
+            "reused_requests": self.reused_requests,
+            "reuse_ratio": self.reuse_ratio,
+        }
+
+
+def create_session(pool_size: int) -> requests.Session:
+    """
+    Session with a keep-alive connection pool sized for pool_size concurrent requests, so that
+    requests reuse TLS connections to api.github.com instead of paying a handshake each time.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+    return session
+
+
+def connection_stats(session: requests.Session) -> ConnectionStats:
+    """How many connections the session's pools opened versus how many requests they served"""
+    stats = ConnectionStats()
+    adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+    for adapter in adapters.values():
+        pool_manager = getattr(adapter, "poolmanager", None)
+        if pool_manager is None:
+            continue
+        for key in list(pool_manager.pools.keys()):
+            pool = pool_manager.pools.get(key)
+            if pool is None:
+                continue
+            stats.connections_opened += pool.num_connections
+            stats.requests_sent += pool.num_requests
+    return stats
@@ -3,14 +3,16 @@ import sys
 import traceback
 from datetime import timedelta
 
-from PyQt6.QtCore import QTimer
-from PyQt6.QtGui import QIcon
-from PyQt6.QtWidgets import QApplication
-
-from github_pr_watcher.github_auth import get_github_api_key
-from github_pr_watcher.github_prs_client import GitHubPRsClient
+from github_pr_watcher.async_client import AsyncGitHubPRsClient
+from github_pr_watcher.cache import EnrichmentCache, RepoMetadataCache, ResponseCache
+from github_pr_watcher.closed_window import ClosedPRWindow
+from github_pr_watcher.daemon_client import DaemonConnection, RemotePRsClient
+from github_pr_watcher.github_auth import get_github_api_keys, required_scopes
+from github_pr_watcher.github_prs_client import EnrichmentBackend, GitHubPRsClient
+from github_pr_watcher.query_planner import QueryPlanner
 from github_pr_watcher.settings import Settings
-from github_pr_watcher.ui.main_window import MainWindow
+from github_pr_watcher.shared_cache import SharedCache
+from github_pr_watcher.token_pool import TokenPool
 from github_pr_watcher.ui.ui_state import UIState
 
 APP_VERSION = "1.27.0"
@@ -26,7 +28,62 @@ def get_resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
+def create_github_prs_client(named_tokens, settings: Settings) -> GitHubPRsClient:
+    """named_tokens: (source, token) pairs the client spreads its requests over"""
+    client_kwargs = dict(
+        token_pool=TokenPool.from_tokens(named_tokens),
+        recency_threshold=timedelta(days=1),
+        response_cache=ResponseCache(),
+        enrichment_backend=EnrichmentBackend(settings.fetch.enrichment_backend),
+        graphql_batch_size=settings.fetch.graphql_batch_size,
+        query_planner=QueryPlanner(
+            derive_review_sections=settings.fetch.derive_review_sections
+        ),
+        repo_cache=RepoMetadataCache(
+            ttl=timedelta(hours=settings.fetch.repo_cache_ttl_hours)
+        ),
+        request_timeout=(
+            settings.fetch.connect_timeout_seconds,
+            settings.fetch.read_timeout_seconds,
+        ),
+        enrichment_cache=EnrichmentCache(
+            max_entries=settings.fetch.enrichment_cache_max_entries
+        ),
+        closed_window=ClosedPRWindow() if settings.fetch.sliding_closed_window else None,
+        search_workers=settings.fetch.search_workers,
+        enrich_workers=settings.fetch.enrich_workers,
+        stage_queue_size=settings.fetch.stage_queue_size,
+        change_feed_sources=settings.fetch.change_feed_sources,
+        shared_cache=SharedCache(settings.shared_cache) if settings.shared_cache.enabled else None,
+    )
+    if settings.fetch.engine == "asyncio":
+        try:
+            return AsyncGitHubPRsClient(
+                None, max_concurrency=settings.fetch.max_concurrency, **client_kwargs
+            )
+        except ImportError as e:
+            print(f"{e}; using the threads engine")
+    return GitHubPRsClient(None, **client_kwargs)
+
+
 def main():
+    # Headless commands: nothing they run may import Qt
+    if sys.argv[1:2] == ["daemon"]:
+        from github_pr_watcher.daemon import main as daemon_main
+        return daemon_main(sys.argv[2:])
+    if sys.argv[1:2] == ["cache-server"]:
+        from github_pr_watcher.cache_server import main as cache_server_main
+        return cache_server_main(sys.argv[2:])
+    return run_app()
+
+
+def run_app():
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtGui import QIcon
+    from PyQt6.QtWidgets import QApplication
+
+    from github_pr_watcher.ui.main_window import MainWindow
+
     # Create QApplication instance
     app = QApplication(sys.argv)
     app.setApplicationName(f"GitHub PR Watcher")
@@ -37,11 +94,18 @@ def main():
         # Load UI state and settings
         ui_state = UIState.load()
         settings = Settings.load()
-        github_token = get_github_api_key()
-        github_prs_client = GitHubPRsClient(
-            github_token,
-            recency_threshold=timedelta(days=1),
-        )
+        if settings.daemon.use_in_ui:
+            # Thin client: the daemon does the fetching
+            github_prs_client = RemotePRsClient(DaemonConnection(settings.daemon))
+        else:
+            named_tokens = get_github_api_keys(
+                settings.auth, scopes=required_scopes(settings.fetch.change_feed_sources)
+            )
+            if not named_tokens:
+                return 1
+            token_sources = ", ".join(name for name, _ in named_tokens)
+            print(f"Using {len(named_tokens)} GitHub token(s): {token_sources}")
+            github_prs_client = create_github_prs_client(named_tokens, settings)
         window = MainWindow(github_prs_client, ui_state, settings, APP_VERSION)
         window.show()
 
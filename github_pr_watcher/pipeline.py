@@ -0,0 +1,201 @@
+import itertools
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass
+from typing import Callable, List, Optional
+
+from github_pr_watcher.cancellation import CancellationToken, current_token
+
+_STOP = object()
+
+DEFAULT_PRIORITY = 100
+# Queued after any work, so workers finish what is pending before stopping
+_STOP_PRIORITY = float("inf")
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    queue_size: int
+    completed: int = 0
+    failed: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    busy_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Items completed per second since the stage started"""
+        return self.completed / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def utilization(self) -> float:
+        """Fraction of the workers' time spent working rather than waiting for items"""
+        capacity = self.workers * self.elapsed_seconds
+        return self.busy_seconds / capacity if capacity else 0.0
+
+    def to_dict(self):
+        return {**asdict(self), "throughput": self.throughput, "utilization": self.utilization}
+
+    def describe(self) -> str:
+        return (
+            f"Stage {self.name}: {self.workers} workers, {self.completed} done "
+            f"({self.throughput:.1f}/s, {self.utilization:.0%} busy), {self.failed} failed, "
+            f"queue depth {self.queue_depth}/{self.queue_size} (max {self.max_queue_depth})"
+        )
+
+
+class Stage:
+    """
+    A pool of worker threads fed by a bounded queue.
+
+    submit has the same shape as Executor.submit, but blocks while the queue is full: that is the
+    backpressure that keeps a fast upstream stage from piling up work for a slower one. Queued items
+    are picked lowest priority first, in submission order within a priority. Once cancel_token is
+    cancelled, queued items are cancelled and new ones are cancelled right away.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            workers: int,
+            queue_size: int,
+            cancel_token: Optional[CancellationToken] = None,
+    ):
+        self.name = name
+        self.cancel_token = cancel_token or CancellationToken()
+        self._queue: queue.PriorityQueue = queue.PriorityQueue(maxsize=queue_size)
+        self._sequence = itertools.count()
+        self._stats = StageStats(name=name, workers=workers, queue_size=queue_size)
+        self._stats_lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"{name}-{index}", daemon=True)
+            for index in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        self.cancel_token.on_cancel(self.cancel_pending)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        return self.submit_with_priority(DEFAULT_PRIORITY, fn, *args, **kwargs)
+
+    def submit_with_priority(self, priority: int, fn: Callable, *args, **kwargs) -> Future:
+        future = Future()
+        if self.cancel_token.cancelled:
+            future.cancel()
+            return future
+        self._queue.put((priority, next(self._sequence), (future, fn, args, kwargs)))
+        with self._stats_lock:
+            self._stats.max_queue_depth = max(self._stats.max_queue_depth, self._queue.qsize())
+        return future
+
+    @property
+    def stats(self) -> StageStats:
+        with self._stats_lock:
+            self._stats.queue_depth = self._queue.qsize()
+            self._stats.elapsed_seconds = time.monotonic() - self._started_at
+            return StageStats(**asdict(self._stats))
+
+    def cancel_pending(self) -> None:
+        """Cancel the queued items, letting the ones already running finish"""
+        stops = 0
+        while True:
+            try:
+                _, _, item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stops += 1
+            else:
+                item[0].cancel()
+        # close may have queued them already: without them its workers would never stop
+        for _ in range(stops):
+            self._queue.put((_STOP_PRIORITY, next(self._sequence), _STOP))
+
+    def close(self, cancel_pending: bool = False) -> None:
+        """Stop the workers once they are done, cancelling queued items first if asked to"""
+        if cancel_pending:
+            self.cancel_pending()
+        for _ in self._threads:
+            self._queue.put((_STOP_PRIORITY, next(self._sequence), _STOP))
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self) -> None:
+        # Lets the HTTP layer see which refresh it is sending requests for
+        current_token.set(self.cancel_token)
+        while True:
+            _, _, item = self._queue.get()
+            if item is _STOP:
+                return
+
+            future, fn, args, kwargs = item
+            if self.cancel_token.cancelled:
+                future.cancel()
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            started_at = time.monotonic()
+            try:
+                future.set_result(fn(*args, **kwargs))
+                failed = False
+            except BaseException as e:
+                future.set_exception(e)
+                failed = True
+
+            with self._stats_lock:
+                self._stats.busy_seconds += time.monotonic() - started_at
+                if failed:
+                    self._stats.failed += 1
+                else:
+                    self._stats.completed += 1
+
+
+class FetchPipeline:
+    """
+    The stages of a refresh, each with its own workers so they never compete for slots:
+
+    - search: one search per author batch and query
+    - dedup: splits search results per user and hands PRs not seen yet in this refresh to
+      enrichment (see EnrichmentRegistry)
+    - enrich: fetches the details of PRs (one PR per item, or one GraphQL batch)
+    """
+
+    def __init__(
+            self,
+            search_workers: int,
+            enrich_workers: int,
+            queue_size: int,
+            cancel_token: Optional[CancellationToken] = None,
+    ):
+        self.cancel_token = cancel_token or CancellationToken()
+        self.search = Stage("search", search_workers, queue_size, self.cancel_token)
+        self.dedup = Stage("dedup", 1, queue_size, self.cancel_token)
+        self.enrich = Stage("enrich", enrich_workers, queue_size, self.cancel_token)
+
+    @property
+    def stages(self) -> List[Stage]:
+        return [self.search, self.dedup, self.enrich]
+
+    def stats(self) -> List[StageStats]:
+        return [stage.stats for stage in self.stages]
+
+    def close(self, cancel_pending: bool = False) -> None:
+        for stage in self.stages:
+            try:
+                stage.close(cancel_pending)
+            except Exception as e:
+                print(f"Error stopping {stage.name} stage: {e}")
+                traceback.print_exc()
+
+    def __enter__(self) -> "FetchPipeline":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close(cancel_pending=exc_type is not None or self.cancel_token.cancelled)
@@ -0,0 +1,159 @@
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+from enum import auto, Enum
+from typing import Callable, Dict, Iterable, List, Set
+
+from github_pr_watcher.objects import PullRequest
+
+
+class PRSection(Enum):
+    OPEN = auto()
+    NEEDS_REVIEW = auto()
+    CHANGED_REQUESTED = auto()
+    CLOSED = auto()
+
+
+@dataclass(frozen=True)
+class PRQueryConfig:
+    query: str
+
+
+@dataclass
+class SectionPlan:
+    section: PRSection
+    query_config: PRQueryConfig
+    description: str
+    # Applied client-side to the (enriched) results of query_config
+    pr_filter: Callable[[PullRequest], bool] = field(default=lambda pr: True)
+    # Whether pr_filter looks at enriched details, so search results alone can't tell membership
+    filters_on_details: bool = False
+
+
+@dataclass
+class QueryPlan:
+    sections: List[SectionPlan]
+
+    @property
+    def queries(self) -> List[PRQueryConfig]:
+        """Distinct network queries needed to build every planned section"""
+        return list(dict.fromkeys(plan.query_config for plan in self.sections))
+
+    def sections_for(self, query_config: PRQueryConfig) -> List[SectionPlan]:
+        return [plan for plan in self.sections if plan.query_config == query_config]
+
+    def section_groups(self) -> List[Set[PRSection]]:
+        """Sections sharing a search, which cost as much to fetch together as one of them alone"""
+        return [
+            {section_plan.section for section_plan in self.sections_for(query_config)}
+            for query_config in self.queries
+        ]
+
+    def explain(self) -> str:
+        lines = [f"Query plan: {len(self.queries)} search(es) per author batch"]
+        for query_config in self.queries:
+            lines.append(f"  search '{query_config.query}'")
+            for plan in self.sections_for(query_config):
+                lines.append(f"    -> {plan.section.name}: {plan.description}")
+        return "\n".join(lines)
+
+
+def is_needs_review(pr: PullRequest) -> bool:
+    return not pr.draft and (pr.non_bot_comment_count or 0) == 0
+
+
+def has_changes_requested(pr: PullRequest) -> bool:
+    return not pr.draft and any(
+        state == "changes_requested" for state in (pr.latest_reviews or {}).values()
+    )
+
+
+class QueryPlanner:
+    """
+    Maps sections onto as few search queries as possible.
+
+    OPEN, NEEDS_REVIEW and CHANGED_REQUESTED are all subsets of the open PRs, so they share a single
+    'is:pr is:open' search and are told apart client-side using the draft flag and the enriched
+    comment/review data. CLOSED needs its own search since it covers a different set of PRs.
+    """
+
+    OPEN_QUERY = PRQueryConfig(query="is:pr is:open")
+    CHANGES_REQUESTED_QUERY = PRQueryConfig(
+        query="is:pr is:open review:changes_requested -draft:true"
+    )
+
+    def __init__(self, derive_review_sections: bool = False):
+        # When False, CHANGED_REQUESTED falls back to GitHub's own review decision via a narrow query
+        self.derive_review_sections = derive_review_sections
+
+    def plan(
+            self,
+            sections: Iterable[PRSection],
+            recently_closed_days: int = 7,
+            updated_since: datetime | None = None,
+    ) -> QueryPlan:
+        """
+        Plan the searches for the given sections. With updated_since, every search is narrowed to
+        the PRs updated since then, which yields the changes to merge into a previous snapshot.
+        """
+        plans_by_section: Dict[PRSection, SectionPlan] = {
+            PRSection.OPEN: SectionPlan(
+                section=PRSection.OPEN,
+                query_config=self.OPEN_QUERY,
+                description="all results",
+            ),
+            PRSection.NEEDS_REVIEW: SectionPlan(
+                section=PRSection.NEEDS_REVIEW,
+                query_config=self.OPEN_QUERY,
+                description="non-draft PRs without non-bot comments",
+                pr_filter=is_needs_review,
+                filters_on_details=True,
+            ),
+            PRSection.CHANGED_REQUESTED: (
+                SectionPlan(
+                    section=PRSection.CHANGED_REQUESTED,
+                    query_config=self.OPEN_QUERY,
+                    description="non-draft PRs whose latest review by someone requests changes",
+                    pr_filter=has_changes_requested,
+                    filters_on_details=True,
+                )
+                if self.derive_review_sections
+                else SectionPlan(
+                    section=PRSection.CHANGED_REQUESTED,
+                    query_config=self.CHANGES_REQUESTED_QUERY,
+                    description="all results",
+                )
+            ),
+            PRSection.CLOSED: SectionPlan(
+                section=PRSection.CLOSED,
+                query_config=self.closed_query(recently_closed_days),
+                description="all results",
+            ),
+        }
+        section_plans = [plans_by_section[section] for section in sections]
+        if updated_since:
+            section_plans = [
+                replace(
+                    section_plan,
+                    query_config=PRQueryConfig(
+                        query=f"{section_plan.query_config.query} {self.updated_qualifier(updated_since)}"
+                    ),
+                )
+                for section_plan in section_plans
+            ]
+        return QueryPlan(sections=section_plans)
+
+    @classmethod
+    def closed_query(cls, recently_closed_days: int) -> PRQueryConfig:
+        return PRQueryConfig(query=f"is:pr is:closed closed:>={cls.recent_date(recently_closed_days)}")
+
+    @staticmethod
+    def updated_qualifier(since: datetime) -> str:
+        # Naive datetimes are taken as local time
+        since = since.astimezone(timezone.utc)
+        return f"updated:>={since.strftime('%Y-%m-%dT%H:%M:%SZ')}"
+
+    @staticmethod
+    def recent_date(days=7):
+        """Get the date threshold for recently closed PRs"""
+        date_threshold = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        return date_threshold
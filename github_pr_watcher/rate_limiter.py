@@ -0,0 +1,154 @@
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Mapping
+
+CORE = "core"
+SEARCH = "search"
+GRAPHQL = "graphql"
+
+# Documented limits for an authenticated user: (requests, window in seconds)
+DEFAULT_LIMITS = {
+    CORE: (5000, 3600),
+    SEARCH: (30, 60),
+    GRAPHQL: (5000, 3600),
+}
+
+
+@dataclass
+class RateLimitBucket:
+    resource: str
+    limit: int
+    window_seconds: int
+    remaining: int
+    reset_at: float
+    in_flight: int = 0
+    blocked_until: float = 0.0
+    last_request_at: float = 0.0
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class RateLimitScheduler:
+    """
+    Shared rate limit budget for every request thread of a client.
+
+    Keeps one bucket per GitHub rate limit resource (core, search, graphql), updated from the
+    X-RateLimit-* headers of every response. Requests take a token from their bucket before being
+    sent; once the bucket is empty they wait for the reset instead of running into a 403, and when
+    the budget runs low the remaining tokens are spread evenly over the time left in the window.
+    Retry-After (secondary rate limits) blocks the whole resource until it expires.
+    """
+
+    def __init__(self, pacing_threshold: float = 0.2, reserve: int = 0):
+        # Start pacing once less than this fraction of the limit is left
+        self.pacing_threshold = pacing_threshold
+        # Tokens kept back, e.g. for the UI to stay responsive
+        self.reserve = reserve
+        self._buckets: Dict[str, RateLimitBucket] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def resource_for(url: str) -> str:
+        if "/search/" in url:
+            return SEARCH
+        if url.rstrip("/").endswith("/graphql"):
+            return GRAPHQL
+        return CORE
+
+    def try_acquire(self, resource: str) -> float:
+        """Take a token if one is available now and return 0, otherwise return how long to wait"""
+        with self._lock:
+            bucket = self._bucket(resource)
+            now = time.time()
+            if now >= bucket.reset_at:
+                # New window: assume a full budget until headers say otherwise
+                bucket.remaining = bucket.limit
+                bucket.reset_at = now + bucket.window_seconds
+
+            if bucket.blocked_until > now:
+                return bucket.blocked_until - now
+            if bucket.remaining - bucket.in_flight <= self.reserve:
+                return max(0.1, bucket.reset_at - now)
+
+            available = bucket.remaining - bucket.in_flight
+            if available < bucket.limit * self.pacing_threshold:
+                interval = (bucket.reset_at - now) / available
+                next_allowed = bucket.last_request_at + interval
+                if next_allowed > now:
+                    return next_allowed - now
+
+            bucket.in_flight += 1
+            bucket.last_request_at = now
+            return 0.0
+
+    def acquire(self, resource: str, sleep: Callable[[float], None] = time.sleep) -> None:
+        """Block until a request against resource may be sent"""
+        while (wait_time := self.try_acquire(resource)) > 0:
+            if wait_time > 1:
+                print(f"Rate limit budget for {resource} exhausted. Waiting {wait_time:.1f} seconds...")
+            sleep(wait_time)
+
+    def release(self, resource: str) -> None:
+        """Give back a token for a request that never reached GitHub"""
+        with self._lock:
+            bucket = self._bucket(resource)
+            bucket.in_flight = max(0, bucket.in_flight - 1)
+
+    def observe(self, resource: str, status_code: int, headers: Mapping[str, str]) -> None:
+        """Update the bucket from the response to a request taken with acquire"""
+        with self._lock:
+            bucket = self._bucket(headers.get("X-RateLimit-Resource", resource))
+            if bucket.resource != resource:
+                # The request was accounted against the wrong bucket
+                self._bucket(resource).in_flight = max(0, self._bucket(resource).in_flight - 1)
+            else:
+                bucket.in_flight = max(0, bucket.in_flight - 1)
+
+            if "X-RateLimit-Limit" in headers:
+                bucket.limit = int(headers["X-RateLimit-Limit"])
+            if "X-RateLimit-Remaining" in headers:
+                bucket.remaining = int(headers["X-RateLimit-Remaining"])
+            if "X-RateLimit-Reset" in headers:
+                bucket.reset_at = float(headers["X-RateLimit-Reset"])
+
+            if status_code in (403, 429):
+                if retry_after := headers.get("Retry-After"):
+                    bucket.blocked_until = time.time() + float(retry_after)
+                elif status_code == 429:
+                    # Secondary limit without a hint: GitHub asks to wait at least a minute
+                    bucket.blocked_until = time.time() + 60
+
+    def projected_remaining(self, resource: str) -> int:
+        """Requests left in the current window once in-flight requests complete"""
+        with self._lock:
+            bucket = self._bucket(resource)
+            if time.time() >= bucket.reset_at:
+                return bucket.limit
+            return max(0, bucket.remaining - bucket.in_flight)
+
+    def seconds_until_reset(self, resource: str) -> float:
+        with self._lock:
+            return max(0.0, self._bucket(resource).reset_at - time.time())
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {
+            resource: {
+                "projected_remaining": self.projected_remaining(resource),
+                "seconds_until_reset": self.seconds_until_reset(resource),
+            }
+            for resource in DEFAULT_LIMITS
+        }
+
+    def _bucket(self, resource: str) -> RateLimitBucket:
+        if resource not in self._buckets:
+            limit, window_seconds = DEFAULT_LIMITS.get(resource, DEFAULT_LIMITS[CORE])
+            self._buckets[resource] = RateLimitBucket(
+                resource=resource,
+                limit=limit,
+                window_seconds=window_seconds,
+                remaining=limit,
+                reset_at=time.time() + window_seconds,
+            )
+        return self._buckets[resource]
@@ -0,0 +1,163 @@
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set
+
+from github_pr_watcher.query_planner import PRSection
+from github_pr_watcher.rate_limiter import CORE, GRAPHQL
+from github_pr_watcher.token_pool import TokenPool
+
+# Refresh intervals as multiples of the configured refresh interval. A search shared by several
+# sections is refreshed at the lowest multiplier among them
+DEFAULT_INTERVAL_MULTIPLIERS = {
+    PRSection.OPEN: 1.0,
+    PRSection.NEEDS_REVIEW: 1.0,
+    PRSection.CHANGED_REQUESTED: 1.0,
+    PRSection.CLOSED: 4.0,
+}
+
+
+@dataclass
+class QuerySchedule:
+    sections: FrozenSet[PRSection]  # Sections built from the search
+    base_interval: float  # Seconds between refreshes while the search changes at a normal pace
+    interval: float  # Current interval, after backoff or speed-up
+    next_due: float
+    unchanged_streak: int = 0
+    last_refreshed_at: Optional[float] = None
+
+
+class AdaptiveRefreshScheduler:
+    """
+    Decides which sections are due for a refresh, each search on its own cadence.
+
+    Sections built from the same search (see QueryPlan.section_groups) cost the same to refresh
+    together as one of them alone, so they share a schedule. Every search starts at the base
+    interval times the lowest multiplier of its sections. After backoff_after refreshes in a row
+    without changes its interval is multiplied by backoff_factor (up to max_backoff times the
+    base), and a change brings it back to the base. Searches with recent activity are polled at
+    active_speedup times the base instead. All intervals are stretched when the hourly rate limit
+    budget runs low, and never go below min_interval (or the base interval if shorter).
+    """
+
+    def __init__(
+            self,
+            base_interval: float,
+            query_groups: Iterable[Set[PRSection]] = (),
+            multipliers: Optional[Dict[PRSection, float]] = None,
+            token_pool: Optional[TokenPool] = None,
+            backoff_after: int = 3,
+            backoff_factor: float = 2.0,
+            max_backoff: float = 8.0,
+            active_speedup: float = 0.5,
+            min_interval: float = 60,
+            clock: Callable[[], float] = time.time,
+    ):
+        self.query_groups = [frozenset(group) for group in query_groups if group]
+        # Sections not built from any planned search are refreshed on their own
+        grouped = set().union(*self.query_groups)
+        self.query_groups += [
+            frozenset({section}) for section in PRSection if section not in grouped
+        ]
+        self.multipliers = {**DEFAULT_INTERVAL_MULTIPLIERS, **(multipliers or {})}
+        self.token_pool = token_pool
+        self.backoff_after = backoff_after
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.active_speedup = active_speedup
+        self.min_interval = min_interval
+        self._clock = clock
+        self._schedules: List[QuerySchedule] = []
+        self.reset(base_interval)
+
+    def reset(self, base_interval: float) -> None:
+        """Start over with a new base interval, every search due one interval from now"""
+        now = self._clock()
+        self._floor = min(self.min_interval, base_interval)
+        self._schedules = []
+        for group in self.query_groups:
+            multiplier = min(self.multipliers[section] for section in group)
+            interval = max(self._floor, base_interval * multiplier)
+            self._schedules.append(QuerySchedule(
+                sections=group,
+                base_interval=interval,
+                interval=interval,
+                next_due=now + interval,
+            ))
+
+    def due_sections(self) -> List[PRSection]:
+        """Sections of the searches to refresh now"""
+        now = self._clock()
+        due = set().union(
+            *(schedule.sections for schedule in self._schedules if schedule.next_due <= now)
+        )
+        return [section for section in PRSection if section in due]
+
+    def seconds_until_next(self) -> float:
+        next_due = min(schedule.next_due for schedule in self._schedules)
+        return max(0.0, next_due - self._clock())
+
+    def record_refresh(
+            self,
+            sections: Iterable[PRSection],
+            changed: Set[PRSection],
+            active: Set[PRSection],
+    ) -> None:
+        """
+        Reschedule the searches of refreshed sections: changed holds the sections whose PRs
+        changed, active the ones with recently updated PRs.
+        """
+        now = self._clock()
+        budget_factor = self._budget_factor()
+        for schedule in self._schedules_of(sections):
+            if schedule.sections & changed:
+                schedule.unchanged_streak = 0
+                schedule.interval = schedule.base_interval
+            else:
+                schedule.unchanged_streak += 1
+                if schedule.unchanged_streak >= self.backoff_after:
+                    schedule.interval = min(
+                        schedule.interval * self.backoff_factor,
+                        schedule.base_interval * self.max_backoff,
+                    )
+            if schedule.sections & active:
+                schedule.interval = min(
+                    schedule.interval, schedule.base_interval * self.active_speedup
+                )
+
+            schedule.interval = max(self._floor, schedule.interval)
+            schedule.last_refreshed_at = now
+            schedule.next_due = now + schedule.interval * budget_factor
+
+    def postpone(self, sections: Iterable[PRSection], seconds: float) -> None:
+        """Push the searches of sections back, e.g. after a failed refresh"""
+        now = self._clock()
+        for schedule in self._schedules_of(sections):
+            schedule.next_due = max(schedule.next_due, now + seconds)
+
+    def describe(self) -> str:
+        now = self._clock()
+        return ", ".join(
+            f"{'+'.join(s.name for s in PRSection if s in schedule.sections)} "
+            f"every {schedule.interval / 60:.0f}m "
+            f"(next in {max(0.0, schedule.next_due - now) / 60:.0f}m)"
+            for schedule in self._schedules
+        )
+
+    def _schedules_of(self, sections: Iterable[PRSection]) -> List[QuerySchedule]:
+        sections = set(sections)
+        return [schedule for schedule in self._schedules if schedule.sections & sections]
+
+    def _budget_factor(self) -> float:
+        """How much to stretch intervals given what is left of the rate limit budget"""
+        if self.token_pool is None:
+            return 1.0
+
+        factor = 1.0
+        # The search budget resets every minute, so only the hourly ones are worth slowing down for
+        for resource in (CORE, GRAPHQL):
+            remaining = self.token_pool.projected_remaining(resource)
+            left = remaining / self.token_pool.capacity(resource)
+            if left < 0.5:
+                # Halving what's left doubles the intervals, down to 8x at an eighth
+                factor = max(factor, min(8.0, 0.5 / max(left, 1 / 16)))
+        return factor
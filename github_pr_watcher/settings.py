@@ -1,7 +1,7 @@
 import os
 import traceback
 from dataclasses import asdict, dataclass, field
-from typing import List
+from typing import Dict, List
 
 import yaml
 
@@ -68,11 +68,110 @@ class RefreshInterval:
             return self.value * 60 * 60 * 1000
 
 
+@dataclass
+class FetchSettings:
+    engine: str = "threads"  # threads, asyncio (requires aiohttp)
+    max_concurrency: int = 50  # asyncio engine only
+    # Threads engine: workers of the search and enrichment stages, and the size of their queues
+    search_workers: int = 4
+    enrich_workers: int = 8
+    stage_queue_size: int = 100
+    enrichment_backend: str = "rest"  # rest, rest_minimal, graphql
+    graphql_batch_size: int = 50
+    # Derive Changes Requested from enriched reviews instead of a separate search
+    derive_review_sections: bool = False
+    repo_cache_ttl_hours: int = 24
+    # Enriched PRs kept across refreshes, closed ones are kept until they leave the window
+    enrichment_cache_max_entries: int = 5000
+    connect_timeout_seconds: float = 5
+    read_timeout_seconds: float = 30
+    # Keep the Recently Closed window locally and only fetch what changed in it
+    sliding_closed_window: bool = False
+    # Only fetch PRs updated since the last refresh and merge them into what is shown
+    delta_refresh: bool = False
+    # How often a search-only pass drops PRs that left a section without being updated
+    reconcile_interval_minutes: int = 60
+    # Show search results right away and fill in their details as they are enriched
+    two_phase_refresh: bool = False
+    # Refresh each search on its own cadence, see AdaptiveRefreshScheduler
+    adaptive_refresh: bool = False
+    # Section refresh intervals as multiples of the refresh interval, by section (OPEN,
+    # NEEDS_REVIEW, CHANGED_REQUESTED, CLOSED); missing sections use the defaults, and sections
+    # sharing a search are refreshed at the lowest of theirs
+    section_interval_multipliers: Dict[str, float] = field(default_factory=dict)
+    # With more users than this (0 disables it), refresh a shard of them per tick instead, spread
+    # over the refresh interval and sized to spend at most shard_budget_fraction of the remaining
+    # rate limit budget; see UserShardPlanner
+    shard_users_above: int = 0
+    shard_budget_fraction: float = 0.5
+    # Between refreshes poll these feeds (notifications, user_events) and only re-fetch the PRs
+    # they report activity on; a full refresh still runs every change_feed_reconcile_minutes
+    change_feed_sources: List[str] = field(default_factory=list)
+    change_feed_reconcile_minutes: int = 60
+
+
+@dataclass
+class AuthSettings:
+    """Where to find GitHub tokens besides the Keychain one; requests are spread over all of them"""
+    # Extra Keychain accounts under the app's service, one token each
+    keychain_accounts: List[str] = field(default_factory=list)
+    # Environment variables holding one or more tokens, separated by commas or whitespace
+    token_env_vars: List[str] = field(default_factory=lambda: ["GITHUB_PR_WATCHER_TOKENS"])
+    # Files with one token per line; blank lines and lines starting with # are skipped
+    token_files: List[str] = field(default_factory=list)
+
+
+@dataclass
+class WebhookSettings:
+    """Embedded receiver for GitHub webhook deliveries, see WebhookReceiver"""
+    enabled: bool = False
+    host: str = "127.0.0.1"
+    port: int = 8765
+    # Environment variable holding the secret deliveries are signed with
+    secret_env_var: str = "GITHUB_PR_WATCHER_WEBHOOK_SECRET"
+    # While a delivery came in within active_window_minutes, polling only reconciles this often
+    poll_interval_minutes: int = 60
+    active_window_minutes: int = 30
+
+
+@dataclass
+class DaemonSettings:
+    """Headless fetcher serving PR data over a local JSON API, see `gpw daemon`"""
+    # Listen on this Unix socket, or on host:port when it is empty
+    socket_path: str = "~/.github_pr_watcher/daemon.sock"
+    host: str = "127.0.0.1"
+    port: int = 8766
+    # Have the desktop UI show the daemon's data instead of fetching from GitHub itself
+    use_in_ui: bool = False
+
+
+@dataclass
+class SharedCacheSettings:
+    """Team cache server fetching once for several watchers, see `gpw cache-server`"""
+    # Read PR data from a cache server when one is reachable, fetching from GitHub otherwise
+    enabled: bool = False
+    # Server to use, e.g. http://build-box:8767; found on the local network when empty
+    url: str = ""
+    # Where the server listens; 0.0.0.0 makes it reachable from the LAN
+    host: str = "127.0.0.1"
+    port: int = 8767
+    discovery_port: int = 8768
+    # Environment variable holding the secret clients authenticate with; required off localhost
+    secret_env_var: str = "GITHUB_PR_WATCHER_CACHE_SECRET"
+    # Users whose data on the server is older than this are fetched from GitHub directly
+    max_age_minutes: int = 30
+
+
 @dataclass
 class Settings:
     users: List[str] = field(default_factory=list)
     refresh: RefreshInterval = field(default_factory=lambda: RefreshInterval(15, "minutes"))
     thresholds: Thresholds = field(default_factory=Thresholds)
+    fetch: FetchSettings = field(default_factory=FetchSettings)
+    auth: AuthSettings = field(default_factory=AuthSettings)
+    webhooks: WebhookSettings = field(default_factory=WebhookSettings)
+    daemon: DaemonSettings = field(default_factory=DaemonSettings)
+    shared_cache: SharedCacheSettings = field(default_factory=SharedCacheSettings)
     settings_path: str = field(default="")
 
     @classmethod
@@ -143,6 +242,11 @@ class Settings:
                         "recently_closed_days", 7
                     ),
                 ),
+                fetch=FetchSettings(**data.get("fetch", {})),
+                auth=AuthSettings(**data.get("auth", {})),
+                webhooks=WebhookSettings(**data.get("webhooks", {})),
+                daemon=DaemonSettings(**data.get("daemon", {})),
+                shared_cache=SharedCacheSettings(**data.get("shared_cache", {})),
                 settings_path=settings_path,
             )
             return settings
@@ -168,6 +272,11 @@ class Settings:
                     "time_since_comment": asdict(self.thresholds.time_since_comment),
                     "recently_closed_days": self.thresholds.recently_closed_days,
                 },
+                "fetch": asdict(self.fetch),
+                "auth": asdict(self.auth),
+                "webhooks": asdict(self.webhooks),
+                "daemon": asdict(self.daemon),
+                "shared_cache": asdict(self.shared_cache),
             }
 
             with open(self.settings_path, "w") as f:
@@ -0,0 +1,158 @@
+import getpass
+import hashlib
+import hmac
+import ipaddress
+import json
+import os
+import secrets
+import socket
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib import request
+
+from github_pr_watcher.objects import PullRequest
+from github_pr_watcher.query_planner import PRSection
+from github_pr_watcher.settings import SharedCacheSettings
+
+DISCOVERY_PROBE = b"github-pr-watcher:cache-server?"
+DISCOVERY_TIMEOUT_SECONDS = 0.5
+# After failing to reach a server, watchers fetch directly for this long before looking again
+REDISCOVER_SECONDS = 5 * 60
+
+
+def discovery_proof(secret: str, nonce: str, port: int) -> str:
+    """What a server knowing the secret answers a probe carrying nonce with"""
+    return hmac.new(secret.encode(), f"{nonce}:{port}".encode(), hashlib.sha256).hexdigest()
+
+
+def discover(
+        discovery_port: int,
+        secret: Optional[str] = None,
+        timeout: float = DISCOVERY_TIMEOUT_SECONDS,
+) -> Optional[str]:
+    """
+    URL of a cache server answering on this machine or the local network, if any.
+
+    Anyone on the network can answer a broadcast, so with a secret only servers proving they know
+    it (see discovery_proof) are accepted, and without one only servers on this machine.
+    """
+    nonce = secrets.token_hex(16)
+    deadline = time.monotonic() + timeout
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe_socket:
+        probe_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        for host in ("127.0.0.1", "<broadcast>"):
+            try:
+                probe_socket.sendto(DISCOVERY_PROBE + nonce.encode(), (host, discovery_port))
+            except OSError:
+                continue
+        while (remaining := deadline - time.monotonic()) > 0:
+            probe_socket.settimeout(remaining)
+            try:
+                answer, (server_host, _) = probe_socket.recvfrom(1024)
+            except OSError:
+                return None
+            try:
+                reply = json.loads(answer)
+                port = int(reply["port"])
+            except (ValueError, KeyError, TypeError):
+                continue
+            if secret:
+                trusted = hmac.compare_digest(
+                    str(reply.get("proof", "")), discovery_proof(secret, nonce, port)
+                )
+            else:
+                trusted = ipaddress.ip_address(server_host).is_loopback
+            if trusted:
+                return f"http://{server_host}:{port}"
+            print(f"Ignoring unauthenticated cache server answer from {server_host}")
+        return None
+
+
+class SharedCache:
+    """
+    Client side of a cache server: reads the snapshot of the users a watcher shows, renewing its
+    subscription, and tells which users still have to be fetched from GitHub directly because the
+    server can't be reached or their data there is older than max_age_minutes.
+
+    The secret is only sent to the configured url or to a server that proved it knows it when
+    discovered.
+    """
+
+    def __init__(
+            self,
+            settings: SharedCacheSettings,
+            client_id: Optional[str] = None,
+            timeout: float = 5,
+            clock=time.time,
+    ):
+        self.settings = settings
+        self.client_id = client_id or f"{getpass.getuser()}@{socket.gethostname()}:{os.getpid()}"
+        self.secret = os.environ.get(settings.secret_env_var)
+        self.timeout = timeout
+        self._clock = clock
+        self._url: Optional[str] = settings.url or None
+        self._unreachable_until = 0.0
+
+    def snapshot(
+            self, users: List[str]
+    ) -> Tuple[Dict[PRSection, Dict[str, List[PullRequest]]], List[str]]:
+        """The fresh users' PRs by section, and the users to fetch from GitHub"""
+        url = self._server_url()
+        if url is None:
+            return {}, users
+        try:
+            data = self._post(f"{url}/snapshot", {
+                "client_id": self.client_id,
+                "users": users,
+                "max_age_seconds": self.settings.max_age_minutes * 60,
+            })
+            return self._parse_snapshot(url, users, data)
+        except Exception as e:
+            print(f"Cache server {url} unavailable, fetching from GitHub: {e}")
+            self._unreachable_until = self._clock() + REDISCOVER_SECONDS
+            if not self.settings.url:
+                self._url = None
+            return {}, users
+
+    def _parse_snapshot(
+            self, url: str, users: List[str], data: dict
+    ) -> Tuple[Dict[PRSection, Dict[str, List[PullRequest]]], List[str]]:
+        fresh_since = datetime.now(timezone.utc).timestamp() - self.settings.max_age_minutes * 60
+        prs_by_user_by_section: Dict[PRSection, Dict[str, List[PullRequest]]] = {}
+        stale_users = []
+        for user in users:
+            user_data = data["users"].get(user) or {}
+            synced_at = user_data.get("synced_at")
+            if synced_at is None or datetime.fromisoformat(synced_at).timestamp() < fresh_since:
+                stale_users.append(user)
+                continue
+            for pr_section in PRSection:
+                prs = user_data["sections"].get(pr_section.name, [])
+                prs_by_user_by_section.setdefault(pr_section, {})[user] = [
+                    PullRequest.parse_pr(pr) for pr in prs
+                ]
+        served = len(users) - len(stale_users)
+        print(f"Cache server {url}: {served} of {len(users)} users served from the cache")
+        return prs_by_user_by_section, stale_users
+
+    def _server_url(self) -> Optional[str]:
+        if self._clock() < self._unreachable_until:
+            return None
+        if self._url is None:
+            self._url = discover(self.settings.discovery_port, self.secret)
+            if self._url is None:
+                self._unreachable_until = self._clock() + REDISCOVER_SECONDS
+            else:
+                print(f"Found cache server at {self._url}")
+        return self._url
+
+    def _post(self, url: str, data: dict) -> dict:
+        headers = {"Content-Type": "application/json"}
+        if self.secret:
+            headers["Authorization"] = f"Bearer {self.secret}"
+        post_request = request.Request(
+            url, data=json.dumps(data).encode(), method="POST", headers=headers
+        )
+        with request.urlopen(post_request, timeout=self.timeout) as response:
+            return json.loads(response.read())
@@ -0,0 +1,167 @@
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from github_pr_watcher.rate_limiter import DEFAULT_LIMITS, RateLimitScheduler
+
+# How long a token is left out after GitHub refuses it: bad credentials, or a 403 saying the
+# token can't be used at all (see UNUSABLE_TOKEN_MESSAGES), are unlikely to fix themselves soon
+QUARANTINE_SECONDS = {401: 60 * 60, 403: 60 * 60}
+# Other 403s concern a single repository or organization (missing permission, SSO enforcement) or
+# are secondary rate limits, which with_rate_limit_retry backs off from
+UNUSABLE_TOKEN_MESSAGES = ("account was suspended", "account is suspended", "has been suspended")
+
+
+@dataclass
+class PooledToken:
+    name: str  # Where the token came from, printed instead of the token itself
+    token: str
+    rate_limiter: RateLimitScheduler
+    quarantined_until: float = 0.0
+    quarantine_status: Optional[int] = None
+
+    @property
+    def authorization(self) -> str:
+        return f"token {self.token}"
+
+    @property
+    def identity(self) -> str:
+        """Tells the token apart from the others, e.g. in cache keys, without revealing it"""
+        return hashlib.sha256(self.token.encode()).hexdigest()[:16]
+
+    def is_quarantined(self, now: float) -> bool:
+        return self.quarantined_until > now
+
+    def describe(self, now: float) -> str:
+        if self.is_quarantined(now):
+            return (
+                f"{self.name}: quarantined after a {self.quarantine_status} "
+                f"for {self.quarantined_until - now:.0f}s more"
+            )
+        return f"{self.name}: ok"
+
+
+class TokenPool:
+    """
+    GitHub tokens shared by the request threads of a client, each with its own rate limit budget.
+
+    Every request goes out with the healthy token that has the most budget left for its resource,
+    so adding tokens adds budget. A token GitHub answers with a 401, or a 403 saying the token
+    itself is unusable, is quarantined for a while (see QUARANTINE_SECONDS); when every token is
+    quarantined the one coming back first is used rather than failing outright.
+
+    projected_remaining, seconds_until_reset and snapshot are the pool-wide counterparts of
+    RateLimitScheduler's, over the healthy tokens.
+    """
+
+    def __init__(self, tokens: List[PooledToken]):
+        if not tokens:
+            raise ValueError("A token pool needs at least one token")
+        self.tokens = tokens
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_tokens(
+            cls, named_tokens: List[Tuple[str, str]], pacing_threshold: float = 0.2
+    ) -> "TokenPool":
+        return cls([
+            PooledToken(name=name, token=token, rate_limiter=RateLimitScheduler(pacing_threshold))
+            for name, token in named_tokens
+        ])
+
+    def try_acquire(self, resource: str) -> Tuple[Optional[PooledToken], float]:
+        """
+        Take a request slot from the best token for resource. Returns the token, or None and how
+        long to wait if none of them can send now.
+        """
+        wait_time = float("inf")
+        for pooled in self._by_remaining(resource):
+            token_wait = pooled.rate_limiter.try_acquire(resource)
+            if token_wait <= 0:
+                return pooled, 0.0
+            wait_time = min(wait_time, token_wait)
+        return None, wait_time
+
+    def acquire(self, resource: str, sleep: Callable[[float], None] = time.sleep) -> PooledToken:
+        """Block until one of the tokens may send a request against resource, and return it"""
+        while True:
+            pooled, wait_time = self.try_acquire(resource)
+            if pooled is not None:
+                return pooled
+            if wait_time > 1:
+                print(
+                    f"Rate limit budget for {resource} exhausted on every token. "
+                    f"Waiting {wait_time:.1f} seconds..."
+                )
+            sleep(wait_time)
+
+    @staticmethod
+    def release(pooled: PooledToken, resource: str) -> None:
+        """Give back a slot taken with acquire for a request that never reached GitHub"""
+        pooled.rate_limiter.release(resource)
+
+    def observe(
+            self,
+            pooled: PooledToken,
+            resource: str,
+            status_code: int,
+            headers: Mapping[str, str],
+            body: str = "",
+    ) -> None:
+        """Account the response to a request sent with pooled, quarantining unusable tokens"""
+        pooled.rate_limiter.observe(resource, status_code, headers)
+
+        if not self._token_unusable(status_code, body):
+            return
+        with self._lock:
+            pooled.quarantined_until = time.time() + QUARANTINE_SECONDS[status_code]
+            pooled.quarantine_status = status_code
+        print(f"Quarantining GitHub token {pooled.name} after a {status_code}")
+
+    @staticmethod
+    def _token_unusable(status_code: int, body: str) -> bool:
+        if status_code == 403:
+            message = body.lower()
+            return any(unusable in message for unusable in UNUSABLE_TOKEN_MESSAGES)
+        return status_code == 401
+
+    def capacity(self, resource: str) -> int:
+        """Documented budget of the healthy tokens for resource"""
+        limit, _ = DEFAULT_LIMITS[resource]
+        return limit * len(self._healthy())
+
+    def projected_remaining(self, resource: str) -> int:
+        return sum(
+            pooled.rate_limiter.projected_remaining(resource) for pooled in self._healthy()
+        )
+
+    def seconds_until_reset(self, resource: str) -> float:
+        return min(pooled.rate_limiter.seconds_until_reset(resource) for pooled in self._healthy())
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {
+            resource: {
+                "projected_remaining": self.projected_remaining(resource),
+                "seconds_until_reset": self.seconds_until_reset(resource),
+            }
+            for resource in DEFAULT_LIMITS
+        }
+
+    def describe(self) -> str:
+        now = time.time()
+        return ", ".join(pooled.describe(now) for pooled in self.tokens)
+
+    def _healthy(self) -> List[PooledToken]:
+        now = time.time()
+        with self._lock:
+            healthy = [pooled for pooled in self.tokens if not pooled.is_quarantined(now)]
+            return healthy or [min(self.tokens, key=lambda pooled: pooled.quarantined_until)]
+
+    def _by_remaining(self, resource: str) -> List[PooledToken]:
+        return sorted(
+            self._healthy(),
+            key=lambda pooled: pooled.rate_limiter.projected_remaining(resource),
+            reverse=True,
+        )
@@ -1,7 +1,10 @@
+import copy
+import os
 import traceback
-from typing import Dict, List
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Set, Tuple
 
-from PyQt6.QtCore import QTimer
+from PyQt6.QtCore import pyqtSignal, QObject, QTimer
 from PyQt6.QtGui import QCloseEvent
 from PyQt6.QtWidgets import (
     QApplication,
@@ -16,17 +19,39 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
+from github_pr_watcher.change_feed import ChangeSet
 from github_pr_watcher.github_prs_client import GitHubPRsClient, PRSection
 from github_pr_watcher.notifications import notify
 from github_pr_watcher.objects import PullRequest
+from github_pr_watcher.refresh_scheduler import AdaptiveRefreshScheduler
 from github_pr_watcher.settings import RefreshInterval, Settings
 from github_pr_watcher.ui.filters import FiltersBar, FilterState
-from github_pr_watcher.ui.pr_card import create_pr_card
-from github_pr_watcher.ui.refresh_worker import RefreshWorker
+from github_pr_watcher.ui.pr_card import create_pr_card, format_time
+from github_pr_watcher.ui.pr_placement import SectionPlacer
+from github_pr_watcher.ui.refresh_worker import ChangeFeedWorker, RefreshWorker
 from github_pr_watcher.ui.section_frame import SectionFrame
 from github_pr_watcher.ui.settings_dialog import SettingsDialog
 from github_pr_watcher.ui.themes import Colors, Styles
-from github_pr_watcher.ui.ui_state import SectionName, UIState
+from github_pr_watcher.ui.ui_state import SECTION_NAME_BY_PR_SECTION, SectionName, UIState
+from github_pr_watcher.ui.webhook_updates import WebhookUpdater
+from github_pr_watcher.user_sharding import UserShardPlanner
+from github_pr_watcher.webhooks import WebhookReceiver
+
+# How long closing the window waits for cancelled refreshes to stop
+WORKER_SHUTDOWN_WAIT_MS = 2000
+# How often the adaptive scheduler is asked which sections are due
+SCHEDULER_TICK_MS = 15 * 1000
+# Sections with a PR updated this recently are polled faster
+ACTIVE_SECTION_WINDOW = timedelta(hours=1)
+# How long to wait before retrying sections whose refresh failed
+FAILED_REFRESH_RETRY_SECONDS = 60
+# Webhook deliveries that need a refresh are batched into one, started this long after the first
+WEBHOOK_REFRESH_DELAY_MS = 10 * 1000
+
+
+class WebhookSignals(QObject):
+    # (event, payload) from the receiver's threads, queued to the UI thread
+    received = pyqtSignal(str, dict)
 
 
 class MainWindow(QMainWindow):
@@ -39,11 +64,45 @@ class MainWindow(QMainWindow):
         self.ui_state: UIState = ui_state
         self.settings: Settings = settings
         self.auto_refresh_timer: QTimer | None = None
+        self.refresh_scheduler = AdaptiveRefreshScheduler(
+            settings.refresh.to_millis() / 1000,
+            query_groups=github_prs_client.query_planner.plan(list(PRSection)).section_groups(),
+            multipliers={
+                PRSection[name]: multiplier
+                for name, multiplier in settings.fetch.section_interval_multipliers.items()
+                if name in PRSection.__members__
+            },
+            token_pool=github_prs_client.token_pool,
+        )
+        self.shard_planner = UserShardPlanner(
+            github_prs_client.token_pool,
+            tick_seconds=SCHEDULER_TICK_MS / 1000,
+            refresh_interval_seconds=settings.refresh.to_millis() / 1000,
+            budget_fraction=settings.fetch.shard_budget_fraction,
+        )
+        # Rate limit budgets when the running refresh started, to measure what it cost
+        self.refresh_budget_before: Dict[str, int] = {}
         self.setWindowTitle(f"GitHub PR Watcher - v{app_version}")
         self.setStyleSheet(Styles.MAIN_WINDOW)
-        self.workers: List[RefreshWorker] = []
+        self.workers: List[RefreshWorker | ChangeFeedWorker] = []
         self.refresh_worker: RefreshWorker | None = None
+        self.change_feed_worker: ChangeFeedWorker | None = None
         self.is_refreshing: bool = False
+        self.last_reconciled_at: datetime | None = None
+        # What the sections of the running refresh showed when it started
+        self.refresh_signatures: Dict[PRSection, Set[Tuple[int, datetime]]] = {}
+        self.last_poll_at: datetime | None = None
+        self.webhook_receiver: WebhookReceiver | None = None
+        self.webhook_refresh_pending = False
+        # Places PRs updated outside of a search (webhooks, change feed) in their sections
+        self.section_placer = SectionPlacer(
+            ui_state,
+            users=lambda: self.settings.users,
+            recently_closed_days=lambda: self.settings.thresholds.recently_closed_days,
+        )
+        self.webhook_updater = WebhookUpdater(self.section_placer)
+        self.webhook_signals = WebhookSignals()
+        self.webhook_signals.received.connect(self._handle_webhook)
         self.app = QApplication.instance()
 
         # Create central widget and main layout
@@ -137,6 +196,7 @@ class MainWindow(QMainWindow):
         self.populate_users_filter()
         self.apply_filters()
         self.setup_or_reset_refresh_timer(settings.refresh)
+        self._start_webhook_receiver()
 
     def _setup_buttons(self, buttons_layout):
         """Setup the header buttons"""
@@ -178,35 +238,45 @@ class MainWindow(QMainWindow):
     def show_settings(self):
         """Show settings dialog"""
         try:
+            # The dialog edits the settings in place, keep what they were to tell what changed
+            previous_settings = copy.deepcopy(self.settings)
             settings_dialog = SettingsDialog(self.settings)
             if settings_dialog.exec() == QDialog.DialogCode.Accepted:
                 settings = settings_dialog.get_settings()
                 if settings:
                     settings.save()
-                    self._apply_settings_changes(settings)
+                    self._apply_settings_changes(settings, previous_settings)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to show settings: {str(e)}")
 
-    def _apply_settings_changes(self, new_settings):
+    def _apply_settings_changes(self, new_settings: Settings, previous_settings: Settings):
         """Apply changes from settings dialog"""
         try:
             if not new_settings:  # If settings dialog returned None
                 return
 
-            # Get current settings from the Settings instance
-            previous_settings = self.settings
-
-            # Compare refresh settings
-            if previous_settings.refresh != new_settings.refresh:
-                self.setup_or_reset_refresh_timer(new_settings.refresh)
+            was_sharded = self._is_sharded(previous_settings)
 
             # Store new settings
             self.settings = new_settings
+
+            # Compare refresh settings
+            if (
+                previous_settings.refresh != new_settings.refresh
+                or previous_settings.fetch.adaptive_refresh != new_settings.fetch.adaptive_refresh
+                or was_sharded != self._is_sharded()
+            ):
+                self.setup_or_reset_refresh_timer(new_settings.refresh)
             self.populate_users_filter()
 
             # Update user filter and refresh data if users changed
-            if new_settings.users != previous_settings.users:
-                self.refresh_data()  # This will also apply filters / update UI
+            if (
+                new_settings.users != previous_settings.users
+                or new_settings.thresholds.recently_closed_days
+                != previous_settings.thresholds.recently_closed_days
+            ):
+                # A delta would miss the PRs of new users / the widened window
+                self.refresh_data(full=True)  # This will also apply filters / update UI
             else:
                 # Even if users haven't changed, we should reapply filters
                 # because thresholds might have changed
@@ -219,6 +289,18 @@ class MainWindow(QMainWindow):
 
     def apply_filters(self):
         """Apply filters and update UI"""
+        self._render_sections(self._section_frames())
+
+    def _section_frames(self) -> List[SectionFrame]:
+        return [
+            self.open_prs_frame,
+            self.needs_review_frame,
+            self.changes_requested_frame,
+            self.recently_closed_frame,
+        ]
+
+    def _render_sections(self, frames: List[SectionFrame]):
+        """Rebuild the cards of the given section frames from UIState"""
         try:
             # Get current filter state
             filter_state: FilterState = self.filter_bar.get_filter_state()
@@ -234,91 +316,89 @@ class MainWindow(QMainWindow):
             self.filter_bar.update_org_filter(needs_review_data)
 
             # Update each section with filtered data
-            for frame in [
-                self.open_prs_frame,
-                self.needs_review_frame,
-                self.changes_requested_frame,
-                self.recently_closed_frame,
-            ]:
-                # Get PR data - returns tuple of (data, timestamp)
-                pr_data, _ = self.ui_state.get_pr_data(frame.name)
-                if pr_data is None:
-                    continue
+            for frame in frames:
+                self._render_section(frame, filter_state, needs_review_numbers)
 
-                # Clear existing content
-                if frame.content_layout:
-                    while frame.content_layout.count():
-                        item = frame.content_layout.takeAt(0)
-                        if widget := item.widget():
-                            widget.deleteLater()
-
-                # Filter out needs review PRs from open PRs section
-                if frame.name == SectionName.OPEN_PRS:
-                    filtered_data = {}
-                    for user, prs in pr_data.items():
-                        filtered_prs = [pr for pr in prs if pr.number not in needs_review_numbers]
-                        if filtered_prs:
-                            filtered_data[user] = filtered_prs
-                    pr_data = filtered_data
-
-                # Filter PRs
-                filtered_prs = self.filter_bar.filter_prs_grouped_by_users(pr_data)
-                total_prs = 0
-
-                if filter_state.group_by_user:
-                    # Group by user visualization
-                    for user, user_prs in filtered_prs.items():
-                        if not user_prs:
-                            continue
-
-                        # Add user header
-                        user_header = QLabel(f"Author: {user} ({len(user_prs)})")
-                        user_header.setStyleSheet(
-                            f"""
-                            QLabel {{
-                                color: {Colors.TEXT_SECONDARY};
-                                font-size: 12px;
-                                font-weight: bold;
-                                padding: 5px 0;
-                            }}
-                            """
-                        )
-                        frame.content_layout.addWidget(user_header)
-
-                        # Add PR cards for this user
-                        if frame.name == SectionName.RECENTLY_CLOSED:
-                            frame.add_prs_with_this_week_separator(user_prs, lambda pr: create_pr_card(pr, self.settings))
-                        else:
-                            for pr in user_prs:
-                                card = create_pr_card(pr, self.settings)
-                                frame.content_layout.addWidget(card)
-                            total_prs += len(user_prs)
-
-                        # Add spacing between user sections
-                        spacer = QWidget()
-                        spacer.setFixedHeight(10)
-                        frame.content_layout.addWidget(spacer)
+        except Exception as e:
+            print(f"Error applying filters: {e}")
+            traceback.print_exc()
+
+    def _render_section(
+        self, frame: SectionFrame, filter_state: FilterState, needs_review_numbers: Set[int]
+    ):
+        # Get PR data - returns tuple of (data, timestamp)
+        pr_data, _ = self.ui_state.get_pr_data(frame.name)
+        if pr_data is None:
+            return
+
+        # Clear existing content
+        if frame.content_layout:
+            frame.clear_content()
+
+        # Filter out needs review PRs from open PRs section
+        if frame.name == SectionName.OPEN_PRS:
+            filtered_data = {}
+            for user, prs in pr_data.items():
+                filtered_prs = [pr for pr in prs if pr.number not in needs_review_numbers]
+                if filtered_prs:
+                    filtered_data[user] = filtered_prs
+            pr_data = filtered_data
+
+        # Filter PRs
+        filtered_prs = self.filter_bar.filter_prs_grouped_by_users(pr_data)
+        total_prs = 0
+
+        if filter_state.group_by_user:
+            # Group by user visualization
+            for user, user_prs in filtered_prs.items():
+                if not user_prs:
+                    continue
 
+                # Add user header, with the age of the user's data when refreshes are sharded
+                header_text = f"Author: {user} ({len(user_prs)})"
+                if self._is_sharded() and (age := self.ui_state.user_data_age(user)):
+                    header_text += f" · updated {format_time(age, ' ago')}"
+                user_header = QLabel(header_text)
+                user_header.setStyleSheet(
+                    f"""
+                    QLabel {{
+                        color: {Colors.TEXT_SECONDARY};
+                        font-size: 12px;
+                        font-weight: bold;
+                        padding: 5px 0;
+                    }}
+                    """
+                )
+                frame.content_layout.addWidget(user_header)
+
+                # Add PR cards for this user
+                if frame.name == SectionName.RECENTLY_CLOSED:
+                    frame.add_prs_with_this_week_separator(user_prs, lambda pr: create_pr_card(pr, self.settings))
                 else:
-                    # Flat visualization (no grouping)
-                    all_prs = filtered_prs.get("all", [])
-                    if frame.name == SectionName.RECENTLY_CLOSED:
-                        frame.add_prs_with_this_week_separator(all_prs, lambda pr: create_pr_card(pr, self.settings))
-                    else:
-                        for pr in all_prs:
-                            card = create_pr_card(pr, self.settings)
-                            frame.content_layout.addWidget(card)
-                    total_prs += len(all_prs)
+                    for pr in user_prs:
+                        frame.add_pr_card(pr, create_pr_card(pr, self.settings))
+                    total_prs += len(user_prs)
+
+                # Add spacing between user sections
+                spacer = QWidget()
+                spacer.setFixedHeight(10)
+                frame.content_layout.addWidget(spacer)
 
-                # Add stretch at the end
-                frame.content_layout.addStretch()
+        else:
+            # Flat visualization (no grouping)
+            all_prs = filtered_prs.get("all", [])
+            if frame.name == SectionName.RECENTLY_CLOSED:
+                frame.add_prs_with_this_week_separator(all_prs, lambda pr: create_pr_card(pr, self.settings))
+            else:
+                for pr in all_prs:
+                    frame.add_pr_card(pr, create_pr_card(pr, self.settings))
+            total_prs += len(all_prs)
 
-                # Update count
-                frame.update_count(total_prs)
+        # Add stretch at the end
+        frame.content_layout.addStretch()
 
-        except Exception as e:
-            print(f"Error applying filters: {e}")
-            traceback.print_exc()
+        # Update count
+        frame.update_count(total_prs)
 
     def populate_users_filter(self):
         """Update the user filter with current users"""
@@ -328,27 +408,60 @@ class MainWindow(QMainWindow):
             print(f"Error updating user filter: {e}")
             traceback.print_exc()
 
-    def refresh_data(self):
-        """Refresh PR data"""
+    def refresh_data(
+        self,
+        full: bool = False,
+        sections: List[PRSection] | None = None,
+        users: List[str] | None = None,
+    ):
+        """
+        Refresh PR data of the given sections (all by default) and users (all by default, or a
+        shard of them), fetching only what changed since their last refresh unless full is set
+        """
         if self.is_refreshing:
             return
+        sections = sections or list(PRSection)
+        shard = users
 
         try:
-            users = self.settings.users
+            users = shard or self.settings.users
             if not users:
                 return
 
             self.is_refreshing = True
+            self.last_poll_at = datetime.now()
             self._show_loading_state()
             self.refresh_btn.setText("❌ Cancel")
 
+            section_names = [SECTION_NAME_BY_PR_SECTION[section] for section in sections]
+            updated_since = (
+                self.ui_state.delta_since(section_names, users=users, by_user=shard is not None)
+                if self.settings.fetch.delta_refresh and not full
+                else None
+            )
+            reconcile_interval = timedelta(minutes=self.settings.fetch.reconcile_interval_minutes)
+            reconcile = updated_since is not None and (
+                self.last_reconciled_at is None
+                or datetime.now() - self.last_reconciled_at >= reconcile_interval
+            )
+
             self.refresh_worker = RefreshWorker(
                 self.github_prs_client,
                 users,
                 settings=self.settings,
+                updated_since=updated_since,
+                reconcile=reconcile,
+                two_phase=self.settings.fetch.two_phase_refresh,
+                section_priority=self._section_priority(),
+                sections=sections,
             )
+            self.refresh_signatures = self._section_signatures(sections)
+            self.refresh_budget_before = self.shard_planner.budget_snapshot()
+            self.refresh_worker.reconciled.connect(self._handle_reconciled)
+            self.refresh_worker.batch_ready.connect(self._handle_batch)
             self.refresh_worker.finished.connect(self._handle_refresh_complete)
             self.refresh_worker.error.connect(self._handle_refresh_error)
+            self.workers = [worker for worker in self.workers if worker.isRunning()]
             self.workers.append(self.refresh_worker)
             self.refresh_worker.start()
 
@@ -372,22 +485,75 @@ class MainWindow(QMainWindow):
     ):
         """Handle completion of refresh operation"""
         try:
-            # Save each section's data
-            self.ui_state.update_pr_data(
-                SectionName.OPEN_PRS, prs_by_author_by_section.get(PRSection.OPEN, {})
-            )
-            self.ui_state.update_pr_data(
-                SectionName.NEEDS_REVIEW,
-                prs_by_author_by_section.get(PRSection.NEEDS_REVIEW, {}),
-            )
-            self.ui_state.update_pr_data(
-                SectionName.CHANGES_REQUESTED,
-                prs_by_author_by_section.get(PRSection.CHANGED_REQUESTED, {}),
-            )
-            self.ui_state.update_pr_data(
-                SectionName.RECENTLY_CLOSED,
-                prs_by_author_by_section.get(PRSection.CLOSED, {}),
+            worker = self.refresh_worker
+            sections = worker.sections if worker else list(PRSection)
+            shard = self._shard_of(worker)
+            failed_users = worker.failed_users if worker else set()
+            refreshed_prs = {
+                pr.id: pr
+                for prs_by_author in prs_by_author_by_section.values()
+                for prs in prs_by_author.values()
+                for pr, _ in prs
+            }
+            if worker and worker.updated_since:
+                # Delta refresh: PRs seen in any section are replaced wherever they were shown
+                changed_pr_ids: Set[int] = set(refreshed_prs)
+                print(f"Delta refresh: {len(changed_pr_ids)} PRs updated since {worker.updated_since}")
+                for pr_section in sections:
+                    self.ui_state.merge_pr_data(
+                        SECTION_NAME_BY_PR_SECTION[pr_section],
+                        prs_by_author_by_section.get(pr_section, {}),
+                        changed_pr_ids,
+                    )
+            else:
+                # Save each section's data
+                for pr_section in sections:
+                    if shard or failed_users:
+                        # Only these users were fetched, the others keep their data
+                        fetched_users = [
+                            user for user in shard or worker.users if user not in failed_users
+                        ]
+                        prs_by_author = prs_by_author_by_section.get(pr_section, {})
+                        self.ui_state.replace_users_pr_data(
+                            SECTION_NAME_BY_PR_SECTION[pr_section],
+                            fetched_users,
+                            {user: prs_by_author.get(user, []) for user in fetched_users},
+                        )
+                    else:
+                        self.ui_state.update_pr_data(
+                            SECTION_NAME_BY_PR_SECTION[pr_section],
+                            prs_by_author_by_section.get(pr_section, {}),
+                        )
+                if len(sections) == len(PRSection) and not shard and not failed_users:
+                    self.last_reconciled_at = datetime.now()
+            self._drop_contradicted_prs(
+                [section for section in PRSection if section not in sections], refreshed_prs
             )
+
+            # An empty result means the fetch failed, so the next delta must start from the old point,
+            # and so do the users whose search failed and the sections they are part of
+            if worker and prs_by_author_by_section:
+                self.ui_state.mark_users_synced(
+                    [user for user in worker.users if user not in failed_users], worker.started_at
+                )
+                if failed_users:
+                    print(
+                        f"Search failed for {', '.join(sorted(failed_users))}, "
+                        "their changes will be fetched again"
+                    )
+                    self.refresh_scheduler.postpone(sections, FAILED_REFRESH_RETRY_SECONDS)
+                if shard:
+                    self.shard_planner.record_usage(len(shard), self.refresh_budget_before)
+                    progress = self.shard_planner.describe(
+                        self.settings.users, self.ui_state.synced_at_by_user
+                    )
+                    print(f"Sharded refresh: {progress}")
+                elif not failed_users:
+                    self.ui_state.mark_synced(
+                        [SECTION_NAME_BY_PR_SECTION[section] for section in sections],
+                        worker.started_at,
+                    )
+                    self._record_refresh(sections)
             self.ui_state.save()
             self.apply_filters()
 
@@ -403,26 +569,319 @@ class MainWindow(QMainWindow):
             self.is_refreshing = False
             self.refresh_btn.setText("🔄 Refresh")  # Reset button text
 
+    def _handle_batch(
+        self, pr_section: PRSection, user: str, prs: List[Tuple[PullRequest, bool]]
+    ):
+        """Show one user's PRs for a section while the rest of the refresh is still running"""
+        try:
+            worker = self.refresh_worker
+            if worker is None:
+                return
+
+            section_name = SECTION_NAME_BY_PR_SECTION[pr_section]
+            previous_prs, _ = self.ui_state.get_pr_data(section_name)
+            previous_ids = {pr.id for pr in (previous_prs or {}).get(user, [])}
+            self.ui_state.apply_batch(
+                section_name, user, prs, replace_user=worker.updated_since is None
+            )
+
+            frame = self._frame_for(section_name)
+            current_prs, _ = self.ui_state.get_pr_data(section_name)
+            user_prs = (current_prs or {}).get(user, [])
+            if {pr.id for pr in user_prs} == previous_ids and self._replace_cards(frame, user, user_prs):
+                # Same PRs, only their details changed: no need to rebuild the section
+                return
+
+            frames = [frame]
+            if section_name == SectionName.NEEDS_REVIEW:
+                # Open PRs hides the ones needing review
+                frames.append(self.open_prs_frame)
+            self._render_sections(frames)
+        except Exception as e:
+            print(f"Error applying refresh batch: {e}")
+            traceback.print_exc()
+
+    def _replace_cards(self, frame: SectionFrame, user: str, prs: List[PullRequest]) -> bool:
+        """
+        Swap the cards of the user's PRs in place. Returns False, leaving the frame untouched, if
+        their details change which of them are shown (e.g. a repo turned out to be archived).
+        """
+        visible_prs = [
+            pr
+            for filtered_prs in self.filter_bar.filter_prs_grouped_by_users({user: prs}).values()
+            for pr in filtered_prs
+        ]
+        if frame.name == SectionName.OPEN_PRS:
+            needs_review_data, _ = self.ui_state.get_pr_data(SectionName.NEEDS_REVIEW)
+            needs_review_numbers = {
+                pr.number for user_prs in (needs_review_data or {}).values() for pr in user_prs
+            }
+            visible_prs = [pr for pr in visible_prs if pr.number not in needs_review_numbers]
+
+        shown_ids = {pr.id for pr in prs if pr.id in frame.cards_by_pr_id}
+        if {pr.id for pr in visible_prs} != shown_ids:
+            return False
+        for pr in visible_prs:
+            frame.replace_pr_card(pr, create_pr_card(pr, self.settings))
+        return True
+
+    def _drop_contradicted_prs(
+        self, sections: List[PRSection], refreshed_prs: Dict[int, PullRequest]
+    ):
+        """
+        Drop PRs from sections that were not refreshed when the refresh saw them in a state that
+        no longer fits there (e.g. an open PR that got closed), instead of waiting for their turn
+        """
+        for pr_section in sections:
+            wants_closed = pr_section == PRSection.CLOSED
+            contradicted_ids = {
+                pr.id for pr in refreshed_prs.values() if (pr.state == "closed") != wants_closed
+            }
+            section_name = SECTION_NAME_BY_PR_SECTION[pr_section]
+            if dropped := self.ui_state.drop_pr_ids(section_name, contradicted_ids):
+                print(f"Dropped {dropped} PRs that left {section_name.value}")
+
+    def _section_signatures(
+        self, sections: List[PRSection]
+    ) -> Dict[PRSection, Set[Tuple[int, datetime]]]:
+        """What each section shows, to tell which sections a refresh changed"""
+        signatures = {}
+        for pr_section in sections:
+            prs_by_author, _ = self.ui_state.get_pr_data(SECTION_NAME_BY_PR_SECTION[pr_section])
+            signatures[pr_section] = {
+                (pr.id, pr.updated_at)
+                for prs in (prs_by_author or {}).values()
+                for pr in prs
+            }
+        return signatures
+
+    def _record_refresh(self, sections: List[PRSection]):
+        """Let the scheduler adapt the refreshed sections' cadence to how much they change"""
+        signatures = self._section_signatures(sections)
+        changed = {
+            section
+            for section in sections
+            if signatures[section] != self.refresh_signatures.get(section)
+        }
+        active_since = datetime.now().astimezone() - ACTIVE_SECTION_WINDOW
+        active = {
+            section
+            for section in sections
+            if any(updated_at >= active_since for _, updated_at in signatures[section])
+        }
+        self.refresh_scheduler.record_refresh(sections, changed, active)
+        if self.settings.fetch.adaptive_refresh:
+            print(f"Refresh schedule: {self.refresh_scheduler.describe()}")
+
+    def _is_sharded(self, settings: Settings | None = None) -> bool:
+        settings = settings or self.settings
+        threshold = settings.fetch.shard_users_above
+        return 0 < threshold < len(settings.users)
+
+    def _shard_of(self, worker: RefreshWorker | None) -> List[str] | None:
+        """The users a refresh fetched if they were only a shard of them"""
+        if worker is None or set(worker.users) == set(self.settings.users):
+            return None
+        return worker.users
+
+    def _start_webhook_receiver(self):
+        webhook_settings = self.settings.webhooks
+        if not webhook_settings.enabled:
+            return
+        secret = os.environ.get(webhook_settings.secret_env_var)
+        if not secret:
+            print(f"Webhooks enabled but {webhook_settings.secret_env_var} is not set, polling only")
+            return
+        try:
+            self.webhook_receiver = WebhookReceiver(
+                secret,
+                on_event=self.webhook_signals.received.emit,
+                host=webhook_settings.host,
+                port=webhook_settings.port,
+            )
+            self.webhook_receiver.start()
+        except Exception as e:
+            print(f"Error starting webhook receiver: {e}")
+            traceback.print_exc()
+            self.webhook_receiver = None
+
+    def _handle_webhook(self, event: str, payload: dict):
+        """Apply a webhook delivery to the shown PRs"""
+        try:
+            update = self.webhook_updater.apply(event, payload)
+            self._show_placed(update.sections)
+            if update.refresh_needed and not self.webhook_refresh_pending:
+                self.webhook_refresh_pending = True
+                QTimer.singleShot(WEBHOOK_REFRESH_DELAY_MS, self._refresh_after_webhooks)
+        except Exception as e:
+            print(f"Error applying {event} webhook: {e}")
+            traceback.print_exc()
+
+    def _show_placed(self, section_names: Set[SectionName]):
+        """Save and re-render the sections PRs were placed in outside of a refresh"""
+        if not section_names:
+            return
+        self.ui_state.save()
+        frames = [self._frame_for(section_name) for section_name in section_names]
+        if SectionName.NEEDS_REVIEW in section_names and self.open_prs_frame not in frames:
+            # Open PRs hides the ones needing review
+            frames.append(self.open_prs_frame)
+        self._render_sections(frames)
+
+    def _refresh_after_webhooks(self):
+        self.webhook_refresh_pending = False
+        self.refresh_data()
+
+    def _webhooks_active(self) -> bool:
+        """Whether deliveries are coming in, so polling only needs to reconcile now and then"""
+        return self.webhook_receiver is not None and self.webhook_receiver.received_within(
+            self.settings.webhooks.active_window_minutes * 60
+        )
+
+    def _poll(self, refresh: Callable[[], None]):
+        """
+        Run a timer refresh, only every webhooks.poll_interval_minutes while webhooks flow. With a
+        change feed configured, ticks in between only poll the feed, see _poll_change_feed
+        """
+        if self._webhooks_active() and self.last_poll_at is not None:
+            poll_interval = timedelta(minutes=self.settings.webhooks.poll_interval_minutes)
+            if datetime.now() - self.last_poll_at < poll_interval:
+                return
+        if self._change_feed_suffices():
+            self._poll_change_feed(refresh)
+            return
+        refresh()
+
+    def _change_feed_suffices(self) -> bool:
+        """Whether a refresh ran within fetch.change_feed_reconcile_minutes, if the feed is used"""
+        if self.github_prs_client.change_feed is None or self.last_poll_at is None:
+            return False
+        reconcile_interval = timedelta(minutes=self.settings.fetch.change_feed_reconcile_minutes)
+        return datetime.now() - self.last_poll_at < reconcile_interval
+
+    def _poll_change_feed(self, refresh: Callable[[], None]):
+        """Poll the change feed if it is due and re-fetch the PRs it reports"""
+        if self.is_refreshing or (self.change_feed_worker and self.change_feed_worker.isRunning()):
+            return
+        if self.github_prs_client.change_feed.seconds_until_due(self.settings.users) > 0:
+            return
+        self.change_feed_worker = ChangeFeedWorker(
+            self.github_prs_client, self.settings.users, since=self.ui_state.delta_since()
+        )
+        self.change_feed_worker.finished.connect(
+            lambda changes, results: self._handle_change_feed(changes, results, refresh)
+        )
+        self.workers = [worker for worker in self.workers if worker.isRunning()]
+        self.workers.append(self.change_feed_worker)
+        self.change_feed_worker.start()
+
+    def _handle_change_feed(
+        self,
+        changes: ChangeSet,
+        results: List[Tuple[PullRequest, bool]],
+        refresh: Callable[[], None],
+    ):
+        """Move the PRs the change feed reported to their sections, refreshing if it fell short"""
+        try:
+            section_names = set()
+            for pr, partial in results:
+                if not partial:
+                    section_names |= self.section_placer.place(pr)
+            if changes.polled:
+                print(
+                    f"Change feed: {changes.requests} polls, {changes.not_modified} unchanged, "
+                    f"{len(changes.pr_refs)} PRs with activity, {len(results)} of them watched"
+                )
+            self._show_placed(section_names)
+            if changes.failed or any(partial for _, partial in results):
+                refresh()
+        except Exception as e:
+            print(f"Error applying change feed: {e}")
+            traceback.print_exc()
+
+    def _refresh_next_shard(self, due_only: bool = True):
+        if self.is_refreshing:
+            return
+        shard = self.shard_planner.next_shard(
+            self.settings.users, self.ui_state.synced_at_by_user, due_only
+        )
+        if shard:
+            self.refresh_data(users=shard)
+
+    def _refresh_due_sections(self):
+        if sections := self.refresh_scheduler.due_sections():
+            self.refresh_data(sections=sections)
+
+    def _section_priority(self) -> List[PRSection]:
+        """Sections in the order their details should be fetched: expanded ones first, top down"""
+        frames = self._section_frames()
+        ordered = [frame for frame in frames if frame.is_expanded()] + [
+            frame for frame in frames if not frame.is_expanded()
+        ]
+        pr_section_by_name = {
+            section_name: pr_section for pr_section, section_name in SECTION_NAME_BY_PR_SECTION.items()
+        }
+        return [pr_section_by_name[frame.name] for frame in ordered]
+
+    def _frame_for(self, section_name: SectionName) -> SectionFrame:
+        return next(frame for frame in self._section_frames() if frame.name == section_name)
+
+    def _handle_reconciled(self, pr_ids_by_section: Dict[PRSection, Set[int]]):
+        """Drop PRs that no longer match their section's query"""
+        try:
+            for pr_section, pr_ids in pr_ids_by_section.items():
+                section_name = SECTION_NAME_BY_PR_SECTION[pr_section]
+                if dropped := self.ui_state.retain_pr_ids(
+                    section_name, pr_ids, users=self._shard_of(self.refresh_worker)
+                ):
+                    print(f"Reconciliation dropped {dropped} PRs from {section_name.value}")
+            self.last_reconciled_at = datetime.now()
+        except Exception as e:
+            print(f"Error reconciling sections: {e}")
+            traceback.print_exc()
+
     def _handle_refresh_error(self, error_msg):
         """Handle refresh operation error"""
         self._hide_loading_state()
         self.refresh_btn.setText("🔄 Refresh")  # Reset button text
         QMessageBox.critical(self, "Error", f"Failed to refresh data: {error_msg}")
+        if self.refresh_worker:
+            self.refresh_scheduler.postpone(
+                self.refresh_worker.sections, FAILED_REFRESH_RETRY_SECONDS
+            )
         if self.refresh_worker in self.workers:
             self.workers.remove(self.refresh_worker)
         self.refresh_worker = None
         self.is_refreshing = False
 
     def setup_or_reset_refresh_timer(self, refresh_interval: RefreshInterval):
-        """Setup the refresh timer"""
+        """
+        Setup the refresh timer: for large teams it refreshes a shard of users per tick, with
+        adaptive refresh it polls the scheduler for due sections, otherwise it refreshes everything
+        every refresh interval. While webhooks deliver changes it only reconciles, see _poll
+        """
         try:
             if self.auto_refresh_timer is not None:
                 self.auto_refresh_timer.stop()
 
             # Create and start new timer
             self.auto_refresh_timer = QTimer(self)
-            self.auto_refresh_timer.timeout.connect(self.refresh_data)
-            self.auto_refresh_timer.start(refresh_interval.to_millis())
+            if self._is_sharded():
+                # One shard per tick, spread over the refresh interval within the rate limit budget
+                self.shard_planner.refresh_interval_seconds = refresh_interval.to_millis() / 1000
+                self.auto_refresh_timer.timeout.connect(
+                    lambda: self._poll(self._refresh_next_shard)
+                )
+                self.auto_refresh_timer.start(SCHEDULER_TICK_MS)
+            elif self.settings.fetch.adaptive_refresh:
+                self.refresh_scheduler.reset(refresh_interval.to_millis() / 1000)
+                self.auto_refresh_timer.timeout.connect(
+                    lambda: self._poll(self._refresh_due_sections)
+                )
+                self.auto_refresh_timer.start(min(SCHEDULER_TICK_MS, refresh_interval.to_millis()))
+            else:
+                self.auto_refresh_timer.timeout.connect(lambda: self._poll(self.refresh_data))
+                self.auto_refresh_timer.start(refresh_interval.to_millis())
         except Exception as e:
             print(f"Error setting up refresh timer: {e}")
 
@@ -442,11 +901,19 @@ class MainWindow(QMainWindow):
             # Stop refresh timer
             if self.auto_refresh_timer:
                 self.auto_refresh_timer.stop()
+            if self.webhook_receiver:
+                self.webhook_receiver.stop()
 
             # Cancel any ongoing refresh
             if self.is_refreshing:
                 self.cancel_refresh()
 
+            # Stop in-flight requests and give cancelled workers a moment to wind down
+            self.github_prs_client.close()
+            for worker in self.workers:
+                worker.shutdown()
+                worker.wait(WORKER_SHUTDOWN_WAIT_MS)
+
             # Clear workers list
             self.workers.clear()
 
@@ -463,16 +930,16 @@ class MainWindow(QMainWindow):
         """Handle refresh button clicks - either start refresh or cancel it"""
         if self.is_refreshing:
             self.cancel_refresh()
+        elif self._is_sharded():
+            self._refresh_next_shard(due_only=False)
         else:
             self.refresh_data()
 
     def cancel_refresh(self):
         """Cancel the current refresh operation"""
         if self.refresh_worker:
-            # Just set the shutdown flag and let the thread finish naturally
+            # Cancels the client's fetching; the worker stays in workers until it has stopped
             self.refresh_worker.shutdown()
-            if self.refresh_worker in self.workers:
-                self.workers.remove(self.refresh_worker)
             self.refresh_worker = None
         
         self.is_refreshing = False
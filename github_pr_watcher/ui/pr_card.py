@@ -288,15 +288,21 @@ def create_pr_card(pr: PullRequest, settings, parent=None) -> QFrame:
         bottom_layout.addWidget(commit_badge)
 
     # Comment count badge
-    comment_count_badge = create_badge(
-        f"{sum(pr.comment_count_by_author.values())} comments", "#007bff", opacity=0.5
-    )
-    comments_by_author_str = "\n".join(
-        "{}: {}".format(author, comment_count)
-        for author, comment_count in pr.comment_count_by_author.items()
-    )
-    comment_count_badge.setToolTip(f"Comments by author:\n" f"{comments_by_author_str}")
-    bottom_layout.addWidget(comment_count_badge)
+    if pr.comment_count_by_author is None:
+        # Search results only: the details are still being fetched
+        loading_badge = create_badge("loading details…", "#6c757d", opacity=0.3)
+        loading_badge.setToolTip("Files, changes, commits and comments will show up shortly")
+        bottom_layout.addWidget(loading_badge)
+    else:
+        comment_count_badge = create_badge(
+            f"{sum(pr.comment_count_by_author.values())} comments", "#007bff", opacity=0.5
+        )
+        comments_by_author_str = "\n".join(
+            "{}: {}".format(author, comment_count)
+            for author, comment_count in pr.comment_count_by_author.items()
+        )
+        comment_count_badge.setToolTip(f"Comments by author:\n" f"{comments_by_author_str}")
+        bottom_layout.addWidget(comment_count_badge)
 
     # Age badge
     pr_age = datetime.now().astimezone() - pr.created_at
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional, Set
+
+from github_pr_watcher.objects import PullRequest
+from github_pr_watcher.query_planner import has_changes_requested, is_needs_review, PRSection
+from github_pr_watcher.ui.ui_state import SECTION_NAME_BY_PR_SECTION, SectionName, UIState
+
+
+class SectionPlacer:
+    """
+    Moves a single updated PR to the sections it belongs to, using the same rules as the query
+    planner, for changes that arrive without a search (webhooks, the change feed).
+    """
+
+    def __init__(
+            self,
+            ui_state: UIState,
+            users: Callable[[], List[str]],
+            recently_closed_days: Callable[[], int],
+    ):
+        self.ui_state = ui_state
+        self.users = users
+        self.recently_closed_days = recently_closed_days
+
+    def place(self, pr: PullRequest) -> Set[SectionName]:
+        """Put pr in the sections it belongs to and take it out of the others"""
+        author = self.author_key(pr)
+        changed = set()
+        for pr_section, section_name in SECTION_NAME_BY_PR_SECTION.items():
+            if author is not None and self._belongs_to(pr_section, pr):
+                self.ui_state.upsert_pr(section_name, author, pr)
+                changed.add(section_name)
+            elif self.ui_state.drop_pr_ids(section_name, {pr.id}):
+                changed.add(section_name)
+        return changed
+
+    def author_key(self, pr: PullRequest) -> Optional[str]:
+        """The watched user pr is listed under, matching logins case-insensitively"""
+        login = pr.user.login.lower()
+        return next((user for user in self.users() if user.lower() == login), None)
+
+    def _belongs_to(self, pr_section: PRSection, pr: PullRequest) -> bool:
+        if pr_section == PRSection.CLOSED:
+            closed_since = datetime.now(timezone.utc) - timedelta(days=self.recently_closed_days())
+            return pr.state == "closed" and bool(pr.closed_at) and pr.closed_at >= closed_since
+        if pr.state != "open":
+            return False
+        if pr_section == PRSection.NEEDS_REVIEW:
+            return is_needs_review(pr)
+        if pr_section == PRSection.CHANGED_REQUESTED:
+            return has_changes_requested(pr)
+        return True
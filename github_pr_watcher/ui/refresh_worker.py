@@ -1,7 +1,10 @@
-from typing import Dict, List, Tuple
+import traceback
+from datetime import datetime, timezone
+from typing import Dict, List, Set, Tuple
 
 from PyQt6.QtCore import pyqtSignal, QThread
 
+from github_pr_watcher.cancellation import CancellationToken
 from github_pr_watcher.github_prs_client import PRSection
 from github_pr_watcher.objects import PullRequest
 
@@ -10,13 +13,42 @@ class RefreshWorker(QThread):
     finished = pyqtSignal(dict)
     error = pyqtSignal(str)
     progress = pyqtSignal(str)
+    # PR ids currently matched by each section's query, emitted before finished when reconciling
+    reconciled = pyqtSignal(dict)
+    # (section, user, [(pr, partial)]) as soon as a user's PRs for a section are ready; in two-phase
+    # refreshes first with the search results (partial), then again once they are enriched
+    batch_ready = pyqtSignal(object, str, list)
 
-    def __init__(self, github_prs_client, users, settings=None, section=None):
+    def __init__(
+        self,
+        github_prs_client,
+        users,
+        settings=None,
+        section=None,
+        updated_since: datetime | None = None,
+        reconcile: bool = False,
+        two_phase: bool = False,
+        section_priority: List[PRSection] | None = None,
+        sections: List[PRSection] | None = None,
+    ):
         super().__init__()
         self.github_prs_client = github_prs_client
         self.users = users
         self.settings = settings
         self.section = section
+        # Set for delta refreshes: only PRs updated since then are fetched
+        self.updated_since = updated_since
+        self.reconcile = reconcile
+        # Emit search results before their details, see GitHubPRsClient.get_pr_data
+        self.two_phase = two_phase
+        self.section_priority = section_priority
+        # Sections to refresh, all of them by default
+        self.sections = sections or list(PRSection)
+        self.started_at = datetime.now(timezone.utc)
+        # Users whose search failed, whose data this refresh must not count as synced
+        self.failed_users: Set[str] = set()
+        # Cancelled by shutdown, which stops the client's fetching instead of just ignoring it
+        self.cancel_token = CancellationToken()
         self._shutdown = False
 
     def run(self):
@@ -29,9 +61,26 @@ class RefreshWorker(QThread):
             prs_by_author_by_section: Dict[
                 PRSection, Dict[str, List[Tuple[PullRequest, bool]]]
             ] = self.github_prs_client.get_pr_data(
-                self.users, self.section, settings=self.settings
+                self.users,
+                self.section,
+                settings=self.settings,
+                updated_since=self.updated_since,
+                on_batch=self._emit_batch,
+                on_search_batch=self._emit_batch if self.two_phase else None,
+                section_priority=self.section_priority,
+                cancel_token=self.cancel_token,
+                sections=self.sections,
+                failed_users=self.failed_users,
             )
 
+            if self.reconcile and not self._shutdown:
+                self.progress.emit("Reconciling sections")
+                pr_ids_by_section = self.github_prs_client.get_section_pr_ids(
+                    self.users, settings=self.settings, cancel_token=self.cancel_token
+                )
+                if pr_ids_by_section and not self._shutdown:
+                    self.reconciled.emit(pr_ids_by_section)
+
             # Check if cancelled during execution
             if self._shutdown:
                 return
@@ -48,6 +97,13 @@ class RefreshWorker(QThread):
                 error_msg = f"Error refreshing data: {str(e)}"
                 self.error.emit(error_msg)
 
+    def _emit_batch(
+        self, section: PRSection, user: str, prs: List[Tuple[PullRequest, bool]]
+    ):
+        # Called from the client's fetching threads; the signal is queued to the UI thread
+        if not self._shutdown:
+            self.batch_ready.emit(section, user, prs)
+
     def requestInterruption(self):
         """Handle interruption request"""
         self.shutdown()
@@ -55,3 +111,34 @@ class RefreshWorker(QThread):
 
     def shutdown(self):
         self._shutdown = True
+        self.cancel_token.cancel()
+
+
+class ChangeFeedWorker(QThread):
+    # (ChangeSet, [(pr, partial)]) with the PRs the feeds reported, fetched again
+    finished = pyqtSignal(object, list)
+
+    def __init__(self, github_prs_client, users, since: datetime | None = None):
+        super().__init__()
+        self.github_prs_client = github_prs_client
+        self.users = users
+        # When the shown data was fetched, see ChangeFeed.poll
+        self.since = since
+        self.cancel_token = CancellationToken()
+        self._shutdown = False
+
+    def run(self):
+        try:
+            changes = self.github_prs_client.poll_change_feed(self.users, self.since)
+            results = self.github_prs_client.fetch_prs(
+                changes.pr_refs, self.users, cancel_token=self.cancel_token
+            )
+            if not self._shutdown:
+                self.finished.emit(changes, results)
+        except Exception as e:
+            print(f"Error polling change feed: {e}")
+            traceback.print_exc()
+
+    def shutdown(self):
+        self._shutdown = True
+        self.cancel_token.cancel()
@@ -25,6 +25,8 @@ class SectionFrame(QFrame):
         super().__init__(parent)
         self.name: SectionName = name
         self.ui_state: UIState = ui_state
+        # Cards currently shown, so a PR's card can be swapped in place when its details arrive
+        self.cards_by_pr_id = {}
 
         self._setup_ui()
         self._apply_state()
@@ -143,6 +145,29 @@ class SectionFrame(QFrame):
         return self.ui_state.get_section_expanded(self.name)
         pass
 
+    def clear_content(self) -> None:
+        """Remove every card, header and separator from the content area"""
+        while self.content_layout.count():
+            item = self.content_layout.takeAt(0)
+            if widget := item.widget():
+                widget.deleteLater()
+        self.cards_by_pr_id = {}
+
+    def add_pr_card(self, pr: PullRequest, card: QWidget) -> None:
+        self.content_layout.addWidget(card)
+        self.cards_by_pr_id[pr.id] = card
+
+    def replace_pr_card(self, pr: PullRequest, card: QWidget) -> bool:
+        """Swap the card shown for the PR, returning False if the PR isn't shown"""
+        previous = self.cards_by_pr_id.get(pr.id)
+        if previous is None:
+            return False
+
+        self.content_layout.replaceWidget(previous, card)
+        previous.deleteLater()
+        self.cards_by_pr_id[pr.id] = card
+        return True
+
     def add_separator(self, text: str) -> None:
         """Add a styled separator with text"""
 
@@ -174,12 +199,10 @@ class SectionFrame(QFrame):
         if recent_prs:
             self.add_separator("This Week")
             for pr in recent_prs:
-                card = card_creator(pr)
-                self.content_layout.addWidget(card)
+                self.add_pr_card(pr, card_creator(pr))
 
         # Add older PRs
         if older_prs:
             self.add_separator("Older")
             for pr in older_prs:
-                card = card_creator(pr)
-                self.content_layout.addWidget(card)
+                self.add_pr_card(pr, card_creator(pr))
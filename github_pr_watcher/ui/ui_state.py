@@ -1,12 +1,13 @@
 import traceback
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 import json
 
 from github_pr_watcher.objects import PullRequest
+from github_pr_watcher.query_planner import PRSection
 from github_pr_watcher.utils import flatten
 
 
@@ -19,6 +20,14 @@ class SectionName(Enum):
     RECENTLY_CLOSED = "Recently Closed"
 
 
+SECTION_NAME_BY_PR_SECTION = {
+    PRSection.OPEN: SectionName.OPEN_PRS,
+    PRSection.NEEDS_REVIEW: SectionName.NEEDS_REVIEW,
+    PRSection.CHANGED_REQUESTED: SectionName.CHANGES_REQUESTED,
+    PRSection.CLOSED: SectionName.RECENTLY_CLOSED,
+}
+
+
 @dataclass
 class SectionData:
     """Data for a section including PRs and timestamp"""
@@ -57,6 +66,11 @@ class UIState:
     data_by_section: Dict[SectionName, Optional[SectionData]] = field(
         default_factory=lambda: {name: None for name in SectionName}
     )
+    # When the last successful refresh of each section started; delta refreshes fetch what changed
+    # since then
+    synced_at_by_section: Dict[SectionName, datetime] = field(default_factory=dict)
+    # The same per user, kept by sharded refreshes which fetch a few users at a time
+    synced_at_by_user: Dict[str, datetime] = field(default_factory=dict)
 
     def get_section_expanded(self, section_name: SectionName) -> bool:
         """Get expansion state for a section"""
@@ -98,7 +112,7 @@ class UIState:
             for user, prs in prs_by_author.items():
                 for pr, partial in prs:
                     if partial:
-                        existing_pr = next(pr.number == ex.number for ex in existing)
+                        existing_pr = next((ex for ex in existing if ex.number == pr.number), pr)
                         merged.setdefault(user, []).append(existing_pr)
                     else:
                         merged.setdefault(user, []).append(pr)
@@ -111,9 +125,208 @@ class UIState:
         except ValueError:
             pass
 
+    def merge_pr_data(
+        self,
+        section_name: SectionName,
+        prs_by_author: Dict[str, List[Tuple[PullRequest, bool]]],
+        changed_pr_ids: Set[int],
+    ) -> None:
+        """
+        Merge the result of a delta refresh into a section.
+
+        changed_pr_ids holds every PR the delta saw, across all sections: those PRs are dropped from
+        the section before the delta's PRs are added back, so PRs that left the section go away.
+        Partially enriched PRs keep their previous version when there is one.
+        """
+        section_data = self.data_by_section.get(section_name)
+        existing = section_data.prs_by_author if section_data else {}
+        previous_by_id = {pr.id: pr for pr in flatten(list(existing.values()))}
+
+        merged = {
+            user: [pr for pr in prs if pr.id not in changed_pr_ids]
+            for user, prs in existing.items()
+        }
+        for user, prs in prs_by_author.items():
+            for pr, partial in prs:
+                if partial and pr.id in previous_by_id:
+                    pr = previous_by_id[pr.id]
+                merged.setdefault(user, []).append(pr)
+
+        self.data_by_section[section_name] = SectionData(
+            prs_by_author={user: prs for user, prs in merged.items() if prs},
+            timestamp=datetime.now(),
+        )
+
+    def apply_batch(
+        self,
+        section_name: SectionName,
+        user: str,
+        prs: List[Tuple[PullRequest, bool]],
+        replace_user: bool,
+    ) -> None:
+        """
+        Apply one user's streamed results for a section while a refresh is still running.
+
+        With replace_user (full refresh) they become the user's PRs in the section; otherwise
+        (delta refresh) they are upserted by id. Partially enriched PRs keep their previous version.
+        """
+        section_data = self.data_by_section.get(section_name)
+        if section_data is None:
+            section_data = SectionData(prs_by_author={}, timestamp=datetime.now())
+            self.data_by_section[section_name] = section_data
+
+        previous = section_data.prs_by_author.get(user, [])
+        previous_by_id = {pr.id: pr for pr in previous}
+        updated_by_id = {} if replace_user else dict(previous_by_id)
+        for pr, partial in prs:
+            if partial and pr.id in previous_by_id:
+                pr = previous_by_id[pr.id]
+            updated_by_id[pr.id] = pr
+
+        if updated_by_id:
+            section_data.prs_by_author[user] = list(updated_by_id.values())
+        else:
+            section_data.prs_by_author.pop(user, None)
+
+    def replace_users_pr_data(
+        self,
+        section_name: SectionName,
+        users: Iterable[str],
+        prs_by_author: Dict[str, List[Tuple[PullRequest, bool]]],
+    ) -> None:
+        """
+        Replace the PRs of the given users in a section with a full refresh of just those users,
+        keeping the other users' PRs. Partially enriched PRs keep their previous version.
+        """
+        users = set(users)
+        section_data = self.data_by_section.get(section_name)
+        existing = section_data.prs_by_author if section_data else {}
+        previous_by_id = {pr.id: pr for pr in flatten(list(existing.values()))}
+
+        merged = {user: prs for user, prs in existing.items() if user not in users}
+        for user, prs in prs_by_author.items():
+            for pr, partial in prs:
+                if partial and pr.id in previous_by_id:
+                    pr = previous_by_id[pr.id]
+                merged.setdefault(user, []).append(pr)
+
+        self.data_by_section[section_name] = SectionData(
+            prs_by_author={user: prs for user, prs in merged.items() if prs},
+            timestamp=datetime.now(),
+        )
+
+    def find_pr(self, predicate: Callable[[PullRequest], bool]) -> Optional[PullRequest]:
+        """The most recently updated shown PR matching predicate, in any section"""
+        matches = [
+            pr
+            for section_data in self.data_by_section.values()
+            if section_data
+            for pr in flatten(list(section_data.prs_by_author.values()))
+            if predicate(pr)
+        ]
+        return max(matches, key=lambda pr: pr.updated_at) if matches else None
+
+    def upsert_pr(self, section_name: SectionName, user: str, pr: PullRequest) -> None:
+        """Add pr to the user's PRs in a section, replacing the version with the same id"""
+        section_data = self.data_by_section.get(section_name)
+        if section_data is None:
+            section_data = SectionData(prs_by_author={}, timestamp=datetime.now())
+            self.data_by_section[section_name] = section_data
+        user_prs = section_data.prs_by_author.get(user, [])
+        section_data.prs_by_author[user] = [
+            existing for existing in user_prs if existing.id != pr.id
+        ] + [pr]
+
+    def retain_pr_ids(
+        self,
+        section_name: SectionName,
+        pr_ids: Set[int],
+        users: Optional[Iterable[str]] = None,
+    ) -> int:
+        """
+        Drop the section's PRs that are not in pr_ids, returning how many were dropped. With users,
+        only those users' PRs are considered.
+        """
+        section_data = self.data_by_section.get(section_name)
+        if not section_data:
+            return 0
+
+        users = set(users) if users is not None else None
+        dropped = 0
+        retained = {}
+        for user, prs in section_data.prs_by_author.items():
+            if users is not None and user not in users:
+                retained[user] = prs
+                continue
+            kept = [pr for pr in prs if pr.id in pr_ids]
+            dropped += len(prs) - len(kept)
+            if kept:
+                retained[user] = kept
+        section_data.prs_by_author = retained
+        return dropped
+
+    def drop_pr_ids(self, section_name: SectionName, pr_ids: Set[int]) -> int:
+        """Drop the section's PRs that are in pr_ids, returning how many were dropped"""
+        section_data = self.data_by_section.get(section_name)
+        if not section_data:
+            return 0
+        kept_ids = {
+            pr.id for pr in flatten(list(section_data.prs_by_author.values()))
+        } - pr_ids
+        return self.retain_pr_ids(section_name, kept_ids)
+
+    def mark_synced(self, section_names: Iterable[SectionName], started_at: datetime) -> None:
+        for section_name in section_names:
+            self.synced_at_by_section[section_name] = started_at
+
+    def mark_users_synced(self, users: Iterable[str], started_at: datetime) -> None:
+        for user in users:
+            self.synced_at_by_user[user] = started_at
+
+    def user_data_age(self, user: str) -> Optional[timedelta]:
+        """How old the user's data is, or None if the user was never fetched on their own"""
+        synced_at = self.synced_at_by_user.get(user)
+        return datetime.now(synced_at.tzinfo) - synced_at if synced_at else None
+
+    def delta_since(
+        self,
+        section_names: Optional[Iterable[SectionName]] = None,
+        margin: timedelta = timedelta(minutes=2),
+        users: Optional[Iterable[str]] = None,
+        by_user: bool = False,
+    ) -> Optional[datetime]:
+        """
+        Timestamp to fetch changes to the sections (all by default) from, or None if a full refresh
+        is needed because one of them, or one of users, was never fetched (e.g. a user was just
+        added). With by_user (a sharded refresh) the users' own sync points are used instead of the
+        sections'. The margin covers GitHub's search index lagging behind updates.
+        """
+        section_names = list(section_names or SectionName)
+        if any(self.data_by_section.get(section_name) is None for section_name in section_names):
+            return None
+        users = list(users) if users is not None else []
+        if any(user not in self.synced_at_by_user for user in users):
+            return None
+        if by_user:
+            synced_at_by_key = self.synced_at_by_user
+            keys = users
+        else:
+            synced_at_by_key = self.synced_at_by_section
+            keys = section_names
+        if not keys or any(key not in synced_at_by_key for key in keys):
+            return None
+        return min(synced_at_by_key[key] for key in keys) - margin
+
     def to_dict(self) -> dict:
         """Convert state to dictionary for serialization"""
         return {
+            "synced_at_by_section": {
+                section.name: synced_at.isoformat()
+                for section, synced_at in self.synced_at_by_section.items()
+            },
+            "synced_at_by_user": {
+                user: synced_at.isoformat() for user, synced_at in self.synced_at_by_user.items()
+            },
             "is_expanded_by_section": {
                 section.name: expanded
                 for section, expanded in self.is_expanded_by_section.items()
@@ -150,10 +363,30 @@ class UIState:
                 except (KeyError, ValueError):
                     continue
 
+        synced_at_by_section = {}
+        saved_synced_at = data.get("synced_at_by_section", {})
+        if legacy_synced_at := data.get("synced_at"):
+            # Saved before sections were refreshed separately
+            saved_synced_at = {name.name: legacy_synced_at for name in SectionName}
+        for section_name, synced_at in saved_synced_at.items():
+            try:
+                synced_at_by_section[SectionName[section_name]] = datetime.fromisoformat(synced_at)
+            except (KeyError, ValueError):
+                continue
+
+        synced_at_by_user = {}
+        for user, synced_at in data.get("synced_at_by_user", {}).items():
+            try:
+                synced_at_by_user[user] = datetime.fromisoformat(synced_at)
+            except ValueError:
+                continue
+
         return cls(
             state_file=state_file,
             is_expanded_by_section=is_expanded_by_section,
             data_by_section=data_by_section,
+            synced_at_by_section=synced_at_by_section,
+            synced_at_by_user=synced_at_by_user,
         )
 
     @staticmethod
@@ -0,0 +1,150 @@
+from dataclasses import dataclass, field, replace
+from typing import Optional, Set
+
+from github_pr_watcher.objects import PullRequest
+from github_pr_watcher.ui.pr_placement import SectionPlacer
+from github_pr_watcher.ui.ui_state import SectionName
+from github_pr_watcher.utils import parse_datetime
+
+
+@dataclass
+class WebhookUpdate:
+    # Sections whose shown PRs changed
+    sections: Set[SectionName] = field(default_factory=set)
+    # The delivery touched PRs whose details can't be derived from it, e.g. a newly opened PR
+    refresh_needed: bool = False
+
+
+class WebhookUpdater:
+    """
+    Applies GitHub webhook deliveries to the PRs held in UIState as incremental changes.
+
+    pull_request updates a PR's own fields, adding newly opened PRs of watched users;
+    pull_request_review and issue_comment update the review and comment data the sections are
+    derived from; push only asks for a refresh, its PRs' details come with the pull_request
+    synchronize delivery. After each change the PR is moved to the sections it belongs to now.
+    """
+
+    def __init__(self, placer: SectionPlacer):
+        self.placer = placer
+        self.ui_state = placer.ui_state
+
+    def apply(self, event: str, payload: dict) -> WebhookUpdate:
+        handler = {
+            "pull_request": self._apply_pull_request,
+            "pull_request_review": self._apply_review,
+            "issue_comment": self._apply_issue_comment,
+            "push": self._apply_push,
+        }.get(event)
+        return handler(payload) if handler else WebhookUpdate()
+
+    def _apply_pull_request(self, payload: dict) -> WebhookUpdate:
+        incoming = self._parse_pull_request(payload["pull_request"], payload["repository"])
+        existing = self.ui_state.find_pr(lambda pr: pr.id == incoming.id)
+        if existing is None:
+            if self.placer.author_key(incoming) is None:
+                return WebhookUpdate()
+            # New to us: shown right away, its comments and reviews come with the next refresh
+            return WebhookUpdate(self.placer.place(incoming), refresh_needed=True)
+        if incoming.updated_at < existing.updated_at:
+            # Deliveries can arrive out of order, an older one must not undo a newer change
+            return WebhookUpdate()
+
+        pr = replace(
+            existing,
+            title=incoming.title,
+            state=incoming.state,
+            updated_at=incoming.updated_at,
+            closed_at=incoming.closed_at,
+            merged_at=incoming.merged_at,
+            draft=incoming.draft,
+            merged=incoming.merged,
+            merged_by=incoming.merged_by,
+            changed_files=_newer(incoming.changed_files, existing.changed_files),
+            additions=_newer(incoming.additions, existing.additions),
+            deletions=_newer(incoming.deletions, existing.deletions),
+            commit_count=_newer(incoming.commit_count, existing.commit_count),
+        )
+        return WebhookUpdate(self.placer.place(pr))
+
+    def _apply_review(self, payload: dict) -> WebhookUpdate:
+        pr_id = payload["pull_request"]["id"]
+        existing = self.ui_state.find_pr(lambda pr: pr.id == pr_id)
+        if existing is None:
+            return WebhookUpdate()
+
+        review = payload["review"]
+        reviewer = review["user"]["login"]
+        state = "dismissed" if payload.get("action") == "dismissed" else review["state"].lower()
+        approved_by = set(existing.approved_by or [])
+        if state == "approved":
+            approved_by.add(reviewer)
+        submitted_at = parse_datetime(review.get("submitted_at")) or existing.updated_at
+        pr = replace(
+            existing,
+            latest_reviews={**(existing.latest_reviews or {}), reviewer: state},
+            approved_by=list(approved_by),
+            updated_at=max(existing.updated_at, submitted_at),
+        )
+        return WebhookUpdate(self.placer.place(pr), refresh_needed=existing.latest_reviews is None)
+
+    def _apply_issue_comment(self, payload: dict) -> WebhookUpdate:
+        issue = payload["issue"]
+        if "pull_request" not in issue or payload.get("action") not in ("created", "deleted"):
+            return WebhookUpdate()
+
+        repository = payload["repository"]
+        existing = self.ui_state.find_pr(
+            lambda pr: pr.repo_owner == repository["owner"]["login"]
+            and pr.repo_name == repository["name"]
+            and pr.number == issue["number"]
+        )
+        if existing is None:
+            return WebhookUpdate()
+        if existing.comment_count_by_author is None:
+            # Not enriched yet: counting from here would be wrong
+            return WebhookUpdate(refresh_needed=True)
+
+        comment = payload["comment"]
+        author = comment["user"]["login"]
+        is_bot = comment["user"].get("type", "").lower() == "bot"
+        step = 1 if payload["action"] == "created" else -1
+        comment_count_by_author = dict(existing.comment_count_by_author)
+        comment_count_by_author[author] = max(0, comment_count_by_author.get(author, 0) + step)
+        non_bot_comment_count = (existing.non_bot_comment_count or 0) + (0 if is_bot else step)
+        changes = dict(
+            comment_count_by_author=comment_count_by_author,
+            non_bot_comment_count=max(0, non_bot_comment_count),
+        )
+        if step > 0:
+            commented_at = parse_datetime(comment["created_at"])
+            changes.update(
+                last_comment_time=commented_at,
+                last_comment_author=author,
+                updated_at=max(existing.updated_at, commented_at),
+            )
+        return WebhookUpdate(self.placer.place(replace(existing, **changes)))
+
+    def _apply_push(self, payload: dict) -> WebhookUpdate:
+        repository = payload["repository"]
+        shown = self.ui_state.find_pr(
+            lambda pr: pr.repo_owner == repository["owner"]["login"]
+            and pr.repo_name == repository["name"]
+        )
+        return WebhookUpdate(refresh_needed=shown is not None)
+
+    @staticmethod
+    def _parse_pull_request(data: dict, repository: dict) -> PullRequest:
+        return PullRequest.parse_pr({
+            **data,
+            "repo_owner": repository["owner"]["login"],
+            "repo_name": repository["name"],
+            "commit_count": data.get("commits"),
+            "merged_by": (data.get("merged_by") or {}).get("login"),
+            "comment_count_by_author": None,
+            "non_bot_comment_count": None,
+        })
+
+
+def _newer(value: Optional[int], previous: Optional[int]) -> Optional[int]:
+    return value if value is not None else previous
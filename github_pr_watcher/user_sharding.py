@@ -0,0 +1,113 @@
+import math
+import time
+from datetime import datetime
+from typing import Dict, List, Mapping
+
+from github_pr_watcher.rate_limiter import CORE, GRAPHQL
+from github_pr_watcher.token_pool import TokenPool
+
+# Requests a user costs per refresh until a refresh has been measured
+DEFAULT_REQUESTS_PER_USER = {CORE: 10.0, GRAPHQL: 1.0}
+
+
+class UserShardPlanner:
+    """
+    Picks which users a sharded refresh fetches, for teams too large to refresh in one pass.
+
+    Every tick refreshes one shard: the users whose data is the oldest, users never fetched first,
+    so the shards rotate round-robin through the team. Shards are spread over the refresh interval,
+    each user being refreshed once per interval as without sharding, and only users whose data is
+    that old are due. A shard is also capped so that refreshing one per tick until the rate limit
+    window resets spends at most budget_fraction of what is left of the hourly budgets, given what
+    a user cost in previous refreshes.
+    """
+
+    def __init__(
+            self,
+            token_pool: TokenPool,
+            tick_seconds: float,
+            refresh_interval_seconds: float,
+            budget_fraction: float = 0.5,
+            min_shard_size: int = 1,
+            smoothing: float = 0.3,
+    ):
+        self.token_pool = token_pool
+        self.tick_seconds = tick_seconds
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.budget_fraction = budget_fraction
+        self.min_shard_size = min_shard_size
+        # Weight of the latest measurement in the per-user cost estimate
+        self.smoothing = smoothing
+        self.requests_per_user: Dict[str, float] = dict(DEFAULT_REQUESTS_PER_USER)
+
+    def shard_size(self, user_count: int) -> int:
+        ticks_per_interval = max(1.0, self.refresh_interval_seconds / self.tick_seconds)
+        size = math.ceil(user_count / ticks_per_interval)
+        for resource, cost in self.requests_per_user.items():
+            ticks_left = max(1.0, self.token_pool.seconds_until_reset(resource) / self.tick_seconds)
+            budget_per_tick = (
+                self.token_pool.projected_remaining(resource) * self.budget_fraction / ticks_left
+            )
+            size = min(size, int(budget_per_tick / max(cost, 0.1)))
+        return max(min(self.min_shard_size, user_count), size)
+
+    def next_shard(
+            self,
+            users: List[str],
+            synced_at_by_user: Mapping[str, datetime],
+            due_only: bool = True,
+    ) -> List[str]:
+        """
+        The stalest users, in settings order within the same staleness. With due_only (timer
+        ticks) only users due for a refresh are taken, so it may be empty.
+        """
+        order = {user: index for index, user in enumerate(users)}
+        # A tick early, so that a user doesn't wait a whole extra tick past the interval
+        due_before = time.time() - self.refresh_interval_seconds + self.tick_seconds
+        due = [
+            user for user in users
+            if not due_only
+            or user not in synced_at_by_user
+            or synced_at_by_user[user].timestamp() <= due_before
+        ]
+        stalest_first = sorted(
+            due,
+            key=lambda user: (
+                user in synced_at_by_user,
+                synced_at_by_user[user].timestamp() if user in synced_at_by_user else 0.0,
+                order[user],
+            ),
+        )
+        return stalest_first[: self.shard_size(len(users))]
+
+    def budget_snapshot(self) -> Dict[str, int]:
+        """Remaining budgets, to measure what a refresh costs with record_usage"""
+        return {
+            resource: self.token_pool.projected_remaining(resource)
+            for resource in self.requests_per_user
+        }
+
+    def record_usage(self, user_count: int, budget_before: Mapping[str, int]) -> None:
+        """Update the per-user cost estimate from a refresh of user_count users"""
+        if not user_count:
+            return
+        for resource, cost in self.requests_per_user.items():
+            used = budget_before.get(resource, 0) - self.token_pool.projected_remaining(resource)
+            if used < 0:
+                # The window reset during the refresh, nothing to learn from it
+                continue
+            self.requests_per_user[resource] = (
+                (1 - self.smoothing) * cost + self.smoothing * used / user_count
+            )
+
+    def describe(self, users: List[str], synced_at_by_user: Mapping[str, datetime]) -> str:
+        synced = [synced_at_by_user[user] for user in users if user in synced_at_by_user]
+        oldest = (
+            f", oldest data {(time.time() - min(synced).timestamp()) / 60:.0f}m old"
+            if synced
+            else ""
+        )
+        return (
+            f"{self.shard_size(len(users))} of {len(users)} users per shard"
+            f" ({len(synced)} fetched{oldest})"
+        )
@@ -1,10 +1,15 @@
+import asyncio
+import threading
 import time
-from datetime import datetime
+from concurrent.futures import Future
+from datetime import datetime, timezone
 from functools import wraps
-from typing import List, ParamSpec, TypeVar, Callable
+from typing import Awaitable, Dict, Hashable, List, ParamSpec, TypeVar, Callable
 
 import requests
 
+from github_pr_watcher.cancellation import RefreshCancelled, current_token
+
 P = ParamSpec('P')
 T = TypeVar('T')
 
@@ -24,6 +29,11 @@ def parse_datetime(time_str: str) -> datetime | None:
     return datetime.fromisoformat(time_str.replace("Z", "+00:00"))
 
 
+def as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes as UTC so they can be compared with GitHub's timestamps"""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
 def print_time(time_obj):
     return time_obj.strftime("%d-%m-%Y %H:%M:%S")
 
@@ -37,10 +47,11 @@ def with_rate_limit_retry(
         initial_failure_backoff_seconds: float = 1.0,
         max_failure_backoff_seconds: float = 60.0,
         backoff_multiplier: float = 2.0,
+        sleep: Callable[[float], None] = time.sleep,
 ) -> Callable[[Callable[P, T]], Callable[P, T]]:
     """
     Decorator to handle GitHub API rate limiting with exponential backoff.
-    We will use the time specified in the X-RateLimit-Reset header to wait before retrying.
+    We will use the time specified in the Retry-After or X-RateLimit-Reset header to wait before retrying.
     If no time is specified or there's some other non-ratelimit failure, we will use exponential backoff.
 
     Args:
@@ -48,6 +59,7 @@ def with_rate_limit_retry(
         initial_failure_backoff_seconds: Initial backoff time in seconds
         max_failure_backoff_seconds: Maximum backoff time in seconds
         backoff_multiplier: Multiplier for exponential backoff
+        sleep: Used for every wait, e.g. to make them cancellable
     """
 
     def decorator(func: Callable[P, T]) -> Callable[P, T]:
@@ -65,12 +77,20 @@ def with_rate_limit_retry(
                         remaining = int(response.headers.get('X-RateLimit-Remaining', 0))
                         reset_time = int(response.headers.get('X-RateLimit-Reset', 0))
 
+                        # Secondary rate limits tell us how long to back off
+                        retry_after = response.headers.get('Retry-After')
+                        if response.status_code in (403, 429) and retry_after:
+                            wait_time = float(retry_after)
+                            print(f"Secondary rate limit hit. Waiting {wait_time:.1f} seconds...")
+                            sleep(wait_time)
+                            continue
+
                         # If rate limited, wait and retry
-                        if response.status_code == 403 and remaining == 0:
+                        if response.status_code in (403, 429) and remaining == 0:
                             wait_time = max(0.0, reset_time - time.time())
                             if wait_time > 0:
                                 print(f"Rate limited. Waiting {wait_time:.1f} seconds...")
-                                time.sleep(wait_time)
+                                sleep(wait_time)
                                 continue
 
                         response.raise_for_status()
@@ -84,7 +104,7 @@ def with_rate_limit_retry(
                     # Calculate backoff time
                     wait_time = min(backoff, max_failure_backoff_seconds)
                     print(f"Request failed: {e}. Retrying in {wait_time:.1f} seconds...")
-                    time.sleep(wait_time)
+                    sleep(wait_time)
 
                     retries += 1
                     backoff *= backoff_multiplier
@@ -96,3 +116,71 @@ def with_rate_limit_retry(
 
 def ftoi(value: float) -> int:
     return int(round(value, 1))
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls sharing a key into a single execution whose result is shared.
+
+    Callers can belong to different refreshes: when the execution is cancelled with its caller's
+    refresh, the others run it again instead of failing with a cancellation that isn't theirs.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                is_leader = future is None
+                if is_leader:
+                    future = Future()
+                    self._calls[key] = future
+                    self.executed += 1
+                else:
+                    self.coalesced += 1
+
+            if is_leader:
+                break
+            try:
+                return future.result()
+            except RefreshCancelled:
+                token = current_token.get()
+                if token is not None and token.cancelled:
+                    raise
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines running on one event loop"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self.executed += 1
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shielded so that one cancelled caller doesn't cancel the call for the others
+        return await asyncio.shield(task)
@@ -0,0 +1,155 @@
+import hashlib
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib import request
+
+# Events applied to the shown PRs; anything else is acknowledged and ignored
+SUPPORTED_EVENTS = {"pull_request", "pull_request_review", "issue_comment", "push"}
+SIGNATURE_HEADER = "X-Hub-Signature-256"
+EVENT_HEADER = "X-GitHub-Event"
+# GitHub caps payloads at 25MB
+MAX_PAYLOAD_BYTES = 25 * 1024 * 1024
+DEFAULT_SECRET_ENV_VAR = "GITHUB_PR_WATCHER_WEBHOOK_SECRET"
+
+
+def sign(secret: str, body: bytes) -> str:
+    """The X-Hub-Signature-256 value GitHub sends for body"""
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    return bool(signature) and hmac.compare_digest(sign(secret, body), signature)
+
+
+class WebhookReceiver:
+    """
+    Embedded HTTP listener for GitHub webhook deliveries.
+
+    Every POST must carry a valid X-Hub-Signature-256 for secret. Supported events are handed to
+    on_event(event, payload) on the listener's threads, so the callback has to hand them over to
+    whoever owns the state. Pointing GitHub at it needs the port to be reachable, e.g. through a
+    tunnel; recorded payloads can be replayed with `python -m github_pr_watcher.webhooks`.
+    """
+
+    def __init__(
+            self,
+            secret: str,
+            on_event: Callable[[str, dict], None],
+            host: str = "127.0.0.1",
+            port: int = 8765,
+    ):
+        if not secret:
+            raise ValueError("A webhook secret is required to validate deliveries")
+        self.secret = secret
+        self.on_event = on_event
+        self.host = host
+        self.port = port
+        self.last_event_at: Optional[float] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        host, port = self._server.server_address[:2] if self._server else (self.host, self.port)
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        handler = type("WebhookHandler", (_WebhookHandler,), {"receiver": self})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="webhook-receiver", daemon=True
+        )
+        self._thread.start()
+        print(f"Listening for GitHub webhooks on {self.address}")
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+
+    def received_within(self, seconds: float) -> bool:
+        """Whether deliveries are coming in, i.e. polling can slow down"""
+        return self.last_event_at is not None and time.time() - self.last_event_at <= seconds
+
+    def _deliver(self, event: str, payload: dict) -> None:
+        self.last_event_at = time.time()
+        if event not in SUPPORTED_EVENTS:
+            return
+        try:
+            self.on_event(event, payload)
+        except Exception as e:
+            print(f"Error handling {event} webhook: {e}")
+            traceback.print_exc()
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    receiver: WebhookReceiver
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_PAYLOAD_BYTES:
+            return self._reply(413, "Payload too large")
+        body = self.rfile.read(length)
+
+        if not verify_signature(self.receiver.secret, body, self.headers.get(SIGNATURE_HEADER)):
+            return self._reply(401, "Invalid signature")
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return self._reply(400, "Invalid JSON")
+
+        self.receiver._deliver(self.headers.get(EVENT_HEADER, ""), payload)
+        self._reply(202, "Accepted")
+
+    def _reply(self, status: int, message: str) -> None:
+        body = message.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def replay(url: str, event: str, body: bytes, secret: str) -> int:
+    """POST a recorded payload the way GitHub would deliver it, returning the status code"""
+    replay_request = request.Request(
+        url,
+        data=body,
+        method="POST",
+        headers={
+            "Content-Type": "application/json",
+            EVENT_HEADER: event,
+            SIGNATURE_HEADER: sign(secret, body),
+        },
+    )
+    try:
+        with request.urlopen(replay_request) as response:
+            return response.status
+    except request.HTTPError as e:
+        return e.code
+
+
+if __name__ == "__main__":
+    # Signed with the secret in GITHUB_PR_WATCHER_WEBHOOK_SECRET, like the receiver expects
+    if len(sys.argv) != 4 or not os.environ.get(DEFAULT_SECRET_ENV_VAR):
+        print(
+            f"Usage: {DEFAULT_SECRET_ENV_VAR}=... "
+            "python -m github_pr_watcher.webhooks <url> <event> <payload.json>"
+        )
+        sys.exit(2)
+    replay_url, replay_event, payload_path = sys.argv[1:]
+    with open(payload_path, "rb") as f:
+        print(replay(replay_url, replay_event, f.read(), os.environ[DEFAULT_SECRET_ENV_VAR]))
@@ -0,0 +1,22 @@
+import pytest
+
+from github_pr_watcher.cache import RepoMetadataCache
+from tests.fake_github import FakeGitHub
+
+
+@pytest.fixture
+def repo_cache(tmp_path):
+    return RepoMetadataCache(cache_file=tmp_path / "repo_cache.json")
+
+
+@pytest.fixture
+def fake_github():
+    servers = []
+
+    def start(prs, delay: float = 0.0) -> FakeGitHub:
+        servers.append(FakeGitHub(prs, delay))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
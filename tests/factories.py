@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta, timezone
+
+from github_pr_watcher.objects import PullRequest, User
+
+NOW = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def make_user(login: str) -> User:
+    return User(
+        login=login,
+        id=abs(hash(login)) % 10_000,
+        type="User",
+        site_admin=False,
+        avatar_url="",
+        url=f"https://api.github.com/users/{login}",
+    )
+
+
+def make_pr(
+        pr_id: int,
+        author: str = "alice",
+        updated_at: datetime = NOW,
+        state: str = "open",
+        repo: str = "org/repo",
+        **kwargs,
+) -> PullRequest:
+    owner, name = repo.split("/")
+    return PullRequest(
+        id=pr_id,
+        number=pr_id,
+        title=f"PR {pr_id}",
+        state=state,
+        created_at=updated_at - timedelta(days=1),
+        updated_at=updated_at,
+        closed_at=updated_at if state == "closed" else None,
+        merged_at=None,
+        draft=False,
+        user=make_user(author),
+        html_url=f"https://github.com/{repo}/pull/{pr_id}",
+        repo_owner=owner,
+        repo_name=name,
+        **kwargs,
+    )
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Set
+from urllib.parse import parse_qs, urlparse
+
+from github_pr_watcher.objects import PullRequest
+
+
+class FakeGitHub:
+    """
+    Local stand-in for the REST endpoints a refresh uses: search, repos, PR details, commits,
+    comments and reviews. Searches return the PRs whose author is in the query's author: qualifiers,
+    and answer without any results if one of them is in failing_authors (error statuses are
+    retried with backoff). Issue comments are listed from comments_by_number. Responses carry an
+    ETag and a request sending it back as If-None-Match is answered with a 304.
+    """
+
+    def __init__(self, prs: List[PullRequest], delay: float = 0.0):
+        self.prs = prs
+        self.delay = delay
+        self.failing_authors: Set[str] = set()
+        self.comments_by_number: Dict[int, List[dict]] = {}
+        self.requests: Counter = Counter()
+        self.not_modified: Counter = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        handler = type("FakeGitHubHandler", (_Handler,), {"github": self})
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _repo_url(self, pr: PullRequest) -> str:
+        return f"{self.url}/repos/{pr.repo_owner}/{pr.repo_name}"
+
+    def respond(self, path: str, query: Dict[str, List[str]]):
+        if path == "/search/issues":
+            authors = {login.lower() for login in re.findall(r"author:(\S+)", query["q"][0])}
+            if authors & self.failing_authors:
+                return {"message": "Something went wrong"}
+            items = [
+                {**pr.to_dict(), "repository_url": self._repo_url(pr)}
+                for pr in self.prs
+                if pr.user.login.lower() in authors
+            ]
+            return {"total_count": len(items), "items": items}
+        if re.fullmatch(r"/repos/[^/]+/[^/]+", path):
+            return {"archived": False}
+        if re.fullmatch(r"/repos/[^/]+/[^/]+/pulls/\d+", path):
+            return {"changed_files": 1, "additions": 2, "deletions": 3, "commits": 1}
+        if match := re.fullmatch(r"/repos/[^/]+/[^/]+/issues/(\d+)/comments", path):
+            return self.comments_by_number.get(int(match.group(1)), [])
+        if re.search(r"/(commits|comments|reviews)$", path):
+            return []
+        return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    github: FakeGitHub
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        github = self.github
+        with github._lock:
+            github.requests[parsed.path] += 1
+            github.in_flight += 1
+            github.max_in_flight = max(github.max_in_flight, github.in_flight)
+        try:
+            time.sleep(github.delay)
+            data = github.respond(parsed.path, parse_qs(parsed.query))
+        finally:
+            with github._lock:
+                github.in_flight -= 1
+        body = json.dumps(data if data is not None else {"message": "Not Found"}).encode()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if data is not None and self.headers.get("If-None-Match") == etag:
+            with github._lock:
+                github.not_modified[parsed.path] += 1
+            status, body = 304, b""
+        else:
+            status = 200 if data is not None else 404
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("X-RateLimit-Remaining", "4999")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
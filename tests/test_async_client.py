@@ -0,0 +1,41 @@
+import sys
+import threading
+
+from github_pr_watcher.async_client import AsyncGitHubPRsClient
+from github_pr_watcher.github_prs_client import GitHubPRsClient
+from github_pr_watcher.main import create_github_prs_client
+from github_pr_watcher.query_planner import PRSection
+from github_pr_watcher.settings import Settings
+from tests.factories import make_pr
+
+
+def test_overlapping_refreshes_keep_their_own_state(fake_github, repo_cache):
+    prs = [make_pr(pr_id, author=author) for pr_id, author in [(1, "alice"), (2, "bob")]]
+    github = fake_github(prs, delay=0.05)
+    client = AsyncGitHubPRsClient("token", repo_cache=repo_cache)
+    client.base_url = github.url
+    results = {}
+
+    def refresh(user: str) -> None:
+        results[user] = client.get_pr_data([user], section=PRSection.OPEN)
+
+    threads = [threading.Thread(target=refresh, args=(user,)) for user in ("alice", "bob")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    for user, pr_id in [("alice", 1), ("bob", 2)]:
+        [(pr, partial)] = results[user][PRSection.OPEN][user]
+        assert (pr.id, partial, pr.additions) == (pr_id, False, 2)
+
+
+def test_missing_aiohttp_falls_back_to_the_threads_engine(monkeypatch, capsys):
+    monkeypatch.setitem(sys.modules, "aiohttp", None)
+    settings = Settings()
+    settings.fetch.engine = "asyncio"
+
+    client = create_github_prs_client([("default", "token")], settings)
+
+    assert type(client) is GitHubPRsClient
+    assert "install the 'asyncio' extra" in capsys.readouterr().out
@@ -0,0 +1,89 @@
+import json
+import os
+import socket
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from github_pr_watcher.cache_server import SharedCacheDaemon, SharedCacheServer
+from github_pr_watcher.github_prs_client import GitHubPRsClient
+from github_pr_watcher.query_planner import PRSection
+from github_pr_watcher.settings import Settings, SharedCacheSettings
+from github_pr_watcher.shared_cache import DISCOVERY_PROBE, SharedCache, discover
+from github_pr_watcher.ui.ui_state import SectionName, UIState
+from tests.factories import make_pr
+
+SECRET = "team-secret"
+
+
+@pytest.fixture
+def server():
+    settings = SharedCacheSettings(host="127.0.0.1", port=0, discovery_port=0)
+    daemon = SharedCacheDaemon(
+        GitHubPRsClient("token"), UIState(state_file=Path(os.devnull)), Settings(users=["alice"])
+    )
+    daemon.ui_state.replace_users_pr_data(
+        SectionName.OPEN_PRS, ["alice"], {"alice": [(make_pr(1), False)]}
+    )
+    daemon.ui_state.mark_users_synced(["alice"], datetime.now(timezone.utc))
+    server = SharedCacheServer(daemon, settings, SECRET)
+    server.start()
+    yield server
+    server.stop()
+
+
+def _discovery_port(server: SharedCacheServer) -> int:
+    return server._discovery_socket.getsockname()[1]
+
+
+def _client(server: SharedCacheServer, secret: str, url: str = "") -> SharedCache:
+    settings = SharedCacheSettings(url=url, discovery_port=_discovery_port(server))
+    shared_cache = SharedCache(settings, client_id="test")
+    shared_cache.secret = secret
+    return shared_cache
+
+
+def test_discover_accepts_a_server_proving_the_secret(server):
+    assert discover(_discovery_port(server), SECRET) == server.address
+
+
+def test_discover_ignores_a_server_not_knowing_the_secret(server):
+    assert discover(_discovery_port(server), "another-secret") is None
+
+
+def test_discover_ignores_unauthenticated_answers_when_a_secret_is_set():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as impostor:
+        impostor.bind(("127.0.0.1", 0))
+
+        def answer():
+            probe, sender = impostor.recvfrom(1024)
+            assert probe.startswith(DISCOVERY_PROBE)
+            impostor.sendto(json.dumps({"port": 1234}).encode(), sender)
+
+        threading.Thread(target=answer, daemon=True).start()
+        assert discover(impostor.getsockname()[1], SECRET) is None
+
+
+def test_snapshot_serves_and_subscribes(server):
+    prs_by_user_by_section, stale_users = _client(server, SECRET).snapshot(["Alice", "bob"])
+
+    assert stale_users == ["bob"]
+    assert [pr.id for pr in prs_by_user_by_section[PRSection.OPEN]["Alice"]] == [1]
+    assert [sub.users for sub in server.daemon.live_subscriptions()] == [["Alice", "bob"]]
+    # Alice and alice are fetched once
+    assert server.daemon.watched_users() == ["alice", "bob"]
+
+
+def test_snapshot_with_a_wrong_secret_falls_back_to_github(server):
+    shared_cache = _client(server, "wrong", url=server.address)
+
+    assert shared_cache.snapshot(["alice"]) == ({}, ["alice"])
+    assert server.daemon.live_subscriptions() == []
+
+
+def test_server_refuses_lan_without_a_secret(server):
+    settings = SharedCacheSettings(host="0.0.0.0")
+    with pytest.raises(ValueError):
+        SharedCacheServer(server.daemon, settings, None)
@@ -0,0 +1,60 @@
+import threading
+import time
+
+import pytest
+
+from github_pr_watcher.cancellation import (
+    CancellationToken,
+    RefreshCancelled,
+    cancellable_sleep,
+    current_token,
+)
+
+
+def test_callbacks_run_once_on_cancel_or_right_away_once_cancelled():
+    token = CancellationToken()
+    calls = []
+    token.on_cancel(lambda: calls.append("registered"))
+
+    token.cancel()
+    token.cancel()
+    token.on_cancel(lambda: calls.append("late"))
+
+    assert calls == ["registered", "late"]
+
+
+def test_a_failing_callback_does_not_stop_the_others():
+    token = CancellationToken()
+    calls = []
+
+    def fail():
+        raise ValueError("boom")
+
+    token.on_cancel(fail)
+    token.on_cancel(lambda: calls.append("ran"))
+    token.cancel()
+
+    assert calls == ["ran"]
+
+
+def test_cancel_wakes_up_a_sleep():
+    token = CancellationToken()
+    threading.Timer(0.05, token.cancel).start()
+
+    started_at = time.monotonic()
+    with pytest.raises(RefreshCancelled):
+        token.sleep(5)
+    assert time.monotonic() - started_at < 2
+
+
+def test_cancellable_sleep_uses_the_current_token():
+    token = CancellationToken()
+    token.cancel()
+
+    reset = current_token.set(token)
+    try:
+        with pytest.raises(RefreshCancelled):
+            cancellable_sleep(5)
+    finally:
+        current_token.reset(reset)
+    cancellable_sleep(0)
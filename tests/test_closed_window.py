@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from github_pr_watcher.closed_window import ClosedPRWindow
+from github_pr_watcher.enrichment_registry import EnrichmentRegistry
+from github_pr_watcher.github_prs_client import GitHubPRsClient
+from tests.factories import make_pr
+
+
+@pytest.fixture
+def window(tmp_path):
+    return ClosedPRWindow(window_file=tmp_path / "closed_window.json")
+
+
+def _closed_pr(pr_id: int, days_ago: float = 1, author: str = "alice"):
+    return make_pr(
+        pr_id,
+        author=author,
+        state="closed",
+        updated_at=datetime.now(timezone.utc) - timedelta(days=days_ago),
+    )
+
+
+def _pull(window: ClosedPRWindow, prs_by_user, failed_users=()):
+    fetch = window.plan_fetch(list(prs_by_user), 7)
+    results = {user: [(pr, False) for pr in prs] for user, prs in prs_by_user.items()}
+    full = {user: prs for user, prs in results.items() if user in fetch.full_users}
+    incremental = {user: prs for user, prs in results.items() if user in fetch.incremental_users}
+    return fetch, window.apply(fetch, full, incremental, failed_users)
+
+
+def test_first_fetch_pulls_then_fetches_incrementally(window):
+    fetch, result = _pull(window, {"alice": [_closed_pr(1)]})
+    assert fetch.full_users == ["alice"]
+    assert [pr.id for pr, _ in result["alice"]] == [1]
+
+    fetch, result = _pull(window, {"alice": [_closed_pr(2)]})
+    assert fetch.incremental_users == ["alice"]
+    assert fetch.incremental_since is not None
+    assert sorted(pr.id for pr, _ in result["alice"]) == [1, 2]
+
+
+def test_narrowing_the_window_evicts_older_prs(window):
+    _pull(window, {"alice": [_closed_pr(1), _closed_pr(2, days_ago=5)]})
+
+    fetch = window.plan_fetch(["alice"], 3)
+    result = window.apply(fetch, {}, {})
+
+    assert fetch.incremental_users == ["alice"]
+    assert [pr.id for pr, _ in result["alice"]] == [1]
+
+
+def test_failed_full_pull_keeps_the_previous_window(window):
+    window.full_pull_interval = timedelta(0)
+    _pull(window, {"alice": [_closed_pr(1)]})
+    pulled_at = window._windows["alice"].pulled_at
+
+    fetch, result = _pull(window, {"alice": []}, failed_users={"alice"})
+
+    assert fetch.full_users == ["alice"]
+    assert [pr.id for pr, _ in result["alice"]] == [1]
+    assert window._windows["alice"].pulled_at == pulled_at
+
+
+def test_failed_full_pull_of_a_new_user_stores_nothing(window):
+    _, result = _pull(window, {"alice": []}, failed_users={"alice"})
+
+    assert result == {}
+    assert window.plan_fetch(["alice"], 7).full_users == ["alice"]
+
+
+def test_failed_incremental_fetch_keeps_its_starting_point(window):
+    _pull(window, {"alice": [_closed_pr(1)], "bob": [_closed_pr(2, author="bob")]})
+    fetched_at = window._windows["alice"].fetched_at
+
+    _pull(window, {"alice": [], "bob": []}, failed_users={"Alice"})
+
+    assert window._windows["alice"].fetched_at == fetched_at
+    assert window._windows["bob"].fetched_at > fetched_at
+    assert window.plan_fetch(["alice"], 7).incremental_since < fetched_at
+
+
+def test_client_keeps_the_window_of_users_whose_search_failed(window, monkeypatch):
+    _pull(window, {"alice": [_closed_pr(1)]})
+    fetched_at = window._windows["alice"].fetched_at
+    client = GitHubPRsClient("token", closed_window=window)
+
+    def failing_request(*args, **kwargs):
+        raise ConnectionError("GitHub unreachable")
+
+    monkeypatch.setattr(client, "_make_request", failing_request)
+
+    result = client._fetch_closed_window(["alice"], 7, EnrichmentRegistry())
+
+    assert [pr.id for pr, _ in result["alice"]] == [1]
+    assert window._windows["alice"].fetched_at == fetched_at
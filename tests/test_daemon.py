@@ -0,0 +1,107 @@
+import pytest
+
+from github_pr_watcher.daemon import DaemonServer, PRWatcherDaemon
+from github_pr_watcher.daemon_client import DaemonConnection, RemotePRsClient
+from github_pr_watcher.github_prs_client import GitHubPRsClient
+from github_pr_watcher.query_planner import PRSection
+from github_pr_watcher.settings import DaemonSettings, Settings
+from github_pr_watcher.ui.ui_state import SectionName, UIState
+from tests.factories import make_pr
+
+
+@pytest.fixture
+def daemon(fake_github, repo_cache, tmp_path):
+    github = fake_github([make_pr(1), make_pr(2, "bob")])
+    client = GitHubPRsClient("token", repo_cache=repo_cache)
+    client.base_url = github.url
+    daemon = PRWatcherDaemon(
+        client, UIState(state_file=tmp_path / "daemon_state.json"), Settings(users=["alice"])
+    )
+    yield daemon
+    daemon.stop()
+
+
+@pytest.fixture(params=["tcp", "unix"])
+def daemon_settings(request, tmp_path) -> DaemonSettings:
+    if request.param == "unix":
+        return DaemonSettings(socket_path=str(tmp_path / "daemon.sock"))
+    return DaemonSettings(socket_path="", port=0)
+
+
+@pytest.fixture
+def connection(daemon, daemon_settings):
+    server = DaemonServer(daemon, daemon_settings)
+    server.start()
+    if not daemon_settings.socket_path:
+        host, port = server._server.server_address[:2]
+        daemon_settings = DaemonSettings(socket_path="", host=host, port=port)
+    yield DaemonConnection(daemon_settings)
+    server.stop()
+
+
+def test_refresh_fetches_the_watched_users_into_the_state(daemon):
+    assert daemon.refresh()
+
+    prs_by_author, _ = daemon.ui_state.get_pr_data(SectionName.OPEN_PRS)
+    assert [pr.id for pr in prs_by_author["alice"]] == [1]
+    assert "bob" not in prs_by_author
+    assert "alice" in daemon.ui_state.synced_at_by_user
+    assert daemon.last_error is None
+
+
+def test_state_is_served_in_the_state_file_format(daemon, connection):
+    daemon.refresh()
+
+    state = UIState.from_dict(connection.get("/state"), daemon.ui_state.state_file)
+
+    prs_by_author, _ = state.get_pr_data(SectionName.OPEN_PRS)
+    assert [pr.id for pr in prs_by_author["alice"]] == [1]
+
+
+def test_status_reports_the_refresh_and_the_budgets(daemon, connection):
+    daemon.refresh()
+
+    status = connection.get("/status")
+
+    assert status["users"] == ["alice"]
+    assert status["refreshing"] is False
+    assert status["last_refresh_at"] is not None
+    assert status["rate_limits"]
+
+
+def test_refresh_requests_wake_the_daemon_up(daemon, connection):
+    connection.request_refresh()
+
+    assert daemon._wake.is_set()
+
+
+def test_unknown_paths_are_not_found(connection):
+    with pytest.raises(ConnectionError, match="404"):
+        connection.get("/nope")
+
+
+def test_thin_client_shows_the_daemons_prs(daemon, connection):
+    daemon.refresh()
+    client = RemotePRsClient(connection)
+
+    result = client.get_pr_data(["alice"], updated_since=daemon.last_refresh_at)
+
+    assert [pr.id for pr, _ in result[PRSection.OPEN]["alice"]] == [1]
+
+
+def test_a_failed_delta_keeps_the_sync_point(daemon, fake_github):
+    daemon.settings.fetch.delta_refresh = True
+    assert daemon.refresh()
+    synced_at = daemon.ui_state.synced_at_by_user["alice"]
+    delta_since = daemon.ui_state.delta_since(users=["alice"], by_user=True)
+    github = fake_github([])
+    github.failing_authors = {"alice"}
+    daemon.github_prs_client.base_url = github.url
+
+    assert not daemon.refresh()
+
+    assert daemon.ui_state.synced_at_by_user["alice"] == synced_at
+    assert daemon.ui_state.delta_since(users=["alice"], by_user=True) == delta_since
+    assert "alice" in daemon.last_error
+    prs_by_author, _ = daemon.ui_state.get_pr_data(SectionName.OPEN_PRS)
+    assert [pr.id for pr in prs_by_author["alice"]] == [1]
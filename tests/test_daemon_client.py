@@ -0,0 +1,88 @@
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from github_pr_watcher.daemon_client import RemotePRsClient
+from github_pr_watcher.query_planner import PRSection
+from github_pr_watcher.ui.ui_state import SECTION_NAME_BY_PR_SECTION, SectionName, UIState
+from tests.factories import NOW, make_pr
+
+
+class FakeConnection:
+    def __init__(self, state: UIState):
+        self.state = state
+        self.refresh_requests = 0
+
+    def get(self, path: str) -> dict:
+        assert path == "/state"
+        return self.state.to_dict()
+
+    def request_refresh(self) -> None:
+        self.refresh_requests += 1
+
+
+def _daemon_state(prs_by_author_by_section) -> UIState:
+    state = UIState(state_file=Path(os.devnull))
+    for section_name, prs_by_author in prs_by_author_by_section.items():
+        state.replace_users_pr_data(
+            section_name,
+            prs_by_author.keys(),
+            {user: [(pr, False) for pr in prs] for user, prs in prs_by_author.items()},
+        )
+    return state
+
+
+def test_delta_returns_prs_updated_before_the_apps_sync_point():
+    # Updated before the app's cursor, but only fetched by the daemon afterwards
+    late_pr = make_pr(1, updated_at=NOW - timedelta(hours=1))
+    connection = FakeConnection(_daemon_state({SectionName.OPEN_PRS: {"alice": [late_pr]}}))
+    client = RemotePRsClient(connection)
+
+    result = client.get_pr_data(["alice"], updated_since=NOW)
+
+    assert [pr.id for pr, _ in result[PRSection.OPEN]["alice"]] == [1]
+    assert connection.refresh_requests == 0
+
+
+def test_full_refresh_asks_the_daemon_to_refresh():
+    connection = FakeConnection(_daemon_state({}))
+    client = RemotePRsClient(connection)
+
+    result = client.get_pr_data(["alice"])
+
+    assert connection.refresh_requests == 1
+    assert all(result[pr_section] == {"alice": []} for pr_section in PRSection)
+
+
+def test_delta_merge_of_daemon_data_keeps_every_pr():
+    app_state = _daemon_state({SectionName.OPEN_PRS: {"alice": [make_pr(1), make_pr(2)]}})
+    daemon_state = _daemon_state({
+        SectionName.OPEN_PRS: {"alice": [make_pr(1)]},
+        SectionName.NEEDS_REVIEW: {"alice": [make_pr(2, updated_at=NOW - timedelta(hours=1))]},
+    })
+    client = RemotePRsClient(FakeConnection(daemon_state))
+
+    result = client.get_pr_data(["alice"], updated_since=NOW)
+    changed_pr_ids = {
+        pr.id
+        for prs_by_author in result.values()
+        for prs in prs_by_author.values()
+        for pr, _ in prs
+    }
+    for pr_section, prs_by_author in result.items():
+        section_name = SECTION_NAME_BY_PR_SECTION[pr_section]
+        app_state.merge_pr_data(section_name, prs_by_author, changed_pr_ids)
+
+    assert [pr.id for pr in app_state.get_pr_data(SectionName.OPEN_PRS)[0]["alice"]] == [1]
+    assert [pr.id for pr in app_state.get_pr_data(SectionName.NEEDS_REVIEW)[0]["alice"]] == [2]
+
+
+def test_section_pr_ids_skip_sections_the_daemon_never_fetched():
+    daemon_state = _daemon_state(
+        {SectionName.OPEN_PRS: {"alice": [make_pr(1)], "bob": [make_pr(2)]}}
+    )
+    client = RemotePRsClient(FakeConnection(daemon_state))
+
+    pr_ids_by_section = client.get_section_pr_ids(["alice"])
+
+    assert pr_ids_by_section == {PRSection.OPEN: {1}}
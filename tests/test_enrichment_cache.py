@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+
+from github_pr_watcher.cache import EnrichmentCache
+from tests.factories import NOW, make_pr
+
+
+def _cache(tmp_path, **kwargs) -> EnrichmentCache:
+    return EnrichmentCache(cache_file=tmp_path / "enrichment_cache.json", **kwargs)
+
+
+def test_hit_while_updated_at_is_unchanged(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put(make_pr(1, comment_count_by_author={"bob": 2}))
+
+    cached = cache.get(make_pr(1))
+
+    assert cached.comment_count_by_author == {"bob": 2}
+    assert cache.stats.hits == 1
+
+
+def test_miss_once_the_pr_was_updated(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put(make_pr(1))
+
+    assert cache.get(make_pr(1, updated_at=NOW + timedelta(minutes=1))) is None
+    assert cache.stats.misses == 1
+
+
+def test_open_prs_are_evicted_before_closed_ones(tmp_path):
+    cache = _cache(tmp_path, max_entries=2)
+    cache.put(make_pr(1, state="closed"))
+    cache.put(make_pr(2))
+    cache.put(make_pr(3))
+
+    assert cache.get(make_pr(1, state="closed")) is not None
+    assert cache.get(make_pr(2)) is None
+    assert cache.get(make_pr(3)) is not None
+
+
+def test_prune_drops_closed_prs_older_than_the_window(tmp_path):
+    now = datetime.now(timezone.utc)
+    cache = _cache(tmp_path)
+    cache.put(make_pr(1, state="closed", updated_at=now - timedelta(days=8)))
+    cache.put(make_pr(2, state="closed", updated_at=now - timedelta(days=6)))
+    cache.put(make_pr(3, updated_at=now - timedelta(days=8)))
+
+    assert cache.prune(recently_closed_days=7) == 1
+    assert len(cache) == 2
+
+
+def test_entries_survive_a_restart(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put(make_pr(1))
+    cache.save()
+
+    assert _cache(tmp_path).get(make_pr(1)) is not None
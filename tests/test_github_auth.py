@@ -0,0 +1,8 @@
+from github_pr_watcher.github_auth import REQUIRED_SCOPES, required_scopes
+
+
+def test_notifications_scope_is_only_required_for_the_notifications_feed():
+    assert "notifications" not in REQUIRED_SCOPES
+    assert required_scopes([]) == REQUIRED_SCOPES
+    assert required_scopes(["user_events"]) == REQUIRED_SCOPES
+    assert required_scopes(["notifications", "user_events"]) == REQUIRED_SCOPES + ["notifications"]
@@ -0,0 +1,100 @@
+from github_pr_watcher.github_prs_client import EnrichmentBackend, GitHubPRsClient
+from github_pr_watcher.query_planner import PRSection
+from tests.factories import make_pr
+
+
+def _client(github, repo_cache, **kwargs) -> GitHubPRsClient:
+    client = GitHubPRsClient("token", repo_cache=repo_cache, **kwargs)
+    client.base_url = github.url
+    return client
+
+
+def test_rest_enrichment_sends_one_request_per_worker_at_a_time(fake_github, repo_cache):
+    github = fake_github([make_pr(pr_id) for pr_id in range(1, 7)], delay=0.02)
+    client = _client(github, repo_cache, search_workers=1, enrich_workers=2)
+
+    result = client.get_pr_data(["alice"], section=PRSection.OPEN)
+
+    prs = result[PRSection.OPEN]["alice"]
+    assert sorted(pr.id for pr, _ in prs) == [1, 2, 3, 4, 5, 6]
+    assert not any(partial for _, partial in prs)
+    assert github.max_in_flight <= 3
+    assert github.requests["/repos/org/repo/pulls/1/reviews"] == 1
+
+
+def test_section_pr_ids_come_from_the_searches(fake_github, repo_cache):
+    github = fake_github([make_pr(1), make_pr(2, "bob"), make_pr(3, state="closed")])
+    client = _client(github, repo_cache)
+
+    pr_ids_by_section = client.get_section_pr_ids(["alice", "bob"])
+
+    assert pr_ids_by_section[PRSection.OPEN] >= {1, 2}
+    assert github.requests["/repos/org/repo/pulls/1"] == 0
+
+
+def test_sections_whose_search_failed_are_not_reconciled(fake_github, repo_cache):
+    github = fake_github([make_pr(1), make_pr(2, "bob")])
+    github.failing_authors = {"bob"}
+    client = _client(github, repo_cache)
+
+    # An incomplete id set would drop the PRs of the users whose search failed
+    assert client.get_section_pr_ids(["alice", "bob"]) == {}
+
+
+def test_users_whose_search_failed_are_reported(fake_github, repo_cache):
+    github = fake_github([make_pr(1), make_pr(2, "bob")])
+    github.failing_authors = {"bob"}
+    client = _client(github, repo_cache)
+    failed_users = set()
+
+    client.get_pr_data(["bob"], section=PRSection.OPEN, failed_users=failed_users)
+
+    assert failed_users == {"bob"}
+
+
+def _graphql_pr(comment_nodes, comment_total, review_nodes=()) -> dict:
+    return {
+        "isArchived": False,
+        "pullRequest": {
+            "changedFiles": 1, "additions": 2, "deletions": 3, "merged": False,
+            "mergedAt": None, "mergedBy": None, "commits": {"totalCount": 1},
+            "comments": {
+                "totalCount": comment_total,
+                "pageInfo": {"hasPreviousPage": comment_total > len(comment_nodes)},
+                "nodes": list(comment_nodes),
+            },
+            "reviews": {
+                "totalCount": len(review_nodes),
+                "pageInfo": {"hasPreviousPage": False},
+                "nodes": list(review_nodes),
+            },
+        },
+    }
+
+
+def test_graphql_lists_the_comments_it_truncated_with_rest(fake_github, repo_cache, monkeypatch):
+    github = fake_github([make_pr(1)])
+    # 101 comments, the query only returned the last one
+    github.comments_by_number[1] = [
+        {"user": {"login": "bob", "type": "User"}, "created_at": f"2026-01-01T10:{minute:02}:00Z"}
+        for minute in range(50)
+    ] + [
+        {"user": {"login": "carol", "type": "User"}, "created_at": "2026-01-01T11:00:00Z"}
+    ] * 51
+    last_comment = {"author": {"login": "carol", "__typename": "User"},
+                    "createdAt": "2026-01-01T11:00:00Z"}
+    client = _client(github, repo_cache, enrichment_backend=EnrichmentBackend.GRAPHQL)
+    enricher = client.graphql_enricher
+    payload = {"data": {"pr0": _graphql_pr([last_comment], 101)}}
+    monkeypatch.setattr(
+        enricher, "fetch_details", lambda prs: enricher.parse_response(prs, payload)
+    )
+
+    result = client.get_pr_data(["alice"], section=PRSection.OPEN)
+
+    (pr, partial), = result[PRSection.OPEN]["alice"]
+    assert not partial
+    assert pr.comment_count_by_author == {"bob": 50, "carol": 51}
+    assert pr.non_bot_comment_count == 101
+    assert github.requests["/repos/org/repo/issues/1/comments"] == 1
+    assert github.requests["/repos/org/repo/pulls/1/reviews"] == 0
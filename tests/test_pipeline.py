@@ -0,0 +1,90 @@
+import threading
+import time
+
+from github_pr_watcher.cancellation import CancellationToken
+from github_pr_watcher.pipeline import FetchPipeline, Stage
+
+
+def _close_in_thread(stage: Stage, **kwargs) -> threading.Thread:
+    thread = threading.Thread(target=stage.close, kwargs=kwargs, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_close_waits_for_queued_items():
+    stage = Stage("test", workers=2, queue_size=10)
+    futures = [stage.submit(time.sleep, 0.01) for _ in range(6)]
+
+    stage.close()
+
+    assert all(future.done() and not future.cancelled() for future in futures)
+    assert stage.stats.completed == 6
+
+
+def test_close_cancelling_pending_only_runs_started_items():
+    started = threading.Event()
+    release = threading.Event()
+    stage = Stage("test", workers=1, queue_size=10)
+    running = stage.submit(lambda: started.set() or release.wait(5))
+    started.wait(5)
+    queued = [stage.submit(time.sleep, 0) for _ in range(3)]
+
+    closing = _close_in_thread(stage, cancel_pending=True)
+    release.set()
+    closing.join(5)
+
+    assert not closing.is_alive()
+    assert running.result() is True
+    assert all(future.cancelled() for future in queued)
+
+
+def test_cancel_during_close_does_not_hang():
+    token = CancellationToken()
+    stage = Stage("test", workers=2, queue_size=10, cancel_token=token)
+    futures = [stage.submit(time.sleep, 0.5) for _ in range(4)]
+
+    closing = _close_in_thread(stage)
+    time.sleep(0.1)
+    token.cancel()
+    closing.join(5)
+
+    assert not closing.is_alive()
+    assert sum(future.cancelled() for future in futures) == 2
+
+
+def test_submit_after_cancel_is_cancelled_right_away():
+    token = CancellationToken()
+    stage = Stage("test", workers=1, queue_size=10, cancel_token=token)
+    token.cancel()
+
+    future = stage.submit(time.sleep, 0)
+
+    assert future.cancelled()
+    stage.close()
+
+
+def test_items_run_in_priority_order():
+    started = threading.Event()
+    release = threading.Event()
+    order = []
+    stage = Stage("test", workers=1, queue_size=10)
+    stage.submit(lambda: started.set() or release.wait(5))
+    started.wait(5)
+    stage.submit_with_priority(5, order.append, "late")
+    stage.submit_with_priority(1, order.append, "first")
+    stage.submit_with_priority(1, order.append, "second")
+
+    release.set()
+    stage.close()
+
+    assert order == ["first", "second", "late"]
+
+
+def test_pipeline_exit_after_cancel_stops_every_stage():
+    token = CancellationToken()
+    with FetchPipeline(2, 2, 10, cancel_token=token) as pipeline:
+        futures = [pipeline.enrich.submit(time.sleep, 0.2) for _ in range(6)]
+        token.cancel()
+
+    assert all(not thread.is_alive() for stage in pipeline.stages for thread in stage._threads)
+    assert any(future.cancelled() for future in futures)
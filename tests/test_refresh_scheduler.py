@@ -0,0 +1,84 @@
+from github_pr_watcher.query_planner import PRSection, QueryPlanner
+from github_pr_watcher.refresh_scheduler import AdaptiveRefreshScheduler
+
+INTERVAL = 15 * 60
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _scheduler(clock: FakeClock, derive_review_sections: bool = True, **kwargs):
+    query_groups = QueryPlanner(derive_review_sections).plan(list(PRSection)).section_groups()
+    return AdaptiveRefreshScheduler(INTERVAL, query_groups=query_groups, clock=clock, **kwargs)
+
+
+def test_sections_sharing_a_search_share_its_schedule():
+    clock = FakeClock()
+    scheduler = _scheduler(clock)
+
+    clock.now = INTERVAL
+    assert scheduler.due_sections() == [
+        PRSection.OPEN, PRSection.NEEDS_REVIEW, PRSection.CHANGED_REQUESTED
+    ]
+    clock.now = 4 * INTERVAL
+    assert scheduler.due_sections() == list(PRSection)
+
+
+def test_a_shared_search_uses_the_lowest_multiplier_of_its_sections():
+    clock = FakeClock()
+    scheduler = _scheduler(clock, multipliers={PRSection.NEEDS_REVIEW: 0.5})
+
+    clock.now = INTERVAL / 2
+    assert scheduler.due_sections() == [
+        PRSection.OPEN, PRSection.NEEDS_REVIEW, PRSection.CHANGED_REQUESTED
+    ]
+
+
+def test_a_section_with_its_own_search_is_refreshed_on_its_own():
+    clock = FakeClock()
+    scheduler = _scheduler(
+        clock, derive_review_sections=False, multipliers={PRSection.CHANGED_REQUESTED: 0.5}
+    )
+
+    clock.now = INTERVAL / 2
+    assert scheduler.due_sections() == [PRSection.CHANGED_REQUESTED]
+
+
+def test_unchanged_searches_back_off_and_changes_reset_them():
+    clock = FakeClock()
+    scheduler = _scheduler(clock, backoff_after=2)
+    open_sections = [PRSection.OPEN, PRSection.NEEDS_REVIEW, PRSection.CHANGED_REQUESTED]
+
+    for _ in range(2):
+        scheduler.record_refresh(open_sections, changed=set(), active=set())
+    assert "OPEN+NEEDS_REVIEW+CHANGED_REQUESTED every 30m" in scheduler.describe()
+
+    # A change in any section of the search brings it back to the base interval
+    scheduler.record_refresh(open_sections, changed={PRSection.NEEDS_REVIEW}, active=set())
+    assert "OPEN+NEEDS_REVIEW+CHANGED_REQUESTED every 15m" in scheduler.describe()
+
+
+def test_active_searches_are_polled_more_often():
+    clock = FakeClock()
+    scheduler = _scheduler(clock)
+
+    scheduler.record_refresh([PRSection.OPEN], changed=set(), active={PRSection.OPEN})
+
+    clock.now = INTERVAL / 2
+    assert PRSection.OPEN in scheduler.due_sections()
+    assert PRSection.CLOSED not in scheduler.due_sections()
+
+
+def test_postpone_pushes_back_the_whole_search():
+    clock = FakeClock()
+    scheduler = _scheduler(clock)
+
+    scheduler.postpone([PRSection.NEEDS_REVIEW], 2 * INTERVAL)
+
+    clock.now = INTERVAL
+    assert scheduler.due_sections() == []
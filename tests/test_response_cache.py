@@ -0,0 +1,106 @@
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from github_pr_watcher.cache import ResponseCache
+from github_pr_watcher.github_prs_client import GitHubPRsClient
+from tests.factories import make_pr
+
+URL = "https://api.github.com/repos/org/repo/pulls/1"
+
+
+def _response(status_code: int, body: str = "", **headers) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = URL
+    response.encoding = "utf-8"
+    response._content = body.encode()
+    response.headers = CaseInsensitiveDict(headers)
+    return response
+
+
+def _cache(tmp_path, **kwargs) -> ResponseCache:
+    return ResponseCache(cache_file=tmp_path / "response_cache.json", **kwargs)
+
+
+def test_key_does_not_depend_on_param_order():
+    assert ResponseCache.key(URL, {"page": 2, "per_page": 100}) == ResponseCache.key(
+        URL, {"per_page": 100, "page": 2}
+    )
+    assert ResponseCache.key(URL) == URL
+
+
+def test_not_modified_serves_the_cached_body_with_fresh_headers(tmp_path):
+    cache = _cache(tmp_path)
+    cache.resolve(URL, _response(200, '{"id": 1}', ETag='"v1"', **{"X-RateLimit-Remaining": "9"}))
+    assert cache.conditional_headers(URL) == {"If-None-Match": '"v1"'}
+
+    response = cache.resolve(URL, _response(304, **{"X-RateLimit-Remaining": "8"}))
+
+    assert response.status_code == 200
+    assert response.json() == {"id": 1}
+    assert response.headers["X-From-Cache"] == "1"
+    assert response.headers["X-RateLimit-Remaining"] == "8"
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_responses_without_validators_are_not_cached(tmp_path):
+    cache = _cache(tmp_path)
+    cache.resolve(URL, _response(200, "{}"))
+
+    assert len(cache) == 0
+    assert cache.conditional_headers(URL) == {}
+
+
+def test_not_modified_for_an_evicted_entry_is_passed_through(tmp_path):
+    cache = _cache(tmp_path)
+
+    response = cache.resolve(URL, _response(304))
+
+    assert response.status_code == 304
+
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path):
+    cache = _cache(tmp_path, max_entries=2)
+    for key in ("a", "b"):
+        cache.store(key, URL, "{}", {"ETag": key})
+    cache.hit("a")
+    cache.store("c", URL, "{}", {"ETag": "c"})
+
+    assert cache.conditional_headers("b") == {}
+    assert cache.conditional_headers("a") == {"If-None-Match": "a"}
+    assert cache.stats.evictions == 1
+
+
+def test_entries_survive_a_restart(tmp_path):
+    cache = _cache(tmp_path)
+    cache.store(URL, URL, "{}", {"Last-Modified": "Thu, 01 Jan 2026 12:00:00 GMT"})
+    cache.save()
+
+    assert _cache(tmp_path).conditional_headers(URL) == {
+        "If-Modified-Since": "Thu, 01 Jan 2026 12:00:00 GMT"
+    }
+
+
+def test_key_depends_on_the_token():
+    assert ResponseCache.key(URL, identity="a") != ResponseCache.key(URL, identity="b")
+    assert ResponseCache.key(URL, identity="a") != ResponseCache.key(URL)
+
+
+def test_entries_are_only_revalidated_by_the_token_that_fetched_them(
+        fake_github, repo_cache, tmp_path
+):
+    github = fake_github([make_pr(1)])
+    cache = _cache(tmp_path)
+    first, second = (
+        GitHubPRsClient(token, response_cache=cache, repo_cache=repo_cache)
+        for token in ("first-token", "second-token")
+    )
+    repo_url = f"{github.url}/repos/org/repo"
+
+    for client in (first, first, second):
+        client.base_url = github.url
+        assert client._make_request("GET", repo_url).json() == {"archived": False}
+
+    assert github.requests["/repos/org/repo"] == 3
+    assert github.not_modified["/repos/org/repo"] == 1
+    assert len(cache) == 2
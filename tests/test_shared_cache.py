@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from github_pr_watcher.github_prs_client import GitHubPRsClient
+from github_pr_watcher.query_planner import PRSection
+from tests.factories import NOW, make_pr
+
+
+class FakeSharedCache:
+    def __init__(self, prs_by_user_by_section, stale_users=()):
+        self.prs_by_user_by_section = prs_by_user_by_section
+        self.stale_users = list(stale_users)
+
+    def snapshot(self, users):
+        return self.prs_by_user_by_section, self.stale_users
+
+
+def test_served_users_keep_prs_updated_before_the_delta_cursor():
+    # Updated before this watcher's cursor, but only fetched by the server afterwards
+    lagging_pr = make_pr(1, updated_at=NOW - timedelta(minutes=20))
+    client = GitHubPRsClient("token", shared_cache=FakeSharedCache(
+        {PRSection.OPEN: {"alice": [lagging_pr]}}
+    ))
+    batches = []
+
+    result = client.get_pr_data(
+        ["alice"],
+        section=PRSection.OPEN,
+        updated_since=NOW,
+        on_batch=lambda pr_section, user, prs: batches.append((pr_section, user, prs)),
+    )
+
+    assert result == {PRSection.OPEN: {"alice": [(lagging_pr, False)]}}
+    assert batches == [(PRSection.OPEN, "alice", [(lagging_pr, False)])]
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from github_pr_watcher.cancellation import CancellationToken, RefreshCancelled, current_token
+from github_pr_watcher.utils import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return "body"
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(single_flight.do, "key", fetch) for _ in range(4)]
+        while single_flight.coalesced < 3:
+            time.sleep(0.01)
+        release.set()
+        results = [future.result(5) for future in futures]
+
+    assert results == ["body"] * 4
+    assert len(calls) == 1
+    assert (single_flight.executed, single_flight.coalesced) == (1, 3)
+
+
+def test_errors_reach_every_caller_and_are_not_cached():
+    single_flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        single_flight.do("key", fail)
+    assert single_flight.do("key", lambda: "retried") == "retried"
+
+
+def _do_for(token: CancellationToken, single_flight: SingleFlight, fn):
+    current_token.set(token)
+    return single_flight.do("key", fn)
+
+
+def test_a_cancelled_leader_only_fails_its_own_refresh():
+    single_flight = SingleFlight()
+    cancelled, running = CancellationToken(), CancellationToken()
+    follower_joined = threading.Event()
+
+    def cancelled_fetch():
+        follower_joined.wait(5)
+        cancelled.cancel()
+        cancelled.raise_if_cancelled()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(_do_for, cancelled, single_flight, cancelled_fetch)
+        while not single_flight._calls:
+            time.sleep(0.01)
+        follower = executor.submit(_do_for, running, single_flight, lambda: "body")
+        while single_flight.coalesced < 1:
+            time.sleep(0.01)
+        follower_joined.set()
+
+        with pytest.raises(RefreshCancelled):
+            leader.result(5)
+        assert follower.result(5) == "body"
+    assert single_flight.executed == 2
+
+
+def test_a_cancelled_follower_still_fails():
+    single_flight = SingleFlight()
+    token = CancellationToken()
+    release = threading.Event()
+
+    def cancelled_fetch():
+        release.wait(5)
+        token.cancel()
+        token.raise_if_cancelled()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(_do_for, token, single_flight, cancelled_fetch) for _ in range(2)
+        ]
+        while single_flight.coalesced < 1:
+            time.sleep(0.01)
+        release.set()
+        for future in futures:
+            with pytest.raises(RefreshCancelled):
+                future.result(5)
+    assert single_flight.executed == 1
+
+
+def test_async_calls_share_one_execution_and_survive_a_cancelled_caller():
+    async def scenario():
+        single_flight = AsyncSingleFlight()
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return "body"
+
+        first = asyncio.ensure_future(single_flight.do("key", fetch))
+        second = asyncio.ensure_future(single_flight.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        return await second, single_flight
+
+    result, single_flight = asyncio.run(scenario())
+
+    assert result == "body"
+    assert (single_flight.executed, single_flight.coalesced) == (1, 1)
@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+from github_pr_watcher.rate_limiter import CORE
+from github_pr_watcher.token_pool import TokenPool
+
+
+@pytest.fixture
+def pool():
+    return TokenPool.from_tokens([("first", "t1"), ("second", "t2")])
+
+
+def _send(pool: TokenPool, status_code: int, headers=None, body: str = ""):
+    pooled = pool.acquire(CORE)
+    pool.observe(pooled, CORE, status_code, headers or {}, body)
+    return pooled
+
+
+def test_requests_go_to_the_token_with_most_budget_left(pool):
+    first, second = pool.tokens
+    pool.observe(pool.acquire(CORE), CORE, 200, {"X-RateLimit-Remaining": "10"})
+
+    assert pool.acquire(CORE) is second
+    pool.observe(second, CORE, 200, {"X-RateLimit-Remaining": "4000"})
+    assert pool.acquire(CORE) is second
+
+
+def test_401_quarantines_the_token(pool):
+    refused = _send(pool, 401)
+
+    assert refused.is_quarantined(time.time())
+    assert all(pool.acquire(CORE) is not refused for _ in range(5))
+
+
+@pytest.mark.parametrize("headers, body", [
+    ({}, '{"message": "Resource not accessible by personal access token"}'),
+    ({"X-GitHub-SSO": "required; url=https://github.com/orgs/org/sso"}, '{"message": "SAML"}'),
+    ({}, '{"message": "You have exceeded a secondary rate limit"}'),
+    ({"Retry-After": "30"}, ""),
+    ({"X-RateLimit-Remaining": "0"}, '{"message": "API rate limit exceeded"}'),
+])
+def test_403_for_a_single_request_keeps_the_token(pool, headers, body):
+    refused = _send(pool, 403, headers, body)
+
+    assert not refused.is_quarantined(time.time())
+
+
+def test_403_for_a_suspended_account_quarantines_the_token(pool):
+    refused = _send(pool, 403, body='{"message": "Sorry. Your account was suspended."}')
+
+    assert refused.is_quarantined(time.time())
+
+
+def test_quarantined_tokens_are_used_when_none_is_healthy():
+    pool = TokenPool.from_tokens([("only", "t1")])
+    refused = _send(pool, 401)
+
+    assert pool.acquire(CORE) is refused
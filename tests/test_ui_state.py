@@ -0,0 +1,106 @@
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from github_pr_watcher.ui.ui_state import SectionName, UIState
+from tests.factories import NOW, make_pr
+
+OPEN = SectionName.OPEN_PRS
+NEEDS_REVIEW = SectionName.NEEDS_REVIEW
+
+
+def _state(prs_by_author_by_section=None) -> UIState:
+    state = UIState(state_file=Path(os.devnull))
+    for section_name, prs_by_author in (prs_by_author_by_section or {}).items():
+        state.replace_users_pr_data(
+            section_name,
+            list(prs_by_author),
+            {user: [(pr, False) for pr in prs] for user, prs in prs_by_author.items()},
+        )
+    return state
+
+
+def _ids(state: UIState, section_name: SectionName) -> dict:
+    prs_by_author, _ = state.get_pr_data(section_name)
+    return {user: sorted(pr.id for pr in prs) for user, prs in prs_by_author.items()}
+
+
+def test_merge_replaces_changed_prs_and_keeps_the_others():
+    state = _state({OPEN: {"alice": [make_pr(1), make_pr(2)]}})
+    updated = make_pr(2, updated_at=NOW + timedelta(hours=1))
+
+    state.merge_pr_data(OPEN, {"alice": [(updated, False), (make_pr(3), False)]}, {2, 3})
+
+    prs_by_author, _ = state.get_pr_data(OPEN)
+    assert _ids(state, OPEN) == {"alice": [1, 2, 3]}
+    assert next(pr for pr in prs_by_author["alice"] if pr.id == 2).updated_at == updated.updated_at
+
+
+def test_merge_drops_changed_prs_that_left_the_section():
+    state = _state({
+        OPEN: {"alice": [make_pr(1)]},
+        NEEDS_REVIEW: {"alice": [make_pr(1), make_pr(2)]},
+    })
+
+    # PR 1 was updated and is now only open, e.g. after its review was submitted
+    state.merge_pr_data(NEEDS_REVIEW, {}, changed_pr_ids={1})
+
+    assert _ids(state, NEEDS_REVIEW) == {"alice": [2]}
+
+
+def test_merge_keeps_the_previous_version_of_partial_prs():
+    enriched = make_pr(1, comment_count_by_author={"bob": 1})
+    state = _state({OPEN: {"alice": [enriched]}})
+
+    state.merge_pr_data(OPEN, {"alice": [(make_pr(1), True)]}, {1})
+
+    prs_by_author, _ = state.get_pr_data(OPEN)
+    assert prs_by_author["alice"][0].comment_count_by_author == {"bob": 1}
+
+
+def test_update_keeps_the_previous_version_of_partial_prs():
+    enriched = make_pr(1, comment_count_by_author={"bob": 1})
+    state = _state({OPEN: {"alice": [enriched]}})
+
+    state.update_pr_data(OPEN, {"alice": [(make_pr(1), True), (make_pr(2), True)]})
+
+    prs_by_author, _ = state.get_pr_data(OPEN)
+    assert [pr.comment_count_by_author for pr in prs_by_author["alice"]] == [{"bob": 1}, None]
+
+
+def test_retain_drops_prs_no_longer_matched_by_the_query():
+    state = _state({OPEN: {"alice": [make_pr(1), make_pr(2)], "bob": [make_pr(3, "bob")]}})
+
+    assert state.retain_pr_ids(OPEN, {1, 3}) == 1
+    assert _ids(state, OPEN) == {"alice": [1], "bob": [3]}
+
+
+def test_retain_only_considers_the_given_users():
+    state = _state({OPEN: {"alice": [make_pr(1)], "bob": [make_pr(2, "bob")]}})
+
+    assert state.retain_pr_ids(OPEN, set(), users=["alice"]) == 1
+    assert _ids(state, OPEN) == {"bob": [2]}
+
+
+def test_delta_since_needs_every_section_fetched_once():
+    state = _state({section_name: {} for section_name in SectionName})
+    assert state.delta_since() is None
+
+    state.mark_synced(list(SectionName), NOW)
+    state.mark_synced([OPEN], NOW + timedelta(hours=1))
+
+    assert state.delta_since(margin=timedelta(minutes=2)) == NOW - timedelta(minutes=2)
+    assert state.delta_since(users=["alice"]) is None
+
+
+def test_delta_since_needs_every_user_fetched_once():
+    state = _state({section_name: {} for section_name in SectionName})
+    state.mark_synced(list(SectionName), NOW)
+    state.mark_users_synced(["alice"], NOW + timedelta(hours=1))
+
+    assert state.delta_since(users=["alice"], margin=timedelta(0)) == NOW
+    assert state.delta_since(users=["alice"], margin=timedelta(0), by_user=True) == (
+        NOW + timedelta(hours=1)
+    )
+    # A user that was just added has no PRs yet, only a full refresh fetches them
+    assert state.delta_since(users=["alice", "carol"]) is None
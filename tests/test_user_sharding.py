@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+
+from github_pr_watcher.token_pool import TokenPool
+from github_pr_watcher.user_sharding import UserShardPlanner
+
+USERS = [f"user{index}" for index in range(120)]
+
+
+def _planner(refresh_interval_seconds: float = 15 * 60) -> UserShardPlanner:
+    planner = UserShardPlanner(
+        TokenPool.from_tokens([("default", "token")]),
+        tick_seconds=15,
+        refresh_interval_seconds=refresh_interval_seconds,
+    )
+    # Cheap users, so that the rate limit budget doesn't cap the shards
+    planner.requests_per_user = {resource: 0.1 for resource in planner.requests_per_user}
+    return planner
+
+
+def test_shards_are_spread_over_the_refresh_interval():
+    # 60 ticks in 15 minutes: two users per tick refresh everyone once per interval
+    assert _planner().shard_size(len(USERS)) == 2
+    assert _planner(refresh_interval_seconds=15).shard_size(len(USERS)) > 2
+
+
+def test_users_never_fetched_come_first():
+    synced_at = {user: datetime.now(timezone.utc) - timedelta(hours=1) for user in USERS[:-1]}
+
+    assert _planner().next_shard(USERS, synced_at)[0] == USERS[-1]
+
+
+def test_nothing_is_due_while_every_user_is_fresh():
+    synced_at = {user: datetime.now(timezone.utc) - timedelta(minutes=5) for user in USERS}
+    planner = _planner()
+
+    assert planner.next_shard(USERS, synced_at) == []
+    assert len(planner.next_shard(USERS, synced_at, due_only=False)) == 2
+
+
+def test_costly_users_shrink_the_shard():
+    planner = _planner(refresh_interval_seconds=15)
+    full_size = planner.shard_size(len(USERS))
+    planner.requests_per_user = {resource: 1000.0 for resource in planner.requests_per_user}
+
+    assert planner.shard_size(len(USERS)) < full_size
+    assert planner.shard_size(len(USERS)) >= planner.min_shard_size
@@ -0,0 +1,108 @@
+import json
+import os
+from dataclasses import replace
+from datetime import timedelta
+from pathlib import Path
+from urllib import request
+
+import pytest
+
+from github_pr_watcher.ui.pr_placement import SectionPlacer
+from github_pr_watcher.ui.ui_state import SectionName, UIState
+from github_pr_watcher.ui.webhook_updates import WebhookUpdater
+from github_pr_watcher.webhooks import WebhookReceiver, replay
+from tests.factories import NOW, make_pr
+
+SECRET = "webhook-secret"
+OPEN = SectionName.OPEN_PRS
+
+
+def _pull_request_payload(pr, action="edited") -> dict:
+    return json.loads(json.dumps({
+        "action": action,
+        "pull_request": pr.to_dict(),
+        "repository": {"name": pr.repo_name, "owner": {"login": pr.repo_owner}},
+    }, default=str))
+
+
+def _updater(prs=()) -> WebhookUpdater:
+    state = UIState(state_file=Path(os.devnull))
+    for pr in prs:
+        state.upsert_pr(OPEN, pr.user.login, pr)
+    return WebhookUpdater(SectionPlacer(state, lambda: ["alice"], lambda: 7))
+
+
+def _shown(updater: WebhookUpdater) -> dict:
+    prs_by_author, _ = updater.ui_state.get_pr_data(OPEN)
+    return {pr.id: pr for pr in prs_by_author.get("alice", [])}
+
+
+@pytest.fixture
+def receiver():
+    updater = _updater([make_pr(1)])
+    receiver = WebhookReceiver(SECRET, updater.apply, port=0)
+    receiver.updater = updater
+    receiver.start()
+    yield receiver
+    receiver.stop()
+
+
+def test_a_signed_pull_request_delivery_is_applied(receiver):
+    edited = replace(make_pr(1, updated_at=NOW + timedelta(hours=1)), title="Renamed")
+    body = json.dumps(_pull_request_payload(edited)).encode()
+
+    assert replay(receiver.address, "pull_request", body, SECRET) == 202
+
+    assert _shown(receiver.updater)[1].title == "Renamed"
+    assert receiver.received_within(60)
+
+
+@pytest.mark.parametrize("secret", ["wrong-secret", None])
+def test_a_delivery_without_a_valid_signature_is_rejected(receiver, secret):
+    edited = replace(make_pr(1, updated_at=NOW + timedelta(hours=1)), title="Renamed")
+    body = json.dumps(_pull_request_payload(edited)).encode()
+
+    if secret is None:
+        unsigned = request.Request(
+            receiver.address, data=body, method="POST", headers={"X-GitHub-Event": "pull_request"}
+        )
+        with pytest.raises(request.HTTPError) as error:
+            request.urlopen(unsigned)
+        status = error.value.code
+    else:
+        status = replay(receiver.address, "pull_request", body, secret)
+
+    assert status == 401
+    assert _shown(receiver.updater)[1].title == "PR 1"
+    assert not receiver.received_within(60)
+
+
+@pytest.mark.parametrize("event", ["ping", "release"])
+def test_unsupported_events_are_acknowledged_and_ignored(receiver, event):
+    body = json.dumps({"zen": "Keep it logically awesome."}).encode()
+
+    assert replay(receiver.address, event, body, SECRET) == 202
+
+    assert _shown(receiver.updater)[1].title == "PR 1"
+
+
+def test_an_older_delivery_does_not_undo_a_newer_one():
+    updater = _updater([make_pr(1)])
+    newer = replace(make_pr(1, updated_at=NOW + timedelta(hours=2), additions=5), title="Newer")
+    older = replace(make_pr(1, updated_at=NOW + timedelta(hours=1), additions=3), title="Older")
+
+    updater.apply("pull_request", _pull_request_payload(newer))
+    update = updater.apply("pull_request", _pull_request_payload(older))
+
+    shown = _shown(updater)[1]
+    assert (shown.title, shown.additions, shown.updated_at) == ("Newer", 5, newer.updated_at)
+    assert not update.sections
+
+
+def test_missing_counts_keep_the_previous_ones():
+    updater = _updater([make_pr(1, additions=5)])
+    edited = make_pr(1, updated_at=NOW + timedelta(hours=1), additions=None)
+
+    updater.apply("pull_request", _pull_request_payload(edited))
+
+    assert _shown(updater)[1].additions == 5